@@ -1,3 +1,3 @@
-"""
-Zhihu Hot Questions Scraper
+"""
+Zhihu Hot Questions Scraper
 """ 
\ No newline at end of file
@@ -1,3 +1,3 @@
-"""
-Config module for Zhihu Hot Questions Scraper
+"""
+Config module for Zhihu Hot Questions Scraper
 """ 
\ No newline at end of file
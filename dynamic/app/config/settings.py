@@ -1,136 +1,209 @@
-"""
-Configuration settings for the Zhihu Hot Questions Scraper
-"""
-import os
-import json
-from pathlib import Path
-
-class Settings:
-    """Settings class for the scraper application"""
-    
-    def __init__(self):
-        """初始化配置"""
-        # 默认配置
-        self.cookies_file = os.path.join(os.getcwd(), "cookies.json")
-        self.zhihu_url = "https://www.zhihu.com/question/waiting"  # 知乎等你来答页面
-        self.scrape_interval = 60  # 爬取间隔，单位：分钟
-        self.question_limit = 20  # 每次爬取的问题数量限制
-        self.database_path = os.path.join(os.getcwd(), "questions.db")
-        self.headless = True  # 设置为True，使用无头模式
-        self.debug = True  # 保持调试模式打开，便于排错
-        
-        # 加载配置文件
-        self.load_config()
-    
-    def load_config(self):
-        """从config.json加载配置"""
-        config_path = os.path.join(os.getcwd(), "config.json")
-        try:
-            if os.path.exists(config_path):
-                with open(config_path, "r", encoding="utf-8") as f:
-                    config = json.load(f)
-                    self.cookies_file = config.get("cookies_file", self.cookies_file)
-                    self.zhihu_url = config.get("zhihu_url", self.zhihu_url)
-                    self.scrape_interval = config.get("scrape_interval", self.scrape_interval)
-                    self.question_limit = config.get("question_limit", self.question_limit)
-                    self.database_path = config.get("database_path", self.database_path)
-                    self.headless = config.get("headless", self.headless)  # 正常读取配置的headless设置
-                    self.debug = config.get("debug", True)
-                print(f"已加载配置: {config}")
-        except Exception as e:
-            print(f"加载配置文件出错: {e}")
-            print("将使用默认配置")
-    
-    def save_to_file(self, config_file):
-        """Save current settings to a JSON configuration file"""
-        config = {
-            'zhihu_url': self.zhihu_url,
-            'cookies_file': self.cookies_file,
-            'scrape_interval': self.scrape_interval,
-            'question_limit': self.question_limit,
-            'database_path': self.database_path,
-            'headless': self.headless
-        }
-        
-        try:
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4)
-        except Exception as e:
-            print(f"Error saving config file: {e}")
-    
-    def save_cookies(self, cookies_text: str) -> bool:
-        """保存 cookies 到文件"""
-        try:
-            # 处理 cookies
-            cookies_json = {}
-            if cookies_text.strip():
-                # 如果输入是JSON格式
-                if cookies_text.strip().startswith('{') and cookies_text.strip().endswith('}'):
-                    try:
-                        cookies_json = json.loads(cookies_text)
-                    except:
-                        print("无法解析JSON格式，尝试解析Cookie字符串")
-                        cookies_json = self.parse_cookie_string(cookies_text)
-                # 如果输入是Cookie: 开头的标头格式
-                elif cookies_text.strip().startswith('Cookie:'):
-                    cookies_text = cookies_text.replace('Cookie:', '').strip()
-                    cookies_json = self.parse_cookie_string(cookies_text)
-                # 普通Cookie字符串格式：name=value; name2=value2
-                else:
-                    cookies_json = self.parse_cookie_string(cookies_text)
-            
-            print(f"处理后的cookies: {cookies_json}")
-            print(f"cookies个数: {len(cookies_json)}")
-            
-            # 保存到文件
-            with open(self.cookies_file, 'w', encoding='utf-8') as f:
-                json.dump(cookies_json, f, ensure_ascii=False, indent=4)
-            
-            return True
-        except Exception as e:
-            print(f"保存cookies时出错: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
-    
-    def load_cookies(self):
-        """Load cookies from file"""
-        if not os.path.exists(self.cookies_file):
-            return {}
-            
-        try:
-            with open(self.cookies_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading cookies: {e}")
-            return {}
-
-    def parse_cookie_string(self, cookie_string: str) -> dict:
-        """解析Cookie字符串，转换为字典格式"""
-        cookies = {}
-        try:
-            if not cookie_string:
-                return {}
-            
-            # 解析cookie字符串
-            parts = cookie_string.split(';')
-            for part in parts:
-                part = part.strip()
-                if not part:
-                    continue
-                
-                # 处理特殊情况，如果没有=号，跳过
-                if '=' not in part:
-                    continue
-                
-                key, value = part.split('=', 1)
-                cookies[key.strip()] = value.strip()
-            
-            return cookies
-        except Exception as e:
-            print(f"解析Cookie字符串时出错: {e}")
-            return {}
-
-
-# Create a default settings instance
+"""
+Configuration settings for the Zhihu Hot Questions Scraper
+"""
+import os
+import json
+from pathlib import Path
+
+class Settings:
+    """Settings class for the scraper application"""
+    
+    def __init__(self):
+        """初始化配置"""
+        # 默认配置
+        self.cookies_file = os.path.join(os.getcwd(), "cookies.json")
+        self.zhihu_url = "https://www.zhihu.com/question/waiting"  # 知乎等你来答页面
+        self.scrape_interval = 60  # 爬取间隔，单位：分钟
+        self.question_limit = 20  # 每次爬取的问题数量限制
+        self.database_path = os.path.join(os.getcwd(), "questions.db")
+        self.headless = True  # 设置为True，使用无头模式
+        self.debug = True  # 保持调试模式打开，便于排错
+        # 多账号上下文池：每项为 {"cookies_file", "user_agent", "viewport", "min_interval", "name"}，
+        # 为空时只使用 cookies_file 一个账号
+        self.accounts = []
+        # 详情爬虫：每次定时爬取后抓取的问题页数量（0 表示不抓取）和并发数
+        self.detail_pages = 50
+        self.detail_concurrency = 4
+        # 数据保留：快照保留原始精度的天数、快照和问题（按最后一次出现）的保留天数，
+        # 超期数据归档到 archive_dir；null 表示不限制。维护任务每 maintenance_interval 小时运行一次
+        self.snapshot_raw_days = 7
+        self.snapshot_retention_days = 90
+        self.question_retention_days = 180
+        self.archive_dir = os.path.join(os.getcwd(), "archive")
+        self.maintenance_interval = 24
+        # 调度器在独立的子进程中运行浏览器爬虫和详情爬虫；子进程连同浏览器的内存
+        # 超过 worker_memory_limit_mb（MB，null 表示不限制）时自动重启
+        self.worker_process = True
+        self.worker_memory_limit_mb = 1500
+        # 分布式爬取：crawl_mode 为 "distributed" 时调度器不在本机爬取，而是为爬虫节点
+        # （run.py crawl-worker）排入任务；worker_token 非空时节点必须带上相同的令牌
+        self.crawl_mode = "local"
+        self.worker_token = ""
+        # 站点适配器：extra_sites 为每轮在知乎之后由爬取引擎抓取的其他站点（如 ["douban"]），
+        # site_plugins 为额外导入的适配器模块（如 "mysites.weibo"）
+        self.extra_sites = []
+        self.site_plugins = []
+        # 浏览器静态资源缓存：带内容哈希的 JS/CSS/字体存到 asset_cache_dir，跨运行复用，
+        # 总大小上限 asset_cache_mb（MB，0 或 null 表示不使用缓存）
+        self.asset_cache_dir = os.path.join(os.getcwd(), "asset_cache")
+        self.asset_cache_mb = 256
+        # 性能剖析（--profile 或设置页）的输出目录，每次剖析一个子目录
+        self.profile_dir = os.path.join(os.getcwd(), "profiles")
+        # 知乎站点地址；压测和浸泡测试时指向本地模拟站点（bench/stubsite.py）
+        self.zhihu_base_url = "https://www.zhihu.com"
+        # 列式分析库（DuckDB，可选依赖）的路径，每轮爬取后增量导出，供 /api/stats 查询；留空则关闭
+        self.analytics_path = os.path.join(os.getcwd(), "analytics.duckdb")
+        
+        # 加载配置文件
+        self.load_config()
+    
+    def load_config(self):
+        """从config.json加载配置"""
+        config_path = os.path.join(os.getcwd(), "config.json")
+        try:
+            if os.path.exists(config_path):
+                with open(config_path, "r", encoding="utf-8") as f:
+                    config = json.load(f)
+                    self.cookies_file = config.get("cookies_file", self.cookies_file)
+                    self.zhihu_url = config.get("zhihu_url", self.zhihu_url)
+                    self.scrape_interval = config.get("scrape_interval", self.scrape_interval)
+                    self.question_limit = config.get("question_limit", self.question_limit)
+                    self.database_path = config.get("database_path", self.database_path)
+                    self.headless = config.get("headless", self.headless)  # 正常读取配置的headless设置
+                    self.debug = config.get("debug", True)
+                    self.accounts = config.get("accounts", self.accounts)
+                    self.detail_pages = config.get("detail_pages", self.detail_pages)
+                    self.detail_concurrency = config.get("detail_concurrency", self.detail_concurrency)
+                    self.snapshot_raw_days = config.get("snapshot_raw_days", self.snapshot_raw_days)
+                    self.snapshot_retention_days = config.get("snapshot_retention_days", self.snapshot_retention_days)
+                    self.question_retention_days = config.get("question_retention_days", self.question_retention_days)
+                    self.archive_dir = config.get("archive_dir", self.archive_dir)
+                    self.maintenance_interval = config.get("maintenance_interval", self.maintenance_interval)
+                    self.worker_process = config.get("worker_process", self.worker_process)
+                    self.worker_memory_limit_mb = config.get("worker_memory_limit_mb", self.worker_memory_limit_mb)
+                    self.crawl_mode = config.get("crawl_mode", self.crawl_mode)
+                    self.worker_token = config.get("worker_token", self.worker_token)
+                    self.extra_sites = config.get("extra_sites", self.extra_sites)
+                    self.site_plugins = config.get("site_plugins", self.site_plugins)
+                    self.asset_cache_dir = config.get("asset_cache_dir", self.asset_cache_dir)
+                    self.asset_cache_mb = config.get("asset_cache_mb", self.asset_cache_mb)
+                    self.profile_dir = config.get("profile_dir", self.profile_dir)
+                    self.zhihu_base_url = config.get("zhihu_base_url", self.zhihu_base_url)
+                    self.analytics_path = config.get("analytics_path", self.analytics_path)
+                print(f"已加载配置: {config}")
+        except Exception as e:
+            print(f"加载配置文件出错: {e}")
+            print("将使用默认配置")
+    
+    def save_to_file(self, config_file):
+        """Save current settings to a JSON configuration file"""
+        config = {
+            'zhihu_url': self.zhihu_url,
+            'cookies_file': self.cookies_file,
+            'scrape_interval': self.scrape_interval,
+            'question_limit': self.question_limit,
+            'database_path': self.database_path,
+            'headless': self.headless,
+            'accounts': self.accounts,
+            'detail_pages': self.detail_pages,
+            'detail_concurrency': self.detail_concurrency,
+            'snapshot_raw_days': self.snapshot_raw_days,
+            'snapshot_retention_days': self.snapshot_retention_days,
+            'question_retention_days': self.question_retention_days,
+            'archive_dir': self.archive_dir,
+            'maintenance_interval': self.maintenance_interval,
+            'worker_process': self.worker_process,
+            'worker_memory_limit_mb': self.worker_memory_limit_mb,
+            'crawl_mode': self.crawl_mode,
+            'worker_token': self.worker_token,
+            'extra_sites': self.extra_sites,
+            'site_plugins': self.site_plugins,
+            'asset_cache_dir': self.asset_cache_dir,
+            'asset_cache_mb': self.asset_cache_mb,
+            'profile_dir': self.profile_dir,
+            'zhihu_base_url': self.zhihu_base_url,
+            'analytics_path': self.analytics_path
+        }
+        
+        try:
+            with open(config_file, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=4)
+        except Exception as e:
+            print(f"Error saving config file: {e}")
+    
+    def save_cookies(self, cookies_text: str) -> bool:
+        """保存 cookies 到文件"""
+        try:
+            # 处理 cookies
+            cookies_json = {}
+            if cookies_text.strip():
+                # 如果输入是JSON格式
+                if cookies_text.strip().startswith('{') and cookies_text.strip().endswith('}'):
+                    try:
+                        cookies_json = json.loads(cookies_text)
+                    except:
+                        print("无法解析JSON格式，尝试解析Cookie字符串")
+                        cookies_json = self.parse_cookie_string(cookies_text)
+                # 如果输入是Cookie: 开头的标头格式
+                elif cookies_text.strip().startswith('Cookie:'):
+                    cookies_text = cookies_text.replace('Cookie:', '').strip()
+                    cookies_json = self.parse_cookie_string(cookies_text)
+                # 普通Cookie字符串格式：name=value; name2=value2
+                else:
+                    cookies_json = self.parse_cookie_string(cookies_text)
+            
+            print(f"处理后的cookies: {cookies_json}")
+            print(f"cookies个数: {len(cookies_json)}")
+            
+            # 保存到文件
+            with open(self.cookies_file, 'w', encoding='utf-8') as f:
+                json.dump(cookies_json, f, ensure_ascii=False, indent=4)
+            
+            return True
+        except Exception as e:
+            print(f"保存cookies时出错: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    
+    def load_cookies(self):
+        """Load cookies from file"""
+        if not os.path.exists(self.cookies_file):
+            return {}
+            
+        try:
+            with open(self.cookies_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading cookies: {e}")
+            return {}
+
+    def parse_cookie_string(self, cookie_string: str) -> dict:
+        """解析Cookie字符串，转换为字典格式"""
+        cookies = {}
+        try:
+            if not cookie_string:
+                return {}
+            
+            # 解析cookie字符串
+            parts = cookie_string.split(';')
+            for part in parts:
+                part = part.strip()
+                if not part:
+                    continue
+                
+                # 处理特殊情况，如果没有=号，跳过
+                if '=' not in part:
+                    continue
+                
+                key, value = part.split('=', 1)
+                cookies[key.strip()] = value.strip()
+            
+            return cookies
+        except Exception as e:
+            print(f"解析Cookie字符串时出错: {e}")
+            return {}
+
+
+# Create a default settings instance
 settings = Settings() 
\ No newline at end of file
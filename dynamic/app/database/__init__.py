@@ -1,3 +1,3 @@
-"""
-Database module for Zhihu Hot Questions Scraper
+"""
+Database module for Zhihu Hot Questions Scraper
 """ 
\ No newline at end of file
@@ -0,0 +1,272 @@
+"""
+Columnar analytics store: questions and metric snapshots exported to DuckDB
+"""
+import os
+import csv
+import sqlite3
+import datetime
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+try:
+    import duckdb
+except ImportError:  # duckdb is optional, without it there is no /api/stats
+    duckdb = None
+
+from app.config.settings import settings
+from app.metrics.registry import span
+
+# Exported columns and their DuckDB types; SQLite rows are read in this order
+QUESTION_EXPORT = (
+    ('id', 'VARCHAR'),
+    ('title', 'VARCHAR'),
+    ('answer_count', 'BIGINT'),
+    ('follow_count', 'BIGINT'),
+    ('hot_score', 'BIGINT'),
+    ('first_seen', 'TIMESTAMP'),
+    ('last_seen', 'TIMESTAMP'),
+)
+SNAPSHOT_EXPORT = (
+    ('question_id', 'VARCHAR'),
+    ('taken_at', 'TIMESTAMP'),
+    ('answer_count', 'BIGINT'),
+    ('follow_count', 'BIGINT'),
+    ('hot_score', 'BIGINT'),
+)
+
+# (table, columns, primary key, column that only grows for new or changed rows)
+EXPORTS = (
+    ('questions', QUESTION_EXPORT, ('id',), 'last_seen'),
+    ('question_snapshots', SNAPSHOT_EXPORT, ('question_id', 'taken_at'), 'taken_at'),
+)
+
+# Each export reads again from this far before the last exported row, so
+# rows committed slightly out of order (results of distributed crawl
+# workers) are not missed; rows exported twice simply replace themselves
+EXPORT_OVERLAP = datetime.timedelta(hours=1)
+
+METRICS = ('answer_count', 'follow_count', 'hot_score')
+
+
+class AnalyticsUnavailable(Exception):
+    """The analytics store is disabled or duckdb is not installed"""
+
+
+def _histogram_label(bucket: int) -> str:
+    """Label of a power-of-ten bucket: -1 is zero, 0 is 1-9, 1 is 10-99, ..."""
+    if bucket < 0:
+        return '0'
+    return f'{10 ** bucket}-{10 ** (bucket + 1) - 1}'
+
+
+class AnalyticsStore:
+    """DuckDB copy of the questions and question_snapshots tables.
+
+    SQLite stays the system of record; export() appends what changed since
+    the previous export (tracked by last_seen / taken_at watermarks), so it is
+    cheap enough to run after every scrape. Rows that retention later deletes
+    from SQLite stay here, so aggregations can cover months of history with
+    DuckDB's vectorized execution instead of Python scans.
+
+    DuckDB lets only one process open the file for writing, so connections
+    are opened per call and closed right after; calls in one process are
+    serialized by a lock.
+    """
+
+    _instances: Dict[str, 'AnalyticsStore'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str, chunk_size: int = 50000):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.lock = threading.Lock()
+        # Data version of the SQLite database at the last export
+        self.exported_version = None
+
+    @classmethod
+    def for_path(cls, path: str) -> 'AnalyticsStore':
+        """Shared store for a DuckDB file, so exports and queries share its lock"""
+        path = os.path.abspath(path)
+        with cls._instances_lock:
+            store = cls._instances.get(path)
+            if store is None:
+                store = cls._instances[path] = cls(path)
+            return store
+
+    @classmethod
+    def from_settings(cls) -> Optional['AnalyticsStore']:
+        """Store at settings.analytics_path; None when disabled or duckdb is missing"""
+        if duckdb is None or not settings.analytics_path:
+            return None
+        return cls.for_path(settings.analytics_path)
+
+    def _connect(self):
+        """Open the DuckDB file and create the tables if needed"""
+        if duckdb is None:
+            raise AnalyticsUnavailable("duckdb is not installed")
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = duckdb.connect(self.path)
+        for table, columns, key, _ in EXPORTS:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                f"{', '.join(f'{name} {column_type}' for name, column_type in columns)}, "
+                f"PRIMARY KEY ({', '.join(key)}))"
+            )
+        conn.execute('CREATE TABLE IF NOT EXISTS export_state (name VARCHAR PRIMARY KEY, watermark VARCHAR)')
+        return conn
+
+    def export(self, database_path: str, version: Optional[int] = None) -> Dict[str, int]:
+        """Copy rows new or changed since the last export; returns rows copied per table.
+
+        version is the SQLite data version the caller read before exporting,
+        remembered so ensure_exported() can skip exports when nothing changed.
+        """
+        with self.lock, span("analytics_export"):
+            source = sqlite3.connect(f'file:{os.path.abspath(database_path)}?mode=ro', uri=True)
+            conn = self._connect()
+            try:
+                copied = {table: self._export_table(source, conn, table, columns, column)
+                          for table, columns, _, column in EXPORTS}
+            finally:
+                conn.close()
+                source.close()
+            if version is not None:
+                self.exported_version = version
+            return copied
+
+    def ensure_exported(self, database_path: str, version: int):
+        """Export unless the store already holds data version `version`"""
+        if self.exported_version != version:
+            self.export(database_path, version)
+
+    def _export_table(self, source, conn, table: str, columns, column: str) -> int:
+        row = conn.execute('SELECT watermark FROM export_state WHERE name = ?', [table]).fetchone()
+        params = []
+        where = ''
+        if row and row[0]:
+            since = datetime.datetime.fromisoformat(row[0]) - EXPORT_OVERLAP
+            where = f' WHERE {column} >= ?'
+            params.append(since.isoformat())
+
+        names = [name for name, _ in columns]
+        cursor = source.execute(f"SELECT {', '.join(names)} FROM {table}{where}", params)
+        watermark = row[0] if row else None
+        copied = 0
+        while True:
+            rows = cursor.fetchmany(self.chunk_size)
+            if not rows:
+                break
+            self._copy_rows(conn, table, columns, rows)
+            copied += len(rows)
+            position = names.index(column)
+            latest = max((r[position] for r in rows if r[position]), default=None)
+            if latest and (watermark is None or latest > watermark):
+                watermark = latest
+
+        if watermark:
+            conn.execute('INSERT OR REPLACE INTO export_state VALUES (?, ?)', [table, watermark])
+        return copied
+
+    def _copy_rows(self, conn, table: str, columns, rows: List[tuple]):
+        """Bulk load rows through a temporary CSV file.
+
+        DuckDB's CSV reader loads a chunk in one vectorized pass, where
+        executemany would insert row by row.
+        """
+        fd, csv_path = tempfile.mkstemp(suffix='.csv', prefix='analytics_')
+        try:
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f, lineterminator='\n').writerows(rows)
+            casts = ', '.join(f'TRY_CAST({name} AS {column_type})' for name, column_type in columns)
+            raw_columns = ', '.join(f"'{name}': 'VARCHAR'" for name, _ in columns)
+            conn.execute(
+                f"INSERT OR REPLACE INTO {table} SELECT {casts} FROM read_csv(?, header = false, "
+                f"auto_detect = false, delim = ',', quote = '\"', escape = '\"', new_line = '\\n', "
+                f"columns = {{{raw_columns}}})",
+                [csv_path]
+            )
+        finally:
+            os.remove(csv_path)
+
+    def stats(self, days: float = 7, now: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+        """Aggregations over the last `days` days.
+
+        - new_questions: questions first seen per hour (per day for windows over a week);
+        - updates: snapshots per bucket, i.e. questions new or changed in the
+          scrapes of that bucket, split into hot-list entries (with a heat
+          value) and the other source pages;
+        - distributions: quantiles and power-of-ten histograms of answers,
+          followers and heat over the questions seen in the window.
+        """
+        now = now or datetime.datetime.now()
+        since = now - datetime.timedelta(days=days)
+        bucket = 'hour' if days <= 7 else 'day'
+        with self.lock, span("analytics_query"):
+            conn = self._connect()
+            try:
+                totals = conn.execute(
+                    'SELECT count(*), min(first_seen), max(last_seen) FROM questions'
+                ).fetchone()
+                snapshot_total = conn.execute('SELECT count(*) FROM question_snapshots').fetchone()[0]
+                new_questions = conn.execute(
+                    'SELECT date_trunc(?, first_seen) AS bucket, count(*) FROM questions '
+                    'WHERE first_seen >= ? GROUP BY bucket ORDER BY bucket',
+                    [bucket, since]
+                ).fetchall()
+                updates = conn.execute(
+                    'SELECT date_trunc(?, taken_at) AS bucket, count(*), '
+                    'count(*) FILTER (WHERE hot_score IS NOT NULL), '
+                    'count(*) FILTER (WHERE hot_score IS NULL) '
+                    'FROM question_snapshots WHERE taken_at >= ? GROUP BY bucket ORDER BY bucket',
+                    [bucket, since]
+                ).fetchall()
+                distributions = {metric: self._distribution(conn, metric, since) for metric in METRICS}
+            finally:
+                conn.close()
+
+        def iso(value):
+            return value.isoformat() if value is not None else None
+
+        return {
+            'window_days': days,
+            'since': since.isoformat(timespec='seconds'),
+            'bucket': bucket,
+            'totals': {
+                'questions': totals[0],
+                'snapshots': snapshot_total,
+                'first_seen': iso(totals[1]),
+                'last_seen': iso(totals[2]),
+            },
+            'new_questions': [{'bucket': iso(b), 'count': n} for b, n in new_questions],
+            'updates': [
+                {'bucket': iso(b), 'snapshots': n, 'hot_list': hot, 'other_pages': other}
+                for b, n, hot, other in updates
+            ],
+            'distributions': distributions,
+        }
+
+    def _distribution(self, conn, metric: str, since: datetime.datetime) -> Dict[str, Any]:
+        """Summary and power-of-ten histogram of one metric over questions seen since `since`"""
+        count, mean, maximum, quantiles = conn.execute(
+            f'SELECT count({metric}), avg({metric}), max({metric}), '
+            f'quantile_cont({metric}, [0.5, 0.9, 0.99]) '
+            f'FROM questions WHERE last_seen >= ?',
+            [since]
+        ).fetchone()
+        histogram = conn.execute(
+            f'SELECT CASE WHEN {metric} <= 0 THEN -1 ELSE floor(log10({metric}))::INTEGER END AS bucket, '
+            f'count(*) FROM questions WHERE last_seen >= ? AND {metric} IS NOT NULL '
+            f'GROUP BY bucket ORDER BY bucket',
+            [since]
+        ).fetchall()
+        p50, p90, p99 = quantiles or (None, None, None)
+        return {
+            'count': count,
+            'mean': round(mean, 2) if mean is not None else None,
+            'p50': p50,
+            'p90': p90,
+            'p99': p99,
+            'max': maximum,
+            'histogram': [{'range': _histogram_label(b), 'count': n} for b, n in histogram],
+        }
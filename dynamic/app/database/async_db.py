@@ -0,0 +1,94 @@
+"""
+Async data access layer for the FastAPI server
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from app.database.models import QuestionDatabase, Question
+
+
+class AsyncQuestionDatabase:
+    """Awaitable wrapper around QuestionDatabase.
+
+    SQLite calls are blocking, so every method is executed on a small
+    dedicated thread pool instead of the event loop. The wrapped
+    QuestionDatabase serialises access to its connection, the pool only
+    keeps slow queries and scrape writes from stalling other requests.
+    """
+
+    def __init__(self, database_path: str, max_workers: int = 4):
+        """Initialize the wrapper and its thread pool"""
+        self.db = QuestionDatabase(database_path)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking database call on the thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def add_question(self, question: Question) -> bool:
+        """Add a question to the database"""
+        return await self._run(self.db.add_question, question)
+
+    async def add_questions(self, questions: List[Question]) -> int:
+        """Add multiple questions to the database"""
+        return await self._run(self.db.add_questions, questions)
+
+    async def get_question(self, question_id: str) -> Optional[Question]:
+        """Get a question by ID"""
+        return await self._run(self.db.get_question, question_id)
+
+    async def get_all_questions(self, limit: int = 100, offset: int = 0) -> List[Question]:
+        """Get all questions with pagination"""
+        return await self._run(self.db.get_all_questions, limit=limit, offset=offset)
+
+    async def get_question_rows(self, limit: Optional[int] = 100, offset: int = 0) -> List[tuple]:
+        """Get questions as plain tuples"""
+        return await self._run(self.db.get_question_rows, limit=limit, offset=offset)
+
+    async def get_trending(self, limit: int = 10):
+        """Read the trending ranking as (question, score) pairs"""
+        return await self._run(self.db.get_trending, limit=limit)
+
+    async def count_questions(self) -> int:
+        """Count total questions in the database"""
+        return await self._run(self.db.count_questions)
+
+    async def query_questions(self, fields=None, filters=None, after=None, limit: int = 50):
+        """Query raw rows with keyset pagination (see QuestionDatabase.query_questions)"""
+        return await self._run(self.db.query_questions, fields=fields, filters=filters, after=after, limit=limit)
+
+    def select_fields(self, fields=None):
+        """Validate a field projection (no I/O)"""
+        return self.db.select_fields(fields)
+
+    def iter_question_rows(self, fields=None, filters=None, chunk_size: int = 1000):
+        """Return a blocking row-chunk generator for streaming exports.
+
+        The generator opens its own read-only connection; iterate it from a
+        worker thread, e.g. by handing it to StreamingResponse.
+        """
+        return self.db.iter_question_rows(fields=fields, filters=filters, chunk_size=chunk_size)
+
+    async def lease_scrape_tasks(self, worker: str, limit: int = 4, lease_seconds: float = 300):
+        """Lease scrape tasks to a crawl worker"""
+        return await self._run(self.db.lease_scrape_tasks, worker, limit=limit, lease_seconds=lease_seconds)
+
+    async def save_scrape_results(self, worker: str, results):
+        """Store a crawl worker's batch of task results"""
+        return await self._run(self.db.save_scrape_results, worker, results)
+
+    async def scrape_task_stats(self):
+        """Number of scrape tasks per status"""
+        return await self._run(self.db.scrape_task_stats)
+
+    async def get_data_version(self) -> int:
+        """Return the current data version counter"""
+        return await self._run(self.db.get_data_version)
+
+    def close(self):
+        """Shut down the thread pool and close the connection"""
+        self.executor.shutdown(wait=True)
+        self.db.close()
@@ -0,0 +1,159 @@
+"""
+Persistent frontier of question pages waiting for a detail crawl
+"""
+import time
+import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Claim order: trending questions first, then never-fetched ones, then refreshes
+PRIORITY_TRENDING = 2
+PRIORITY_NEW = 1
+PRIORITY_REFRESH = 0
+
+HOUR = 3600
+
+
+class DetailFrontier:
+    """Prioritized queue of question ids for the detail crawler.
+
+    Every known question has one row holding the time it is next due. A
+    claim takes due rows in priority order and pushes their due time forward
+    by a lease, so the table itself is the queue and survives restarts: a
+    crawler that dies simply lets its leases run out.
+
+    After a successful fetch a question is due again after a fraction of its
+    age (clamped to [min_refresh, max_refresh]): questions asked an hour ago
+    move fast and are refreshed often, old ones rarely. Failures back off
+    exponentially. Questions in the trending top-K are promoted whenever a
+    scrape writes, and become due once their last fetch is older than
+    min_refresh.
+    """
+
+    def __init__(self,
+                 min_refresh_hours: float = 1.0,
+                 max_refresh_hours: float = 24.0 * 7,
+                 age_fraction: float = 0.25,
+                 retry_seconds: float = 300.0):
+        self.min_refresh = min_refresh_hours * HOUR
+        self.max_refresh = max_refresh_hours * HOUR
+        self.age_fraction = age_fraction
+        self.retry_seconds = retry_seconds
+
+    def create_schema(self, cursor) -> bool:
+        """Create the frontier table; returns True if it was new"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'detail_frontier'")
+        created = cursor.fetchone() is None
+        # Times are Unix seconds so due times can be computed in SQL
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS detail_frontier (
+                question_id TEXT PRIMARY KEY,
+                priority INTEGER NOT NULL,
+                due_at REAL NOT NULL,
+                fetched_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_detail_frontier_due
+            ON detail_frontier (priority, due_at)
+        ''')
+        return created
+
+    def seed(self, cursor):
+        """Queue every question stored before the frontier existed"""
+        cursor.execute(
+            'INSERT OR IGNORE INTO detail_frontier (question_id, priority, due_at) '
+            'SELECT id, ?, ? FROM questions',
+            (PRIORITY_NEW, time.time())
+        )
+
+    def enqueue(self, cursor, question_ids: List[str]):
+        """Queue newly stored questions; ids already queued are left alone"""
+        now = time.time()
+        cursor.executemany(
+            'INSERT OR IGNORE INTO detail_frontier (question_id, priority, due_at) VALUES (?, ?, ?)',
+            [(question_id, PRIORITY_NEW, now) for question_id in question_ids]
+        )
+
+    def boost_trending(self, cursor):
+        """Promote the questions currently in trending_top"""
+        cursor.execute('''
+            UPDATE detail_frontier
+            SET priority = ?,
+                due_at = MIN(due_at, COALESCE(fetched_at, 0) + ?)
+            WHERE question_id IN (SELECT question_id FROM trending_top)
+        ''', (PRIORITY_TRENDING, self.min_refresh))
+
+    def claim(self, cursor, limit: int, lease_seconds: float) -> List[str]:
+        """Lease up to limit due ids, highest priority and longest overdue first.
+
+        Runs inside the caller's write transaction.
+        """
+        now = time.time()
+        ids = []
+        for priority in (PRIORITY_TRENDING, PRIORITY_NEW, PRIORITY_REFRESH):
+            if len(ids) >= limit:
+                break
+            # One index range per priority level
+            cursor.execute(
+                'SELECT question_id FROM detail_frontier WHERE priority = ? AND due_at <= ? '
+                'ORDER BY due_at LIMIT ?',
+                (priority, now, limit - len(ids))
+            )
+            ids.extend(row[0] for row in cursor.fetchall())
+        cursor.executemany(
+            'UPDATE detail_frontier SET due_at = ? WHERE question_id = ?',
+            [(now + lease_seconds, question_id) for question_id in ids]
+        )
+        return ids
+
+    def refresh_interval(self, first_seen: Optional[str], now: float) -> float:
+        """Seconds until a question fetched now is due again"""
+        age = self.max_refresh
+        if first_seen:
+            try:
+                age = now - datetime.datetime.fromisoformat(first_seen).timestamp()
+            except ValueError:
+                pass
+        return min(self.max_refresh, max(self.min_refresh, age * self.age_fraction))
+
+    def complete(self, cursor, fetched: List[Tuple[str, Optional[str]]]):
+        """Reschedule (id, first_seen) pairs that were fetched successfully"""
+        now = time.time()
+        cursor.executemany(
+            'UPDATE detail_frontier SET priority = ?, due_at = ?, fetched_at = ?, attempts = 0, last_error = NULL '
+            'WHERE question_id = ?',
+            [(PRIORITY_REFRESH, now + self.refresh_interval(first_seen, now), now, question_id)
+             for question_id, first_seen in fetched]
+        )
+
+    def fail(self, cursor, failed: List[Tuple[str, str]]):
+        """Reschedule (id, error) pairs with exponential backoff"""
+        now = time.time()
+        cursor.executemany(
+            'UPDATE detail_frontier SET attempts = attempts + 1, last_error = ?, '
+            'due_at = ? + MIN(?, ? * (1 << MIN(attempts, 20))) '
+            'WHERE question_id = ?',
+            [(error[:500], now, self.max_refresh, self.retry_seconds, question_id)
+             for question_id, error in failed]
+        )
+
+    def remove(self, cursor, question_ids: List[str]):
+        """Drop ids whose pages no longer exist"""
+        cursor.executemany(
+            'DELETE FROM detail_frontier WHERE question_id = ?',
+            [(question_id,) for question_id in question_ids]
+        )
+
+    def stats(self, cursor) -> Dict[str, int]:
+        """Number of queued, due, never-fetched and failing entries"""
+        cursor.execute('''
+            SELECT COUNT(*),
+                   COALESCE(SUM(due_at <= ?), 0),
+                   COALESCE(SUM(fetched_at IS NULL), 0),
+                   COALESCE(SUM(attempts > 0), 0)
+            FROM detail_frontier
+        ''', (time.time(),))
+        total, due, never_fetched, failing = cursor.fetchone()
+        return {'queued': total, 'due': due, 'never_fetched': never_fetched, 'failing': failing}
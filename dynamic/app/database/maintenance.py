@@ -0,0 +1,309 @@
+"""
+Retention, downsampling, archival and compaction for the questions database
+"""
+import os
+import json
+import gzip
+import time
+import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.database.models import QuestionDatabase, QUESTION_FIELDS, QUESTION_COLUMNS
+from app.metrics.registry import span
+
+SNAPSHOT_FIELDS = ('question_id', 'taken_at', 'answer_count', 'follow_count', 'hot_score')
+
+
+def get_meta(cursor, key: str, default: int = 0) -> int:
+    """Read an integer from the meta table"""
+    cursor.execute('SELECT value FROM meta WHERE key = ?', (key,))
+    row = cursor.fetchone()
+    return row[0] if row else default
+
+
+def set_meta(cursor, key: str, value: int):
+    """Write an integer to the meta table"""
+    cursor.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+
+def _month_of(iso_timestamp: str) -> str:
+    """Archive partition (YYYY-MM) of an ISO timestamp"""
+    return iso_timestamp[:7]
+
+
+def _append_archive(path: str, rows: List[Dict[str, Any]]):
+    """Append rows to a gzipped JSON Lines file.
+
+    Each call adds a new gzip member; readers (gzip, zcat, DuckDB) see the
+    concatenation as one stream. The data is flushed to disk before the
+    caller deletes the rows from the database.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'ab') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False).encode('utf-8'))
+                f.write(b'\n')
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def iter_archive(archive_dir: str,
+                 table: str,
+                 since: Optional[str] = None,
+                 until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield archived rows of a table ('questions' or 'question_snapshots').
+
+    since / until are YYYY-MM partition names (inclusive). Rows come back as
+    dicts in partition order; the files can equally be read with zcat or
+    DuckDB's read_json_auto('archive/questions/*.jsonl.gz').
+    """
+    directory = os.path.join(archive_dir, table)
+    if not os.path.isdir(directory):
+        return
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.jsonl.gz'):
+            continue
+        month = name[:-len('.jsonl.gz')]
+        if (since and month < since) or (until and month > until):
+            continue
+        with gzip.open(os.path.join(directory, name), 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class DatabaseMaintenance:
+    """Keeps the database from growing without bound.
+
+    - Snapshots younger than raw_days are kept as they are; older ones are
+      downsampled to the last snapshot of each question per day.
+    - Snapshots older than snapshot_retention_days, and questions nobody has
+      seen for question_retention_days, are appended to monthly gzipped JSON
+      Lines archives under archive_dir and deleted. Deleted questions also
+      leave the trending and detail-frontier tables. None disables a limit.
+    - Finished tasks of distributed crawl workers are deleted after a week.
+    - Freed pages are returned with incremental vacuum, the query planner
+      statistics are refreshed with PRAGMA optimize and the WAL is truncated.
+      Files created before incremental vacuum need a one-time full VACUUM,
+      which blocks every writer while it runs, so it only happens when
+      convert_auto_vacuum is set (`python run.py maintain`), never from the
+      scheduler.
+
+    All deletes run in small transactions with a short pause in between, so
+    scrapes can interleave their writes and readers never wait (WAL).
+    """
+
+    def __init__(self,
+                 db: QuestionDatabase,
+                 archive_dir: str,
+                 raw_days: Optional[float] = 7,
+                 snapshot_retention_days: Optional[float] = 90,
+                 question_retention_days: Optional[float] = 180,
+                 batch_size: int = 5000,
+                 pause: float = 0.05,
+                 convert_auto_vacuum: bool = False):
+        self.db = db
+        self.archive_dir = archive_dir
+        self.raw_days = raw_days
+        self.snapshot_retention_days = snapshot_retention_days
+        self.question_retention_days = question_retention_days
+        self.batch_size = batch_size
+        self.pause = pause
+        self.convert_auto_vacuum = convert_auto_vacuum
+
+    def run(self, now: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+        """Run every maintenance step and return what was done"""
+        now = now or datetime.datetime.now()
+        report = {}
+        with span("maintenance"):
+            if self.raw_days is not None:
+                report['snapshots_downsampled'] = self.downsample_snapshots(now - datetime.timedelta(days=self.raw_days))
+            if self.snapshot_retention_days is not None:
+                report['snapshots_archived'] = self.archive_snapshots(
+                    now - datetime.timedelta(days=self.snapshot_retention_days))
+            if self.question_retention_days is not None:
+                report['questions_archived'] = self.archive_questions(
+                    now - datetime.timedelta(days=self.question_retention_days))
+            # Finished scrape tasks of distributed workers are only kept for a week
+            report['scrape_tasks_purged'] = self._write(self.db.task_queue.purge, time.time() - 7 * 86400)
+            report.update(self.compact())
+            with self.db.lock, self.db.conn:
+                set_meta(self.db.conn.cursor(), 'last_maintenance', int(time.time()))
+        return report
+
+    def is_due(self, interval_hours: float) -> bool:
+        """True if the last run is older than interval_hours.
+
+        A database that has never been maintained starts its first interval
+        now rather than counting as overdue, so starting the scheduler does
+        not begin with a maintenance pass.
+        """
+        with self.db.lock, self.db.conn:
+            cursor = self.db.conn.cursor()
+            last = get_meta(cursor, 'last_maintenance')
+            if not last:
+                set_meta(cursor, 'last_maintenance', int(time.time()))
+                return False
+        return time.time() - last >= interval_hours * 3600
+
+    def _write(self, func, *args):
+        """Run func(cursor, *args) in its own short write transaction"""
+        with self.db.lock, self.db.conn:
+            cursor = self.db.conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            result = func(cursor, *args)
+        if self.pause:
+            time.sleep(self.pause)
+        return result
+
+    def downsample_snapshots(self, cutoff: datetime.datetime) -> int:
+        """Keep one snapshot per question and day for days before cutoff.
+
+        Works one day at a time and remembers the last finished day in the
+        meta table, so every run only touches days that aged out since.
+        """
+        with self.db.lock:
+            cursor = self.db.conn.cursor()
+            done_until = get_meta(cursor, 'snapshots_downsampled_until')
+            cursor.execute('SELECT MIN(taken_at) FROM question_snapshots')
+            oldest = cursor.fetchone()[0]
+        if oldest is None:
+            return 0
+        day = datetime.datetime.fromisoformat(oldest[:10])
+        if done_until:
+            day = max(day, datetime.datetime.fromtimestamp(done_until))
+        last_day = datetime.datetime.combine(cutoff.date(), datetime.time())
+
+        removed = 0
+        while day < last_day:
+            next_day = day + datetime.timedelta(days=1)
+            removed += self._write(self._downsample_day, day.date().isoformat(), int(next_day.timestamp()))
+            day = next_day
+        return removed
+
+    @staticmethod
+    def _downsample_day(cursor, day: str, done_until: int) -> int:
+        # Same-day ISO timestamps all start with "<day>T", and "U" sorts
+        # right after "T", so [day, day || 'U') is exactly that day
+        cursor.execute('''
+            DELETE FROM question_snapshots
+            WHERE taken_at >= :day AND taken_at < :day || 'U'
+              AND EXISTS (
+                  SELECT 1 FROM question_snapshots later
+                  WHERE later.question_id = question_snapshots.question_id
+                    AND later.taken_at > question_snapshots.taken_at
+                    AND later.taken_at < :day || 'U'
+              )
+        ''', {'day': day})
+        removed = cursor.rowcount
+        set_meta(cursor, 'snapshots_downsampled_until', done_until)
+        return removed
+
+    def archive_snapshots(self, cutoff: datetime.datetime) -> int:
+        """Move snapshots taken before cutoff into the archive"""
+        archived = 0
+        while True:
+            count = self._write(self._archive_snapshot_batch, cutoff.isoformat())
+            if not count:
+                return archived
+            archived += count
+
+    def _archive_snapshot_batch(self, cursor, cutoff_iso: str) -> int:
+        cursor.execute(
+            f"SELECT {', '.join(SNAPSHOT_FIELDS)} FROM question_snapshots "
+            f"WHERE taken_at < ? ORDER BY taken_at LIMIT ?",
+            (cutoff_iso, self.batch_size)
+        )
+        rows = cursor.fetchall()
+        # Written before the delete commits: a crash can duplicate archived
+        # rows but never lose them
+        self._archive_rows('question_snapshots', SNAPSHOT_FIELDS, rows, ('taken_at',))
+        cursor.executemany(
+            'DELETE FROM question_snapshots WHERE question_id = ? AND taken_at = ?',
+            [row[:2] for row in rows]
+        )
+        return len(rows)
+
+    def archive_questions(self, cutoff: datetime.datetime) -> int:
+        """Move questions last seen before cutoff into the archive"""
+        cutoff_iso = cutoff.isoformat()
+        with self.db.lock:
+            cursor = self.db.conn.cursor()
+            cursor.execute('SELECT id FROM questions WHERE COALESCE(last_seen, timestamp) < ?', (cutoff_iso,))
+            ids = [row[0] for row in cursor.fetchall()]
+
+        archived = 0
+        for start in range(0, len(ids), self.batch_size):
+            archived += self._write(self._archive_question_batch, ids[start:start + self.batch_size], cutoff_iso)
+        return archived
+
+    def _archive_question_batch(self, cursor, ids: List[str], cutoff_iso: str) -> int:
+        rows = []
+        # Stay well below SQLite's host parameter limit; re-check the cutoff
+        # in case a scrape saw the question again since the ids were read
+        for start in range(0, len(ids), 500):
+            part = ids[start:start + 500]
+            cursor.execute(
+                f"SELECT {QUESTION_COLUMNS} FROM questions "
+                f"WHERE id IN ({', '.join('?' * len(part))}) AND COALESCE(last_seen, timestamp) < ?",
+                part + [cutoff_iso]
+            )
+            rows.extend(cursor.fetchall())
+        if not rows:
+            return 0
+        self._archive_rows('questions', QUESTION_FIELDS, rows, ('last_seen', 'timestamp'))
+
+        # Their metric history goes with them; snapshots older than the
+        # snapshot retention are already archived
+        self.db._delete_question_rows(cursor, [row[0] for row in rows])
+        return len(rows)
+
+    def _archive_rows(self, table: str, fields, rows: List[tuple], time_fields):
+        """Append rows to the monthly archive files of a table.
+
+        The partition is taken from the first non-empty field in time_fields.
+        """
+        partitions: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            record = dict(zip(fields, row))
+            stamp = next(record[f] for f in time_fields if record[f])
+            partitions.setdefault(_month_of(stamp), []).append(record)
+        for month, records in partitions.items():
+            _append_archive(os.path.join(self.archive_dir, table, f'{month}.jsonl.gz'), records)
+
+    def compact(self, max_pages: int = 2000) -> Dict[str, Any]:
+        """Return free pages to the file system and refresh planner statistics"""
+        conn = self.db.conn
+        with self.db.lock:
+            mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            if mode != 2 and self.convert_auto_vacuum:
+                # One-time conversion of files created before incremental vacuum
+                print("Converting database to incremental auto-vacuum (one-time full VACUUM)...")
+                conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                conn.execute('VACUUM')
+                mode = 2
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            free_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+        if mode != 2:
+            # incremental_vacuum is a no-op until the file is converted
+            print("Database is not in incremental auto-vacuum mode, free pages are kept; "
+                  "run `python run.py maintain` once to convert it (full VACUUM)")
+            free_before = 0
+        # Free pages in small steps so writers are never held up for long
+        while mode == 2:
+            with self.db.lock:
+                free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                if not free:
+                    break
+                # execute() would step the pragma once and free a single page;
+                # executescript runs it to completion
+                conn.executescript(f'PRAGMA incremental_vacuum({max_pages});')
+            if self.pause:
+                time.sleep(self.pause)
+
+        with self.db.lock:
+            conn.execute('PRAGMA optimize')
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return {'bytes_freed': free_before * page_size}
@@ -1,178 +1,739 @@
-"""
-Database models for Zhihu Hot Questions Scraper
-"""
-import os
-import sqlite3
-import datetime
-from typing import List, Dict, Any, Optional
-
-
-class Question:
-    """Question model representing a Zhihu hot question"""
-    def __init__(self, 
-                 id: str, 
-                 title: str, 
-                 url: str, 
-                 answer_count: int = 0, 
-                 follow_count: int = 0,
-                 hot_score: Optional[int] = None,
-                 timestamp: Optional[datetime.datetime] = None):
-        self.id = id
-        self.title = title
-        self.url = url
-        self.answer_count = answer_count
-        self.follow_count = follow_count
-        self.hot_score = hot_score
-        self.timestamp = timestamp or datetime.datetime.now()
-    
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert object to dictionary"""
-        return {
-            'id': self.id,
-            'title': self.title,
-            'url': self.url,
-            'answer_count': self.answer_count,
-            'follow_count': self.follow_count,
-            'hot_score': self.hot_score,
-            'timestamp': self.timestamp.isoformat() if self.timestamp else None
-        }
-    
-    @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'Question':
-        """Create object from dictionary"""
-        if 'timestamp' in data and data['timestamp']:
-            if isinstance(data['timestamp'], str):
-                data['timestamp'] = datetime.datetime.fromisoformat(data['timestamp'])
-        return cls(**data)
-
-
-class QuestionDatabase:
-    """Database handler for Zhihu hot questions"""
-    def __init__(self, database_path: str):
-        """Initialize the database"""
-        self.database_path = database_path
-        self.conn = None
-        self.initialize_db()
-    
-    def initialize_db(self):
-        """Initialize the database schema"""
-        # Create database directory if needed
-        db_dir = os.path.dirname(self.database_path)
-        if db_dir and not os.path.exists(db_dir):
-            os.makedirs(db_dir)
-        
-        # Connect to database
-        self.conn = sqlite3.connect(self.database_path)
-        cursor = self.conn.cursor()
-        
-        # Create questions table if it doesn't exist
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS questions (
-                id TEXT PRIMARY KEY,
-                title TEXT NOT NULL,
-                url TEXT NOT NULL,
-                answer_count INTEGER DEFAULT 0,
-                follow_count INTEGER DEFAULT 0,
-                hot_score INTEGER,
-                timestamp TEXT NOT NULL
-            )
-        ''')
-        
-        self.conn.commit()
-    
-    def add_question(self, question: Question) -> bool:
-        """Add a question to the database"""
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO questions (id, title, url, answer_count, follow_count, hot_score, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                question.id,
-                question.title,
-                question.url,
-                question.answer_count,
-                question.follow_count,
-                question.hot_score,
-                question.timestamp.isoformat()
-            ))
-            self.conn.commit()
-            return True
-        except Exception as e:
-            print(f"Error adding question: {e}")
-            return False
-    
-    def add_questions(self, questions: List[Question]) -> int:
-        """Add multiple questions to the database"""
-        count = 0
-        for question in questions:
-            if self.add_question(question):
-                count += 1
-        return count
-    
-    def get_question(self, question_id: str) -> Optional[Question]:
-        """Get a question by ID"""
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute('SELECT * FROM questions WHERE id = ?', (question_id,))
-            row = cursor.fetchone()
-            if row:
-                return Question(
-                    id=row[0],
-                    title=row[1],
-                    url=row[2],
-                    answer_count=row[3],
-                    follow_count=row[4],
-                    hot_score=row[5],
-                    timestamp=datetime.datetime.fromisoformat(row[6])
-                )
-            return None
-        except Exception as e:
-            print(f"Error getting question: {e}")
-            return None
-    
-    def get_all_questions(self, limit: int = 100, offset: int = 0) -> List[Question]:
-        """Get all questions with pagination"""
-        questions = []
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                SELECT * FROM questions 
-                ORDER BY timestamp DESC
-                LIMIT ? OFFSET ?
-            ''', (limit, offset))
-            
-            for row in cursor.fetchall():
-                questions.append(Question(
-                    id=row[0],
-                    title=row[1],
-                    url=row[2],
-                    answer_count=row[3],
-                    follow_count=row[4],
-                    hot_score=row[5],
-                    timestamp=datetime.datetime.fromisoformat(row[6])
-                ))
-            
-            return questions
-        except Exception as e:
-            print(f"Error getting questions: {e}")
-            return []
-    
-    def count_questions(self) -> int:
-        """Count total questions in the database"""
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM questions')
-            return cursor.fetchone()[0]
-        except Exception as e:
-            print(f"Error counting questions: {e}")
-            return 0
-    
-    def close(self):
-        """Close the database connection"""
-        if self.conn:
-            self.conn.close()
-    
-    def __del__(self):
-        """Destructor to ensure database connection is closed"""
+"""
+Database models for Zhihu Hot Questions Scraper
+"""
+import os
+import sqlite3
+import datetime
+import threading
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+from app.database.seen_index import SeenIndex, FINGERPRINT_COLUMNS
+from app.database.trending import TrendingEngine
+from app.database.frontier import DetailFrontier
+from app.database.task_queue import ScrapeTaskQueue
+from app.database.site_records import SiteRecordStore
+from app.events.broker import broker
+from app.metrics.registry import span, QUESTIONS_WRITTEN
+
+
+# Columns of the questions table, in table order. Also the whitelist for
+# field projection in the JSON API and exports.
+QUESTION_FIELDS = ('id', 'title', 'url', 'answer_count', 'follow_count', 'hot_score', 'timestamp',
+                   'first_seen', 'last_seen')
+QUESTION_COLUMNS = ', '.join(QUESTION_FIELDS)
+
+# Columns added after the first release, created on existing databases by
+# initialize_db together with the SQL that backfills them
+MIGRATED_COLUMNS = (
+    ('first_seen', 'TEXT', 'UPDATE questions SET first_seen = timestamp WHERE first_seen IS NULL'),
+    ('last_seen', 'TEXT', 'UPDATE questions SET last_seen = timestamp WHERE last_seen IS NULL'),
+)
+
+# Metrics that only some pages show (heat on the hot list, answer and follower
+# counts on question pages). None means "not seen by this scrape", and the
+# stored value is kept.
+PRESERVED_COLUMNS = ('answer_count', 'follow_count', 'hot_score')
+
+# Insert a new question, or update the content of a known one. timestamp and
+# first_seen keep the values from the first insert, and known metrics are kept
+# when the question is later seen somewhere that does not show them.
+UPSERT_SQL = f'''
+    INSERT INTO questions ({QUESTION_COLUMNS})
+    VALUES ({', '.join('?' * len(QUESTION_FIELDS))})
+    ON CONFLICT(id) DO UPDATE SET
+        {', '.join(f'{c} = excluded.{c}' for c in FINGERPRINT_COLUMNS if c not in PRESERVED_COLUMNS)},
+        {', '.join(f'{c} = COALESCE(excluded.{c}, {c})' for c in PRESERVED_COLUMNS)},
+        last_seen = excluded.last_seen
+'''
+
+
+class Question:
+    """Question model representing a Zhihu hot question.
+
+    Uses __slots__ to keep per-object memory small when many questions are
+    loaded at once. Timestamps read from the database are kept as the stored
+    ISO string and only parsed into a datetime when .timestamp is accessed.
+
+    timestamp is when the question was first collected and is never rewritten;
+    first_seen / last_seen are ISO strings of the first and latest scrape that
+    saw the question (filled in by QuestionDatabase.add_questions).
+    """
+    __slots__ = ('id', 'title', 'url', 'answer_count', 'follow_count', 'hot_score',
+                 '_timestamp', '_timestamp_iso', 'first_seen', 'last_seen')
+    
+    def __init__(self, 
+                 id: str, 
+                 title: str, 
+                 url: str, 
+                 answer_count: int = 0, 
+                 follow_count: int = 0,
+                 hot_score: Optional[int] = None,
+                 timestamp: Optional[Any] = None,
+                 first_seen: Optional[str] = None,
+                 last_seen: Optional[str] = None):
+        self.id = id
+        self.title = title
+        self.url = url
+        self.answer_count = answer_count
+        self.follow_count = follow_count
+        self.hot_score = hot_score
+        self.timestamp = timestamp or datetime.datetime.now()
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+    
+    @property
+    def timestamp(self) -> datetime.datetime:
+        """Collection time, parsed lazily from the stored ISO string"""
+        if self._timestamp is None and self._timestamp_iso is not None:
+            self._timestamp = datetime.datetime.fromisoformat(self._timestamp_iso)
+        return self._timestamp
+    
+    @timestamp.setter
+    def timestamp(self, value):
+        """Accept either a datetime or an ISO string"""
+        if isinstance(value, str):
+            self._timestamp = None
+            self._timestamp_iso = value
+        else:
+            self._timestamp = value
+            self._timestamp_iso = None
+    
+    def timestamp_iso(self) -> Optional[str]:
+        """ISO form of the timestamp without a parse/format round trip"""
+        if self._timestamp_iso is None and self._timestamp is not None:
+            self._timestamp_iso = self._timestamp.isoformat()
+        return self._timestamp_iso
+    
+    @classmethod
+    def from_row(cls, row: tuple) -> 'Question':
+        """Build a question from a row in QUESTION_FIELDS order"""
+        question = cls.__new__(cls)
+        (question.id, question.title, question.url, question.answer_count,
+         question.follow_count, question.hot_score, question._timestamp_iso,
+         question.first_seen, question.last_seen) = row
+        question._timestamp = None
+        return question
+    
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> List['Question']:
+        """Build questions from many rows in QUESTION_FIELDS order"""
+        return list(map(cls.from_row, rows))
+    
+    def to_row(self) -> tuple:
+        """Convert object to a row in QUESTION_FIELDS order"""
+        return (self.id, self.title, self.url, self.answer_count,
+                self.follow_count, self.hot_score, self.timestamp_iso(),
+                self.first_seen, self.last_seen)
+    
+    def missing_metrics(self) -> bool:
+        """True if any PRESERVED_COLUMNS value was not seen by the scrape"""
+        return self.answer_count is None or self.follow_count is None or self.hot_score is None
+    
+    def fingerprint_values(self) -> tuple:
+        """Content columns compared by the seen-id index (FINGERPRINT_COLUMNS order)"""
+        return (self.title, self.url, self.answer_count, self.follow_count, self.hot_score)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert object to dictionary"""
+        return dict(zip(QUESTION_FIELDS, self.to_row()))
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Question':
+        """Create object from dictionary (ISO timestamps are parsed lazily)"""
+        return cls(**data)
+
+
+class QuestionDatabase:
+    """Database handler for Zhihu hot questions"""
+    def __init__(self, database_path: str):
+        """Initialize the database"""
+        self.database_path = database_path
+        self.conn = None
+        # The connection may be used from worker threads (see AsyncQuestionDatabase),
+        # so every statement goes through this lock
+        self.lock = threading.RLock()
+        # Shared with every other QuestionDatabase on the same file
+        self.seen_index = SeenIndex.for_database(database_path)
+        self.trending = TrendingEngine()
+        self.frontier = DetailFrontier()
+        self.task_queue = ScrapeTaskQueue()
+        self.site_records = SiteRecordStore()
+        self.initialize_db()
+    
+    def initialize_db(self):
+        """Initialize the database schema"""
+        # Create database directory if needed
+        db_dir = os.path.dirname(self.database_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        
+        # Connect to database
+        self.conn = sqlite3.connect(self.database_path, check_same_thread=False)
+        # Lets maintenance hand free pages back to the file system in small steps;
+        # only takes effect on new files (older ones are converted by `run.py maintain`)
+        self.conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        # WAL lets the web server keep reading while a scrape is writing
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA busy_timeout=5000')
+        cursor = self.conn.cursor()
+        
+        # Create questions table if it doesn't exist
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS questions (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                url TEXT NOT NULL,
+                answer_count INTEGER DEFAULT 0,
+                follow_count INTEGER DEFAULT 0,
+                hot_score INTEGER,
+                timestamp TEXT NOT NULL,
+                first_seen TEXT,
+                last_seen TEXT
+            )
+        ''')
+        self._migrate_columns(cursor)
+        
+        # Keyset pagination walks this index newest first
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_questions_timestamp_id
+            ON questions (timestamp, id)
+        ''')
+        
+        # Key/value table for bookkeeping such as the data version counter
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('data_version', 0)")
+        
+        if self.trending.create_schema(cursor):
+            self._seed_trending()
+        if self.frontier.create_schema(cursor):
+            self.frontier.seed(cursor)
+        self.task_queue.create_schema(cursor)
+        self.site_records.create_schema(cursor)
+        
+        self.conn.commit()
+        
+        # Load the seen-id index up front so the first scrape does not pay for it
+        with self.seen_index.lock, self.lock:
+            self._sync_seen_index(cursor)
+    
+    @staticmethod
+    def _migrate_columns(cursor):
+        """Add columns missing from databases created by older versions"""
+        cursor.execute('PRAGMA table_info(questions)')
+        existing = {row[1] for row in cursor.fetchall()}
+        for name, column_type, backfill in MIGRATED_COLUMNS:
+            if name not in existing:
+                cursor.execute(f'ALTER TABLE questions ADD COLUMN {name} {column_type}')
+                cursor.execute(backfill)
+    
+    def _seed_trending(self):
+        """Score questions already stored by versions without the trending tables"""
+        reader = self.conn.cursor()
+        writer = self.conn.cursor()
+        reader.execute(f'SELECT {QUESTION_COLUMNS} FROM questions')
+        while True:
+            rows = reader.fetchmany(1000)
+            if not rows:
+                break
+            self.trending.record(writer, Question.from_rows(rows))
+    
+    def _sync_seen_index(self, cursor) -> int:
+        """Reload the seen-id index if the database changed behind its back.
+
+        Returns the current data version. Callers hold seen_index.lock.
+        """
+        cursor.execute("SELECT value FROM meta WHERE key = 'data_version'")
+        row = cursor.fetchone()
+        version = row[0] if row else 0
+        if self.seen_index.version != version:
+            self.seen_index.load(cursor, version)
+        return version
+    
+    def add_question(self, question: Question) -> bool:
+        """Add a question to the database"""
+        return self.add_questions([question]) == 1
+    
+    def add_questions(self, questions: List[Question]) -> int:
+        """Save the questions of a scrape run in a single transaction.
+
+        Questions are first classified against the seen-id index: new ones are
+        inserted, changed ones have their content columns updated, and known
+        unchanged ones only get last_seen refreshed. timestamp and first_seen
+        are never rewritten. Returns the number of new and changed questions.
+
+        New and changed questions are published on the event broker after
+        the commit so live dashboards can update without reloading.
+        """
+        return self._add_questions(questions)[0]
+    
+    def _add_questions(self,
+                       questions: List[Question],
+                       task: Optional[Tuple[int, str, Optional[str]]] = None) -> Tuple[int, bool]:
+        """add_questions, optionally as the result of a distributed scrape task.
+
+        task is (task_id, worker, error). The lease check, the writes and
+        closing the task share one transaction, so nothing is stored unless
+        the task is leased to that worker, and what is stored always closes
+        it. Returns (questions written, whether the task was accepted).
+        """
+        if not questions and task is None:
+            return 0, False
+        found = len(questions)
+        # A run can see the same question on several pages; keep the last copy,
+        # unless only an earlier one came from the hot list and carries the heat
+        unique = {}
+        for question in questions:
+            kept = unique.get(question.id)
+            if kept is None or question.hot_score is not None or kept.hot_score is None:
+                unique[question.id] = question
+        questions = list(unique.values())
+        written = []
+        accepted = False
+        try:
+            with span("db_write"), self.seen_index.lock:
+                with self.lock, self.conn:
+                    cursor = self.conn.cursor()
+                    # Take the write lock before reading the version so no other
+                    # connection can write between the check and our writes
+                    cursor.execute('BEGIN IMMEDIATE')
+                    version = self._sync_seen_index(cursor)
+                    if task is not None and not self.task_queue.leased_to(cursor, task[0], task[1]):
+                        print(f"Dropping result of scrape task {task[0]}: not leased to {task[1]}")
+                        return 0, False
+                    new_questions, changed_questions, known_questions = self.seen_index.classify(questions)
+                    # A page that does not show some metrics looks like a change;
+                    # fill them in from the table and compare again
+                    partial = [q for q in changed_questions if q.missing_metrics()]
+                    if partial:
+                        self._fill_missing_metrics(cursor, partial)
+                        _, changed_questions, unchanged = self.seen_index.classify(changed_questions)
+                        known_questions += unchanged
+                    
+                    for question in new_questions + changed_questions:
+                        question.last_seen = question.timestamp_iso()
+                        question.first_seen = question.first_seen or question.last_seen
+                        try:
+                            cursor.execute(UPSERT_SQL, question.to_row())
+                            written.append(question)
+                        except Exception as e:
+                            print(f"Error adding question: {e}")
+                    
+                    # Known questions are not rewritten, only marked as seen again
+                    cursor.executemany(
+                        'UPDATE questions SET last_seen = ? WHERE id = ?',
+                        [(q.timestamp_iso(), q.id) for q in known_questions]
+                    )
+                    if written:
+                        self.trending.record(cursor, written)
+                        self.frontier.enqueue(cursor, [q.id for q in new_questions])
+                        self.frontier.boost_trending(cursor)
+                        self._bump_data_version(cursor)
+                        version += 1
+                    if task is not None:
+                        task_id, worker, error = task
+                        accepted = self.task_queue.finish(cursor, task_id, worker, found, len(written), error)
+                written_ids = {q.id for q in written}
+                new_questions = [q for q in new_questions if q.id in written_ids]
+                changed_questions = [q for q in changed_questions if q.id in written_ids]
+                self.seen_index.update(new_questions, changed_questions, version)
+        except Exception as e:
+            print(f"Error adding questions: {e}")
+            return 0, False
+        
+        QUESTIONS_WRITTEN.inc(len(new_questions), outcome="new")
+        QUESTIONS_WRITTEN.inc(len(changed_questions), outcome="changed")
+        QUESTIONS_WRITTEN.inc(len(known_questions), outcome="unchanged")
+        
+        if written:
+            broker.publish('questions', {
+                'new': [q.to_dict() for q in new_questions],
+                'changed': [q.to_dict() for q in changed_questions]
+            })
+        return len(written), accepted
+    
+    @staticmethod
+    def _fill_missing_metrics(cursor, questions: List[Question]):
+        """Replace None metrics with the stored values"""
+        by_id = {q.id: q for q in questions}
+        ids = list(by_id)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            cursor.execute(
+                f"SELECT id, {', '.join(PRESERVED_COLUMNS)} FROM questions "
+                f"WHERE id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            for question_id, answer_count, follow_count, hot_score in cursor.fetchall():
+                question = by_id[question_id]
+                if question.answer_count is None:
+                    question.answer_count = answer_count
+                if question.follow_count is None:
+                    question.follow_count = follow_count
+                if question.hot_score is None:
+                    question.hot_score = hot_score
+    
+    def claim_detail_tasks(self, limit: int = 20, lease_seconds: float = 600) -> List[Question]:
+        """Take up to limit due questions from the detail frontier.
+
+        The claimed entries are leased: they are not handed out again until
+        the lease expires, so entries of a crawler that died are retried.
+        """
+        try:
+            with self.lock, self.conn:
+                cursor = self.conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                ids = self.frontier.claim(cursor, limit, lease_seconds)
+                if not ids:
+                    return []
+                cursor.execute(
+                    f"SELECT {QUESTION_COLUMNS} FROM questions WHERE id IN ({', '.join('?' * len(ids))})",
+                    ids
+                )
+                questions = {row[0]: Question.from_row(row) for row in cursor.fetchall()}
+            # Keep the frontier's priority order
+            return [questions[i] for i in ids if i in questions]
+        except Exception as e:
+            print(f"Error claiming detail tasks: {e}")
+            return []
+    
+    def save_question_details(self,
+                              fetched: List[Question],
+                              failed: Optional[List[Tuple[str, str]]] = None,
+                              gone: Optional[List[str]] = None) -> int:
+        """Write the results of a detail crawl batch.
+
+        fetched questions carry the metrics read from their pages and go
+        through add_questions like any other scrape; failed is a list of
+        (id, error) retried with backoff; gone ids no longer exist on the site
+        and leave the frontier. Returns the number of questions that changed.
+        """
+        written = self.add_questions(fetched) if fetched else 0
+        try:
+            with self.lock, self.conn:
+                cursor = self.conn.cursor()
+                self.frontier.complete(cursor, [(q.id, q.first_seen) for q in fetched])
+                self.frontier.fail(cursor, failed or [])
+                self.frontier.remove(cursor, gone or [])
+        except Exception as e:
+            print(f"Error updating detail frontier: {e}")
+        return written
+    
+    def detail_frontier_stats(self) -> Dict[str, int]:
+        """Sizes of the detail frontier (see DetailFrontier.stats)"""
+        try:
+            with self.lock:
+                return self.frontier.stats(self.conn.cursor())
+        except Exception as e:
+            print(f"Error reading detail frontier: {e}")
+            return {}
+    
+    def push_scrape_tasks(self, tasks: List[Tuple[str, str, int]], ttl_seconds: float) -> int:
+        """Queue (url, source, max_questions) tasks for crawl workers; returns how many were queued"""
+        try:
+            with self.lock, self.conn:
+                return self.task_queue.push(self.conn.cursor(), tasks, ttl_seconds)
+        except Exception as e:
+            print(f"Error queueing scrape tasks: {e}")
+            return 0
+    
+    def lease_scrape_tasks(self, worker: str, limit: int = 4, lease_seconds: float = 300) -> List[Dict[str, Any]]:
+        """Lease up to limit scrape tasks to a crawl worker (see ScrapeTaskQueue.lease)"""
+        try:
+            with self.lock, self.conn:
+                cursor = self.conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                return self.task_queue.lease(cursor, worker, limit, lease_seconds)
+        except Exception as e:
+            print(f"Error leasing scrape tasks: {e}")
+            return []
+    
+    def save_scrape_results(self,
+                            worker: str,
+                            results: List[Tuple[int, List[Question], Optional[str]]]) -> List[Dict[str, Any]]:
+        """Store a worker's batch of (task_id, questions, error) results.
+
+        Only results for tasks currently leased to the worker are stored;
+        results for unknown tasks, or tasks the worker does not hold (never
+        leased, or the lease ran out and went elsewhere), are dropped with
+        their questions. Returns one {task_id, saved, accepted} entry per result.
+        """
+        outcomes = []
+        for task_id, questions, error in results:
+            saved, accepted = self._add_questions(questions, task=(task_id, worker, error))
+            outcomes.append({'task_id': task_id, 'saved': saved, 'accepted': accepted})
+        return outcomes
+    
+    def scrape_task_stats(self) -> Dict[str, int]:
+        """Number of scrape tasks per status"""
+        try:
+            with self.lock:
+                return self.task_queue.stats(self.conn.cursor())
+        except Exception as e:
+            print(f"Error reading scrape tasks: {e}")
+            return {}
+    
+    def save_site_records(self, site: str, records: List[Dict[str, Any]], key_field: str) -> Dict[str, int]:
+        """Store records of a site adapter; returns counts of new, changed and unchanged"""
+        if not records:
+            return {'new': 0, 'changed': 0, 'unchanged': 0}
+        try:
+            with span("db_write", site), self.lock, self.conn:
+                return self.site_records.upsert(
+                    self.conn.cursor(), site, records, key_field,
+                    datetime.datetime.now().isoformat(timespec='seconds')
+                )
+        except Exception as e:
+            print(f"Error saving {site} records: {e}")
+            return {'new': 0, 'changed': 0, 'unchanged': 0}
+    
+    def get_site_records(self, site: str, limit: Optional[int] = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Records of a site adapter, most recently seen first"""
+        try:
+            with self.lock:
+                return self.site_records.query(self.conn.cursor(), site, limit, offset)
+        except Exception as e:
+            print(f"Error reading {site} records: {e}")
+            return []
+    
+    def site_record_counts(self) -> Dict[str, int]:
+        """Number of stored records per site adapter"""
+        try:
+            with self.lock:
+                return self.site_records.counts(self.conn.cursor())
+        except Exception as e:
+            print(f"Error reading site records: {e}")
+            return {}
+    
+    def delete_questions(self, question_ids: List[str]) -> int:
+        """Delete questions with their snapshots, trending and frontier rows.
+
+        Returns the number of questions deleted.
+        """
+        if not question_ids:
+            return 0
+        try:
+            with self.lock, self.conn:
+                cursor = self.conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                return self._delete_question_rows(cursor, question_ids)
+        except Exception as e:
+            print(f"Error deleting questions: {e}")
+            return 0
+    
+    def _delete_question_rows(self, cursor, question_ids: List[str]) -> int:
+        """Delete questions and every row derived from them; must run inside the write transaction"""
+        params = [(question_id,) for question_id in question_ids]
+        cursor.executemany('DELETE FROM questions WHERE id = ?', params)
+        deleted = cursor.rowcount
+        cursor.executemany('DELETE FROM trending WHERE question_id = ?', params)
+        cursor.executemany('DELETE FROM detail_frontier WHERE question_id = ?', params)
+        cursor.executemany('DELETE FROM question_snapshots WHERE question_id = ?', params)
+        self.trending.rebuild_top(cursor)
+        # A new data version makes every seen-id index and response cache
+        # reload, so no writer classifies against the deleted rows
+        self._bump_data_version(cursor)
+        return deleted
+    
+    def _bump_data_version(self, cursor):
+        """Increment the data version; must run inside the write transaction"""
+        cursor.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+    
+    def get_data_version(self) -> int:
+        """Return the data version, which changes whenever questions are written.
+
+        Readers such as the response cache compare it to decide whether cached
+        pages are still valid. It is stored in the database so writes from other
+        connections (the scheduler thread, manual runs) are seen as well.
+        """
+        try:
+            with self.lock:
+                cursor = self.conn.cursor()
+                cursor.execute("SELECT value FROM meta WHERE key = 'data_version'")
+                row = cursor.fetchone()
+            return row[0] if row else 0
+        except Exception as e:
+            print(f"Error reading data version: {e}")
+            return 0
+    
+    def get_question(self, question_id: str) -> Optional[Question]:
+        """Get a question by ID"""
+        try:
+            with self.lock:
+                cursor = self.conn.cursor()
+                cursor.execute(f'SELECT {QUESTION_COLUMNS} FROM questions WHERE id = ?', (question_id,))
+                row = cursor.fetchone()
+            return Question.from_row(row) if row else None
+        except Exception as e:
+            print(f"Error getting question: {e}")
+            return None
+    
+    def get_all_questions(self, limit: int = 100, offset: int = 0) -> List[Question]:
+        """Get all questions with pagination"""
+        return Question.from_rows(self.get_question_rows(limit=limit, offset=offset))
+    
+    def get_question_rows(self, limit: Optional[int] = 100, offset: int = 0) -> List[tuple]:
+        """Get questions as plain tuples in QUESTION_FIELDS order, newest first.
+
+        For bulk loads that do not need Question objects; limit=None returns
+        every row.
+        """
+        try:
+            with self.lock:
+                cursor = self.conn.cursor()
+                cursor.execute(f'''
+                    SELECT {QUESTION_COLUMNS} FROM questions 
+                    ORDER BY timestamp DESC
+                    LIMIT ? OFFSET ?
+                ''', (-1 if limit is None else limit, offset))
+                return cursor.fetchall()
+        except Exception as e:
+            print(f"Error getting questions: {e}")
+            return []
+    
+    def get_trending(self, limit: int = 10) -> List[Tuple[Question, float]]:
+        """Read the materialized trending ranking as (question, current score) pairs"""
+        try:
+            with self.lock:
+                cursor = self.conn.cursor()
+                cursor.execute(f'''
+                    SELECT {', '.join('q.' + f for f in QUESTION_FIELDS)}, t.score_log
+                    FROM trending_top t JOIN questions q ON q.id = t.question_id
+                    ORDER BY t.rank
+                    LIMIT ?
+                ''', (limit,))
+                rows = cursor.fetchall()
+            return [(Question.from_row(row[:-1]), self.trending.current_score(row[-1])) for row in rows]
+        except Exception as e:
+            print(f"Error getting trending questions: {e}")
+            return []
+    
+    def count_questions(self) -> int:
+        """Count total questions in the database"""
+        try:
+            with self.lock:
+                cursor = self.conn.cursor()
+                cursor.execute('SELECT COUNT(*) FROM questions')
+                return cursor.fetchone()[0]
+        except Exception as e:
+            print(f"Error counting questions: {e}")
+            return 0
+    
+    @staticmethod
+    def select_fields(fields: Optional[List[str]]) -> List[str]:
+        """Validate a field projection, defaulting to every column"""
+        if not fields:
+            return list(QUESTION_FIELDS)
+        unknown = [f for f in fields if f not in QUESTION_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return list(fields)
+    
+    @staticmethod
+    def _build_filters(filters: Optional[Dict[str, Any]]) -> Tuple[str, list]:
+        """Build a WHERE clause from API filters.
+
+        Supported keys: q (title substring), min_answers, min_follows,
+        since / until (ISO timestamps, inclusive / exclusive).
+        """
+        clauses = []
+        params = []
+        filters = filters or {}
+        if filters.get('q'):
+            clauses.append('title LIKE ?')
+            params.append(f"%{filters['q']}%")
+        if filters.get('min_answers') is not None:
+            clauses.append('answer_count >= ?')
+            params.append(filters['min_answers'])
+        if filters.get('min_follows') is not None:
+            clauses.append('follow_count >= ?')
+            params.append(filters['min_follows'])
+        if filters.get('since'):
+            clauses.append('timestamp >= ?')
+            params.append(filters['since'])
+        if filters.get('until'):
+            clauses.append('timestamp < ?')
+            params.append(filters['until'])
+        return ' AND '.join(clauses), params
+    
+    def query_questions(self,
+                        fields: Optional[List[str]] = None,
+                        filters: Optional[Dict[str, Any]] = None,
+                        after: Optional[Tuple[str, str]] = None,
+                        limit: int = 50) -> Tuple[List[str], List[tuple], Optional[Tuple[str, str]]]:
+        """Query raw rows newest first using keyset pagination.
+
+        after is the (timestamp, id) of the last row of the previous page.
+        Returns (fields, rows, next_after); next_after is None on the last page.
+        Rows are plain tuples in the order of fields.
+        """
+        fields = self.select_fields(fields)
+        where, params = self._build_filters(filters)
+        if after:
+            # Row-value comparison lets SQLite seek the (timestamp, id) index
+            keyset = '(timestamp, id) < (?, ?)'
+            where = f'{where} AND {keyset}' if where else keyset
+            params += [after[0], after[1]]
+        
+        # timestamp and id are always selected so the next cursor can be built
+        columns = fields + ['timestamp', 'id']
+        sql = f"SELECT {', '.join(columns)} FROM questions"
+        if where:
+            sql += f' WHERE {where}'
+        sql += ' ORDER BY timestamp DESC, id DESC LIMIT ?'
+        params.append(limit + 1)
+        
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        
+        next_after = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_after = (rows[-1][-2], rows[-1][-1])
+        width = len(fields)
+        return fields, [row[:width] for row in rows], next_after
+    
+    def iter_question_rows(self,
+                           fields: Optional[List[str]] = None,
+                           filters: Optional[Dict[str, Any]] = None,
+                           chunk_size: int = 1000) -> Iterator[List[tuple]]:
+        """Yield raw rows in chunks straight from a SQLite cursor.
+
+        Uses its own read-only connection so a long export neither holds the
+        shared connection lock nor blocks writers (WAL keeps a stable snapshot).
+        Memory use is bounded by chunk_size regardless of table size.
+        """
+        fields = self.select_fields(fields)
+        where, params = self._build_filters(filters)
+        sql = f"SELECT {', '.join(fields)} FROM questions"
+        if where:
+            sql += f' WHERE {where}'
+        sql += ' ORDER BY timestamp DESC, id DESC'
+        
+        conn = sqlite3.connect(f'file:{os.path.abspath(self.database_path)}?mode=ro', uri=True)
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+    
+    def close(self):
+        """Close the database connection"""
+        with self.lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
+    
+    def __del__(self):
+        """Destructor to ensure database connection is closed"""
         self.close() 
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+Seen-id index used to deduplicate questions across scrape runs
+"""
+import os
+import zlib
+import bisect
+import threading
+from array import array
+from typing import Dict, List, Tuple
+
+# Numeric ids up to this value are packed as (id << 32) | fingerprint into a
+# single signed 64-bit slot; anything else falls back to a plain dict.
+MAX_PACKED_ID = 2 ** 31 - 1
+FINGERPRINT_BITS = 32
+FINGERPRINT_MASK = (1 << FINGERPRINT_BITS) - 1
+
+# Columns that make up a question's content fingerprint
+FINGERPRINT_COLUMNS = ('title', 'url', 'answer_count', 'follow_count', 'hot_score')
+
+
+def fingerprint(values: tuple) -> int:
+    """CRC32 of a question's content columns (FINGERPRINT_COLUMNS order)"""
+    return zlib.crc32('\x1f'.join(map(str, values)).encode('utf-8'))
+
+
+def _packed_id(question_id: str):
+    """Return the integer id if it can be packed, else None"""
+    if question_id.isdigit():
+        value = int(question_id)
+        if value <= MAX_PACKED_ID:
+            return value
+    return None
+
+
+class SeenIndex:
+    """Memory-compact index of every question id already in the database.
+
+    Each known question costs one 8-byte slot in a sorted array holding its id
+    and a 32-bit fingerprint of its content, so a scrape can be classified into
+    new / changed / known questions with a binary search per id and without
+    reading the questions table. Ids added since the last merge sit in a small
+    dict and are merged into the array once it grows past a fraction of the
+    array size, which keeps inserts amortised O(log n).
+
+    The index remembers the data version it reflects. QuestionDatabase reloads
+    it when the version in the database differs, i.e. when another process
+    wrote to the same file.
+    """
+
+    # Shared per database file, so every QuestionDatabase opened on the same
+    # path in this process reuses one loaded index
+    _instances: Dict[str, 'SeenIndex'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self):
+        self.packed = array('q')
+        self.recent: Dict[int, int] = {}
+        self.other: Dict[str, int] = {}
+        self.version = None
+        # Held across classify -> write -> update so two connections in this
+        # process cannot classify against the same stale state
+        self.lock = threading.RLock()
+
+    @classmethod
+    def for_database(cls, database_path: str) -> 'SeenIndex':
+        """Return the shared index for a database file"""
+        key = os.path.abspath(database_path)
+        with cls._instances_lock:
+            index = cls._instances.get(key)
+            if index is None:
+                index = cls._instances[key] = cls()
+            return index
+
+    def __len__(self) -> int:
+        return len(self.packed) + len(self.recent) + len(self.other)
+
+    def load(self, cursor, version: int):
+        """(Re)build the index from the questions table"""
+        packed = []
+        other = {}
+        cursor.execute(f"SELECT id, {', '.join(FINGERPRINT_COLUMNS)} FROM questions")
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            for row in rows:
+                question_id = _packed_id(row[0])
+                if question_id is None:
+                    other[row[0]] = fingerprint(row[1:])
+                else:
+                    packed.append(question_id << FINGERPRINT_BITS | fingerprint(row[1:]))
+        packed.sort()
+        self.packed = array('q', packed)
+        self.recent = {}
+        self.other = other
+        self.version = version
+
+    def get(self, question_id: str):
+        """Return the stored fingerprint for an id, or None if it was never seen"""
+        value = _packed_id(question_id)
+        if value is None:
+            return self.other.get(question_id)
+        if value in self.recent:
+            return self.recent[value]
+        position = bisect.bisect_left(self.packed, value << FINGERPRINT_BITS)
+        if position < len(self.packed) and self.packed[position] >> FINGERPRINT_BITS == value:
+            return self.packed[position] & FINGERPRINT_MASK
+        return None
+
+    def classify(self, questions: List) -> Tuple[List, List, List]:
+        """Split questions into (new, changed, known) without touching the database"""
+        new, changed, known = [], [], []
+        for question in questions:
+            stored = self.get(question.id)
+            if stored is None:
+                new.append(question)
+            elif stored != fingerprint(question.fingerprint_values()):
+                changed.append(question)
+            else:
+                known.append(question)
+        return new, changed, known
+
+    def update(self, new: List, changed: List, version: int):
+        """Record the fingerprints of questions that were just written"""
+        for question in new:
+            value = _packed_id(question.id)
+            code = fingerprint(question.fingerprint_values())
+            if value is None:
+                self.other[question.id] = code
+            else:
+                self.recent[value] = code
+        for question in changed:
+            value = _packed_id(question.id)
+            code = fingerprint(question.fingerprint_values())
+            if value is None:
+                self.other[question.id] = code
+            elif value in self.recent:
+                self.recent[value] = code
+            else:
+                position = bisect.bisect_left(self.packed, value << FINGERPRINT_BITS)
+                # Same id prefix, so the array stays sorted
+                self.packed[position] = value << FINGERPRINT_BITS | code
+        if len(self.recent) > max(4096, len(self.packed) // 4):
+            self._merge()
+        self.version = version
+
+    def _merge(self):
+        """Fold recently added ids into the sorted array"""
+        merged = self.packed.tolist()
+        merged.extend(value << FINGERPRINT_BITS | code for value, code in self.recent.items())
+        # The array part is already one sorted run, so timsort mostly merges
+        merged.sort()
+        self.packed = array('q', merged)
+        self.recent = {}
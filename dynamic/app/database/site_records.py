@@ -0,0 +1,94 @@
+"""
+Records of sites crawled through site adapters, stored as JSON documents
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+# Keys per IN (...) lookup, well under SQLite's variable limit
+CHUNK_SIZE = 500
+
+
+class SiteRecordStore:
+    """Records produced by the site adapters in app/sites.
+
+    Each adapter declares its record fields and the field that identifies a
+    record; records are kept as JSON under (site, key), so adding a site
+    needs no schema change. Writing a record whose data did not change only
+    moves its last_seen forward. Zhihu questions keep their own tables.
+    """
+
+    def create_schema(self, cursor):
+        """Create the record table"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS site_records (
+                site TEXT NOT NULL,
+                key TEXT NOT NULL,
+                data TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                PRIMARY KEY (site, key)
+            )
+        ''')
+
+    @staticmethod
+    def encode(record: Dict[str, Any]) -> str:
+        """Canonical JSON of a record, so equal records compare equal"""
+        return json.dumps(record, ensure_ascii=False, sort_keys=True)
+
+    def upsert(self,
+               cursor,
+               site: str,
+               records: List[Dict[str, Any]],
+               key_field: str,
+               now: str) -> Dict[str, int]:
+        """Insert or update records of a site; returns counts of new, changed and unchanged"""
+        rows = {}
+        for record in records:
+            # Later duplicates in the same batch win
+            rows[str(record[key_field])] = self.encode(record)
+
+        stored = {}
+        keys = list(rows)
+        for start in range(0, len(keys), CHUNK_SIZE):
+            chunk = keys[start:start + CHUNK_SIZE]
+            cursor.execute(
+                f"SELECT key, data FROM site_records WHERE site = ? AND key IN ({', '.join('?' * len(chunk))})",
+                [site] + chunk
+            )
+            stored.update(cursor.fetchall())
+
+        counts = {'new': 0, 'changed': 0, 'unchanged': 0}
+        for key, data in rows.items():
+            if key not in stored:
+                counts['new'] += 1
+            elif stored[key] != data:
+                counts['changed'] += 1
+            else:
+                counts['unchanged'] += 1
+
+        cursor.executemany('''
+            INSERT INTO site_records (site, key, data, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (site, key) DO UPDATE SET data = excluded.data, last_seen = excluded.last_seen
+        ''', [(site, key, data, now, now) for key, data in rows.items()])
+        return counts
+
+    def query(self, cursor, site: str, limit: Optional[int] = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Records of a site, most recently seen first, with first_seen and last_seen added"""
+        cursor.execute(
+            'SELECT data, first_seen, last_seen FROM site_records WHERE site = ? '
+            'ORDER BY last_seen DESC, key LIMIT ? OFFSET ?',
+            (site, -1 if limit is None else limit, offset)
+        )
+        records = []
+        for data, first_seen, last_seen in cursor.fetchall():
+            record = json.loads(data)
+            record['first_seen'] = first_seen
+            record['last_seen'] = last_seen
+            records.append(record)
+        return records
+
+    def counts(self, cursor) -> Dict[str, int]:
+        """Number of records per site"""
+        cursor.execute('SELECT site, COUNT(*) FROM site_records GROUP BY site ORDER BY site')
+        return dict(cursor.fetchall())
@@ -0,0 +1,171 @@
+"""
+Queue of scrape tasks handed out to distributed crawl workers
+"""
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+EXPIRED = 'expired'
+
+TASK_FIELDS = ('id', 'url', 'source', 'max_questions', 'deadline', 'attempts')
+
+
+class ScrapeTaskQueue:
+    """Scrape tasks (one source page each) leased to remote workers.
+
+    The coordinator pushes a task per source page and round, with a
+    deadline after which the task is no longer worth running (the next
+    round has its own). A worker leases tasks for lease_seconds; a task
+    whose lease runs out without a result is handed to the next worker
+    that asks, so tasks of a worker that died or lost its network are not
+    lost. Failed tasks are retried until max_attempts leases were used.
+
+    Like DetailFrontier, the table is the queue: it survives restarts and
+    every method runs inside the caller's transaction.
+    """
+
+    def __init__(self, max_attempts: int = 3):
+        self.max_attempts = max_attempts
+
+    def create_schema(self, cursor):
+        """Create the task table"""
+        # Times are Unix seconds on the coordinator's clock
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scrape_tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                source TEXT NOT NULL,
+                max_questions INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                deadline REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                found INTEGER,
+                saved INTEGER,
+                last_error TEXT,
+                finished_at REAL
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_scrape_tasks_status
+            ON scrape_tasks (status, lease_until)
+        ''')
+
+    def push(self, cursor, tasks: List[Tuple[str, str, int]], ttl_seconds: float) -> int:
+        """Queue (url, source, max_questions) tasks that must finish within ttl_seconds.
+
+        A url that still has an open task from an earlier round is skipped,
+        so a round that workers cannot keep up with does not pile up.
+        """
+        now = time.time()
+        queued = 0
+        for url, source, max_questions in tasks:
+            cursor.execute('''
+                INSERT INTO scrape_tasks (url, source, max_questions, created_at, deadline)
+                SELECT ?, ?, ?, ?, ?
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM scrape_tasks
+                    WHERE url = ? AND status IN ('pending', 'leased') AND deadline > ?
+                )
+            ''', (url, source, max_questions, now, now + ttl_seconds, url, now))
+            queued += cursor.rowcount
+        return queued
+
+    def expire(self, cursor, now: float):
+        """Give up on open tasks whose deadline has passed"""
+        cursor.execute(
+            "UPDATE scrape_tasks SET status = ?, finished_at = ?, worker = NULL "
+            "WHERE status IN ('pending', 'leased') AND deadline <= ?",
+            (EXPIRED, now, now)
+        )
+
+    def lease(self, cursor, worker: str, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        """Lease up to limit tasks to worker, oldest first.
+
+        Pending tasks and leased tasks whose lease ran out are both eligible;
+        a lost task that already used max_attempts leases is marked failed.
+        """
+        now = time.time()
+        self.expire(cursor, now)
+        cursor.execute(
+            "UPDATE scrape_tasks SET status = ?, finished_at = ?, worker = NULL, "
+            "last_error = COALESCE(last_error, 'lease expired') "
+            "WHERE status = ? AND lease_until <= ? AND attempts >= ?",
+            (FAILED, now, LEASED, now, self.max_attempts)
+        )
+        cursor.execute(
+            f"SELECT {', '.join(TASK_FIELDS)} FROM scrape_tasks "
+            "WHERE status = ? OR (status = ? AND lease_until <= ?) "
+            "ORDER BY id LIMIT ?",
+            (PENDING, LEASED, now, limit)
+        )
+        tasks = [dict(zip(TASK_FIELDS, row)) for row in cursor.fetchall()]
+        cursor.executemany(
+            'UPDATE scrape_tasks SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1 '
+            'WHERE id = ?',
+            [(LEASED, worker, now + lease_seconds, task['id']) for task in tasks]
+        )
+        for task in tasks:
+            task['attempts'] += 1
+            # Relative, so workers do not depend on their clocks matching ours
+            task['expires_in'] = max(0.0, task.pop('deadline') - now)
+        return tasks
+
+    def leased_to(self, cursor, task_id: int, worker: str) -> bool:
+        """Whether task_id exists and is currently leased to worker"""
+        cursor.execute(
+            'SELECT 1 FROM scrape_tasks WHERE id = ? AND worker = ? AND status = ?',
+            (task_id, worker, LEASED)
+        )
+        return cursor.fetchone() is not None
+
+    def finish(self,
+               cursor,
+               task_id: int,
+               worker: str,
+               found: int = 0,
+               saved: int = 0,
+               error: Optional[str] = None) -> bool:
+        """Record the outcome of a task leased to worker.
+
+        Returns False if the task is no longer leased to that worker (its
+        lease ran out and someone else took it, or it expired).
+        """
+        now = time.time()
+        if error is None:
+            cursor.execute(
+                'UPDATE scrape_tasks SET status = ?, found = ?, saved = ?, finished_at = ?, last_error = NULL '
+                'WHERE id = ? AND worker = ? AND status = ?',
+                (DONE, found, saved, now, task_id, worker, LEASED)
+            )
+        else:
+            # Back to the queue for another worker, unless it used up its attempts
+            cursor.execute(
+                'UPDATE scrape_tasks SET last_error = ?, lease_until = NULL, worker = NULL, '
+                'status = CASE WHEN attempts >= ? THEN ? ELSE ? END, '
+                'finished_at = CASE WHEN attempts >= ? THEN ? END '
+                'WHERE id = ? AND worker = ? AND status = ?',
+                (error[:500], self.max_attempts, FAILED, PENDING, self.max_attempts, now,
+                 task_id, worker, LEASED)
+            )
+        return cursor.rowcount == 1
+
+    def purge(self, cursor, before: float) -> int:
+        """Delete finished tasks older than before (Unix seconds)"""
+        cursor.execute(
+            "DELETE FROM scrape_tasks WHERE status IN ('done', 'failed', 'expired') AND finished_at < ?",
+            (before,)
+        )
+        return cursor.rowcount
+
+    def stats(self, cursor) -> Dict[str, int]:
+        """Number of tasks per status"""
+        cursor.execute('SELECT status, COUNT(*) FROM scrape_tasks GROUP BY status')
+        counts = {status: 0 for status in (PENDING, LEASED, DONE, FAILED, EXPIRED)}
+        counts.update(dict(cursor.fetchall()))
+        return counts
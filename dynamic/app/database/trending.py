@@ -0,0 +1,195 @@
+"""
+Incremental trending-score engine for Zhihu questions
+"""
+import math
+import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Scores are stored relative to this fixed instant so that decay never has to
+# be applied to rows that did not change (see TrendingEngine)
+REFERENCE_EPOCH = datetime.datetime(2024, 1, 1)
+
+# Weight of one answer relative to one follower when no heat value is known
+ANSWER_WEIGHT = 10
+
+
+def hours_since_epoch(moment: datetime.datetime) -> float:
+    """Hours between REFERENCE_EPOCH and moment (naive local time)"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return (moment - REFERENCE_EPOCH).total_seconds() / 3600
+
+
+def metric_of(question) -> Tuple[Optional[str], float]:
+    """Return (basis, value) of the popularity metric a question carries.
+
+    Zhihu's heat value is used when the question came from the hot list;
+    otherwise answers and followers are combined. (None, 0) means the scrape
+    carried no signal at all, e.g. a bare link from the explore page.
+    """
+    if question.hot_score:
+        return 'hot', float(question.hot_score)
+    engagement = (question.answer_count or 0) * ANSWER_WEIGHT + (question.follow_count or 0)
+    if engagement:
+        return 'engagement', float(engagement)
+    return None, 0.0
+
+
+def _log_add(a: Optional[float], b: float) -> float:
+    """log(exp(a) + exp(b)) without overflow; a may be None"""
+    if a is None:
+        return b
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log1p(math.exp(low - high))
+
+
+class TrendingEngine:
+    """Maintains trending scores and a materialized top-K table.
+
+    A question's score is the sum of the metric velocities (growth per hour)
+    observed between its snapshots, each decaying exponentially with the
+    given half-life. Instead of decaying every score on every run, a velocity
+    v observed at time t is stored as log(v) + t * ln2 / half_life, i.e. the
+    value it would have at REFERENCE_EPOCH if time ran backwards. The order of
+    these stored log-scores equals the order of the decayed scores at any
+    moment, so:
+
+    - a scrape only touches the rows of questions that were new or changed;
+    - unchanged questions keep their stored score and fall behind naturally;
+    - the top-K table can be maintained from the old top-K plus the changed
+      rows, because stored scores only ever grow.
+
+    The first snapshot of a question counts its whole metric as growth over
+    one half-life. A metric that drops, or switches between heat and
+    engagement, resets the baseline without adding to the score.
+    """
+
+    def __init__(self, half_life_hours: float = 6.0, top_k: int = 100):
+        self.half_life_hours = half_life_hours
+        self.top_k = top_k
+        self.decay_rate = math.log(2) / half_life_hours
+
+    def create_schema(self, cursor) -> bool:
+        """Create the snapshot and score tables; returns True if they were new"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'trending'")
+        created = cursor.fetchone() is None
+        # Metric history of every question, one row per new or changed scrape
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS question_snapshots (
+                question_id TEXT NOT NULL,
+                taken_at TEXT NOT NULL,
+                answer_count INTEGER,
+                follow_count INTEGER,
+                hot_score INTEGER,
+                PRIMARY KEY (question_id, taken_at)
+            ) WITHOUT ROWID
+        ''')
+        # Retention and archival (app/database/maintenance.py) work by time range
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_snapshots_taken_at ON question_snapshots (taken_at)')
+        # Running score per question plus the last metric the velocity is measured from
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trending (
+                question_id TEXT PRIMARY KEY,
+                score_log REAL,
+                basis TEXT NOT NULL,
+                metric REAL NOT NULL,
+                observed_hours REAL NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trending_score ON trending (score_log)')
+        # Materialized ranking read by the dashboard
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trending_top (
+                rank INTEGER PRIMARY KEY,
+                question_id TEXT NOT NULL,
+                score_log REAL NOT NULL
+            )
+        ''')
+        return created
+
+    def record(self, cursor, questions: List) -> int:
+        """Snapshot the given questions and update their scores and the top-K.
+
+        Runs inside the caller's write transaction. Cost is proportional to the
+        number of questions passed in, not to the size of the table.
+        """
+        if not questions:
+            return 0
+        cursor.executemany(
+            'INSERT OR REPLACE INTO question_snapshots (question_id, taken_at, answer_count, follow_count, hot_score) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(q.id, q.timestamp_iso(), q.answer_count, q.follow_count, q.hot_score) for q in questions]
+        )
+
+        previous = self._load_states(cursor, [q.id for q in questions])
+        updates = []
+        for question in questions:
+            basis, metric = metric_of(question)
+            if basis is None:
+                continue
+            now = hours_since_epoch(question.timestamp)
+            state = previous.get(question.id)
+            score_log = state[0] if state else None
+            if state is None:
+                growth = metric / self.half_life_hours
+            elif state[1] != basis or now <= state[3]:
+                growth = 0.0
+            else:
+                growth = (metric - state[2]) / (now - state[3])
+            if growth > 0:
+                score_log = _log_add(score_log, math.log(growth) + now * self.decay_rate)
+            # score_log stays NULL while only a baseline is known
+            updates.append((question.id, score_log, basis, metric, now))
+
+        cursor.executemany(
+            'INSERT OR REPLACE INTO trending (question_id, score_log, basis, metric, observed_hours) '
+            'VALUES (?, ?, ?, ?, ?)',
+            updates
+        )
+        self._merge_top(cursor, {u[0]: u[1] for u in updates if u[1] is not None})
+        return len(updates)
+
+    @staticmethod
+    def _load_states(cursor, ids: List[str]) -> Dict[str, tuple]:
+        """Fetch (score_log, basis, metric, observed_hours) for the given ids"""
+        states = {}
+        # Stay well below SQLite's host parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            cursor.execute(
+                f"SELECT question_id, score_log, basis, metric, observed_hours FROM trending "
+                f"WHERE question_id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            for row in cursor.fetchall():
+                states[row[0]] = row[1:]
+        return states
+
+    def _merge_top(self, cursor, updated: Dict[str, float]):
+        """Rebuild trending_top from the current top-K and the updated scores"""
+        if not updated:
+            return
+        cursor.execute('SELECT question_id, score_log FROM trending_top')
+        candidates = dict(cursor.fetchall())
+        candidates.update(updated)
+        ranked = sorted(candidates.items(), key=lambda item: item[1], reverse=True)[:self.top_k]
+        cursor.execute('DELETE FROM trending_top')
+        cursor.executemany(
+            'INSERT INTO trending_top (rank, question_id, score_log) VALUES (?, ?, ?)',
+            [(rank, question_id, score_log) for rank, (question_id, score_log) in enumerate(ranked, 1)]
+        )
+
+    def rebuild_top(self, cursor):
+        """Recompute trending_top from the score table (e.g. after rows were deleted)"""
+        cursor.execute('DELETE FROM trending_top')
+        cursor.execute('''
+            INSERT INTO trending_top (rank, question_id, score_log)
+            SELECT ROW_NUMBER() OVER (ORDER BY score_log DESC), question_id, score_log
+            FROM trending WHERE score_log IS NOT NULL
+            ORDER BY score_log DESC LIMIT ?
+        ''', (self.top_k,))
+
+    def current_score(self, score_log: float, at: Optional[datetime.datetime] = None) -> float:
+        """Decayed score of a stored log-score at a given moment (default now)"""
+        now = hours_since_epoch(at or datetime.datetime.now())
+        return math.exp(score_log - now * self.decay_rate)
@@ -0,0 +1,3 @@
+"""
+Events module for Zhihu Hot Questions Scraper
+"""
\ No newline at end of file
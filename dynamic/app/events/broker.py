@@ -0,0 +1,101 @@
+"""
+In-process publish/subscribe broker for live scrape events
+"""
+import json
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+
+class Subscription:
+    """A single subscriber, bound to the event loop it subscribed from"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def _deliver(self, message: str):
+        """Put a message on the queue; runs on the subscriber's loop"""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow consumer: drop what it has not read and ask it to resync
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(format_sse("resync", {}))
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Wait for the next message, or return None after timeout seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def format_sse(event_type: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event_type}\ndata: {payload}\n\n"
+
+
+class EventBroker:
+    """Fan-out of events from writer threads to async subscribers.
+
+    publish() may be called from any thread (the scheduler thread, the DB
+    thread pool). Each event is serialised once and handed to every
+    subscriber's loop with call_soon_threadsafe, so the cost of a publish
+    does not depend on how much work the subscribers do.
+    """
+
+    def __init__(self, max_queue: int = 256):
+        """Initialize the broker"""
+        self.max_queue = max_queue
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+        self.forward = None
+
+    def subscribe(self) -> Subscription:
+        """Subscribe from a running event loop"""
+        subscription = Subscription(asyncio.get_running_loop(), self.max_queue)
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscriber"""
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def forward_to(self, callback):
+        """Also hand every event to callback(event_type, data).
+
+        Used by the scraper worker process to relay its events to the
+        server process, whose broker has the subscribers.
+        """
+        self.forward = callback
+
+    def has_subscribers(self) -> bool:
+        """Whether anyone is listening"""
+        return bool(self.subscriptions)
+
+    def publish(self, event_type: str, data: Dict[str, Any]):
+        """Publish an event to every subscriber"""
+        if self.forward is not None:
+            self.forward(event_type, data)
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        if not subscriptions:
+            return
+        message = format_sse(event_type, data)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, message)
+            except RuntimeError:
+                # The subscriber's loop is closed
+                self.unsubscribe(subscription)
+
+
+# Create a default broker instance
+broker = EventBroker()
@@ -1,3 +1,3 @@
-"""
-Frontend module for Zhihu Hot Questions Scraper
+"""
+Frontend module for Zhihu Hot Questions Scraper
 """ 
\ No newline at end of file
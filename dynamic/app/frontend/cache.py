@@ -0,0 +1,109 @@
+"""
+Response cache for the dashboard and list APIs
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, responses fall back to gzip
+    brotli = None
+
+
+class CachedBody:
+    """A rendered response body together with its precompressed variants"""
+
+    __slots__ = ("body", "gzip", "br", "etag", "media_type")
+
+    def __init__(self, body: bytes, media_type: str, version: int):
+        self.body = body
+        self.media_type = media_type
+        self.gzip = gzip.compress(body, compresslevel=6)
+        self.br = brotli.compress(body) if brotli else None
+        digest = hashlib.sha1(body).hexdigest()[:16]
+        self.etag = f'"{version}-{digest}"'
+
+
+class ResponseCache:
+    """Caches rendered bodies keyed by the database data version.
+
+    Entries are stored per (key, version). When a lookup sees a newer data
+    version everything cached for older versions is dropped, so cached
+    pages live exactly until the next scrape writes to the database.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        """Initialize an empty cache"""
+        self.max_entries = max_entries
+        self.version = None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: int) -> Optional[CachedBody]:
+        """Return the cached body for key at version, or None"""
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, version: int, body: Any, media_type: str) -> CachedBody:
+        """Store a freshly rendered body and return the cached entry"""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        entry = CachedBody(body, media_type, version)
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+
+    def invalidate(self):
+        """Drop every cached entry"""
+        with self.lock:
+            self.entries.clear()
+            self.version = None
+
+
+def cached_response(request: Request, entry: CachedBody) -> Response:
+    """Build a response for a cached entry.
+
+    Answers 304 when the browser already holds the same ETag and otherwise
+    picks the smallest precompressed variant the client accepts.
+    """
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if entry.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if entry.br is not None and "br" in accept_encoding:
+        headers["Content-Encoding"] = "br"
+        return Response(content=entry.br, media_type=entry.media_type, headers=headers)
+    if "gzip" in accept_encoding:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=entry.gzip, media_type=entry.media_type, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
@@ -1,403 +1,558 @@
-"""
-知乎热点问题爬虫的 FastAPI 前端服务器
-"""
-import os
-import json
-import datetime
-from typing import List, Dict, Any, Optional
-
-from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-
-from app.config.settings import settings
-from app.database.models import QuestionDatabase, Question
-from app.scheduler.scheduler import ScraperScheduler, manual_run
-
-# 初始化 FastAPI 应用
-app = FastAPI(title="知乎热点问题爬虫")
-
-# 如果模板目录不存在则创建
-os.makedirs("templates", exist_ok=True)
-
-# 如果静态文件目录不存在则创建
-os.makedirs("static", exist_ok=True)
-
-# 模板和静态文件配置
-templates = Jinja2Templates(directory="templates")
-try:
-    app.mount("/static", StaticFiles(directory="static"), name="static")
-except Exception as e:
-    print(f"挂载静态文件时出错: {e}")
-
-# 初始化数据库和调度器
-db = QuestionDatabase(settings.database_path)
-scheduler = ScraperScheduler(
-    interval_minutes=settings.scrape_interval,
-    question_limit=settings.question_limit,
-    database_path=settings.database_path
-)
-
-
-@app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
-    """首页，显示问题列表"""
-    questions = db.get_all_questions(limit=100)
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "questions": questions,
-        "total_count": db.count_questions(),
-        "last_run": scheduler.last_run,
-        "is_running": scheduler.running
-    })
-
-
-@app.get("/settings", response_class=HTMLResponse)
-async def settings_page(request: Request):
-    """设置页面"""
-    # 读取已保存的 cookies 文件内容
-    cookies_text = ""
-    if os.path.exists(settings.cookies_file):
-        try:
-            with open(settings.cookies_file, 'r', encoding='utf-8') as f:
-                cookies_data = json.load(f)
-                # 将 cookies 转换为文本格式：name=value; name2=value2;
-                cookies_text = "; ".join([f"{name}={value}" for name, value in cookies_data.items()])
-        except Exception as e:
-            print(f"读取 cookies 文件时出错: {e}")
-    
-    return templates.TemplateResponse("settings.html", {
-        "request": request,
-        "settings": settings,
-        "cookies_text": cookies_text
-    })
-
-
-@app.post("/settings/save")
-async def save_settings(
-    scrape_interval: int = Form(...),
-    question_limit: int = Form(...),
-    headless: bool = Form(False)
-):
-    """保存设置"""
-    # 更新设置
-    settings.scrape_interval = scrape_interval
-    settings.question_limit = question_limit
-    settings.headless = headless
-    
-    # 保存到配置文件
-    settings.save_to_file("config.json")
-    
-    # 更新调度器
-    if scheduler.running:
-        scheduler.stop()
-    
-    scheduler.interval_minutes = scrape_interval
-    scheduler.question_limit = question_limit
-    
-    if scheduler.running:
-        scheduler.start()
-    
-    return RedirectResponse(url="/settings", status_code=303)
-
-
-@app.post("/settings/cookies")
-async def save_cookies(cookies: str = Form(...)):
-    """保存 Cookies"""
-    success = settings.save_cookies(cookies)
-    return {"success": success}
-
-
-@app.post("/scraper/start")
-async def start_scraper():
-    """启动爬虫调度器"""
-    success = scheduler.start()
-    return {"success": success}
-
-
-@app.post("/scraper/stop")
-async def stop_scraper():
-    """停止爬虫调度器"""
-    scheduler.stop()
-    return {"success": True}
-
-
-@app.post("/scraper/run-once")
-async def run_scraper_once():
-    """手动运行一次爬虫"""
-    try:
-        # 直接await异步函数
-        questions_count = await manual_run()
-        
-        return {"success": True, "message": f"爬虫运行成功，采集了 {questions_count} 个问题。"}
-    except Exception as e:
-        print(f"手动运行爬虫时出错: {e}")
-        import traceback
-        traceback.print_exc()
-        return {"success": False, "message": f"爬虫运行出错: {str(e)}"}
-
-
-@app.on_event("startup")
-async def startup_event():
-    """启动时创建模板文件"""
-    # 创建 index.html
-    if not os.path.exists("templates/index.html"):
-        with open("templates/index.html", "w", encoding="utf-8") as f:
-            f.write("""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>知乎热点问题爬虫</title>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1">
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        .question-card {
-            margin-bottom: 15px;
-            transition: all 0.3s;
-        }
-        .question-card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 10px 20px rgba(0,0,0,0.1);
-        }
-    </style>
-</head>
-<body>
-    <nav class="navbar navbar-expand-lg navbar-dark bg-primary">
-        <div class="container">
-            <a class="navbar-brand" href="/">知乎热点问题爬虫</a>
-            <button class="navbar-toggler" type="button" data-bs-toggle="collapse" data-bs-target="#navbarNav">
-                <span class="navbar-toggler-icon"></span>
-            </button>
-            <div class="collapse navbar-collapse" id="navbarNav">
-                <ul class="navbar-nav me-auto">
-                    <li class="nav-item">
-                        <a class="nav-link active" href="/">首页</a>
-                    </li>
-                    <li class="nav-item">
-                        <a class="nav-link" href="/settings">设置</a>
-                    </li>
-                </ul>
-                <div class="d-flex">
-                    <button id="run-once-btn" class="btn btn-outline-light me-2">立即运行一次</button>
-                    {% if is_running %}
-                        <button id="stop-scraper-btn" class="btn btn-danger">停止定时任务</button>
-                    {% else %}
-                        <button id="start-scraper-btn" class="btn btn-success">启动定时任务</button>
-                    {% endif %}
-                </div>
-            </div>
-        </div>
-    </nav>
-
-    <div class="container mt-4">
-        <div class="row mb-4">
-            <div class="col-md-12">
-                <div class="card">
-                    <div class="card-body">
-                        <h5 class="card-title">状态</h5>
-                        <p>问题总数: <strong>{{ total_count }}</strong></p>
-                        <p>调度器状态: <strong>{% if is_running %}运行中{% else %}已停止{% endif %}</strong></p>
-                        <p>上次运行: <strong>{% if last_run %}{{ last_run.strftime('%Y-%m-%d %H:%M:%S') }}{% else %}从未运行{% endif %}</strong></p>
-                    </div>
-                </div>
-            </div>
-        </div>
-
-        <h2 class="mb-4">热门问题</h2>
-        
-        <div class="row">
-            {% for question in questions %}
-            <div class="col-md-6">
-                <div class="card question-card">
-                    <div class="card-body">
-                        <h5 class="card-title">{{ question.title }}</h5>
-                        <h6 class="card-subtitle mb-2 text-muted">问题ID: {{ question.id }}</h6>
-                        <p class="card-text">
-                            <span class="badge bg-primary me-2">{{ question.answer_count }} 回答</span>
-                            <span class="badge bg-secondary">{{ question.follow_count }} 关注</span>
-                        </p>
-                        <a href="{{ question.url }}" class="btn btn-sm btn-outline-primary" target="_blank">在知乎查看</a>
-                        <small class="text-muted d-block mt-2">采集时间: {{ question.timestamp.strftime('%Y-%m-%d %H:%M:%S') }}</small>
-                    </div>
-                </div>
-            </div>
-            {% endfor %}
-        </div>
-    </div>
-
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
-    <script>
-        document.getElementById('run-once-btn').addEventListener('click', function() {
-            if (confirm('确定要立即运行一次爬虫吗？')) {
-                fetch('/scraper/run-once', {
-                    method: 'POST'
-                })
-                .then(response => response.json())
-                .then(data => {
-                    if (data.success) {
-                        alert(data.message);
-                        location.reload();
-                    } else {
-                        alert(data.message);
-                    }
-                });
-            }
-        });
-        
-        {% if is_running %}
-        document.getElementById('stop-scraper-btn').addEventListener('click', function() {
-            if (confirm('确定要停止定时任务吗？')) {
-                fetch('/scraper/stop', {
-                    method: 'POST'
-                })
-                .then(response => response.json())
-                .then(data => {
-                    if (data.success) {
-                        alert('定时任务已停止。');
-                        location.reload();
-                    } else {
-                        alert('停止定时任务失败。');
-                    }
-                });
-            }
-        });
-        {% else %}
-        document.getElementById('start-scraper-btn').addEventListener('click', function() {
-            if (confirm('确定要启动定时任务吗？')) {
-                fetch('/scraper/start', {
-                    method: 'POST'
-                })
-                .then(response => response.json())
-                .then(data => {
-                    if (data.success) {
-                        alert('定时任务已启动。');
-                        location.reload();
-                    } else {
-                        alert('定时任务已在运行或启动失败。');
-                    }
-                });
-            }
-        });
-        {% endif %}
-    </script>
-</body>
-</html>
-            """)
-    
-    # 创建 settings.html
-    if not os.path.exists("templates/settings.html"):
-        with open("templates/settings.html", "w", encoding="utf-8") as f:
-            f.write("""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>设置 - 知乎热点问题爬虫</title>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1">
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-</head>
-<body>
-    <nav class="navbar navbar-expand-lg navbar-dark bg-primary">
-        <div class="container">
-            <a class="navbar-brand" href="/">知乎热点问题爬虫</a>
-            <button class="navbar-toggler" type="button" data-bs-toggle="collapse" data-bs-target="#navbarNav">
-                <span class="navbar-toggler-icon"></span>
-            </button>
-            <div class="collapse navbar-collapse" id="navbarNav">
-                <ul class="navbar-nav">
-                    <li class="nav-item">
-                        <a class="nav-link" href="/">首页</a>
-                    </li>
-                    <li class="nav-item">
-                        <a class="nav-link active" href="/settings">设置</a>
-                    </li>
-                </ul>
-            </div>
-        </div>
-    </nav>
-
-    <div class="container mt-4">
-        <h2 class="mb-4">系统设置</h2>
-        
-        <div class="row">
-            <div class="col-md-6">
-                <div class="card mb-4">
-                    <div class="card-header">
-                        <h5 class="card-title mb-0">爬虫设置</h5>
-                    </div>
-                    <div class="card-body">
-                        <form action="/settings/save" method="post">
-                            <div class="mb-3">
-                                <label for="scrape_interval" class="form-label">爬取间隔（分钟）</label>
-                                <input type="number" class="form-control" id="scrape_interval" name="scrape_interval" value="{{ settings.scrape_interval }}" min="1" required>
-                            </div>
-                            <div class="mb-3">
-                                <label for="question_limit" class="form-label">问题数量限制</label>
-                                <input type="number" class="form-control" id="question_limit" name="question_limit" value="{{ settings.question_limit }}" min="1" required>
-                            </div>
-                            <div class="mb-3 form-check">
-                                <input type="checkbox" class="form-check-input" id="headless" name="headless" {% if settings.headless %}checked{% endif %}>
-                                <label class="form-check-label" for="headless">无头模式运行（不显示浏览器窗口）</label>
-                            </div>
-                            <button type="submit" class="btn btn-primary">保存设置</button>
-                        </form>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="col-md-6">
-                <div class="card">
-                    <div class="card-header">
-                        <h5 class="card-title mb-0">Cookies 设置</h5>
-                    </div>
-                    <div class="card-body">
-                        <p class="card-text">请粘贴从知乎网站获取的 cookies 字符串，用于访问热点问题页面。</p>
-                        <form id="cookies-form">
-                            <div class="mb-3">
-                                <label for="cookies" class="form-label">Cookies</label>
-                                <textarea class="form-control" id="cookies" rows="8" placeholder="name=value; name2=value2;">{{ cookies_text }}</textarea>
-                                <div class="form-text">格式: name=value; name2=value2; ...</div>
-                            </div>
-                            <button type="button" id="save-cookies-btn" class="btn btn-primary">保存 Cookies</button>
-                        </form>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
-    <script>
-        document.getElementById('save-cookies-btn').addEventListener('click', function() {
-            const cookies = document.getElementById('cookies').value;
-            
-            fetch('/settings/cookies', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                },
-                body: 'cookies=' + encodeURIComponent(cookies)
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    alert('Cookies 保存成功。');
-                } else {
-                    alert('Cookies 保存失败。');
-                }
-            });
-        });
-    </script>
-</body>
-</html>
-            """)
-
-
-# Create a main function to run the app using uvicorn
-def start_server(host="0.0.0.0", port=8000):
-    """启动网络服务器"""
-    import uvicorn
-    print(f"服务器正在启动，访问地址: http://{host}:{port}")
-    uvicorn.run(app, host=host, port=port) 
\ No newline at end of file
+"""
+知乎热点问题爬虫的 FastAPI 前端服务器
+"""
+import os
+import io
+import csv
+import hmac
+import json
+import base64
+import asyncio
+import datetime
+from typing import List, Dict, Any, Optional
+
+from fastapi import APIRouter, FastAPI, Request, Form, HTTPException, Query
+from fastapi.responses import HTMLResponse, PlainTextResponse, RedirectResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
+
+from app.config.settings import settings
+from app.database.models import Question
+from app.database.async_db import AsyncQuestionDatabase
+from app.frontend.cache import ResponseCache, cached_response
+from app.events.broker import broker, format_sse
+from app.metrics.registry import registry, span
+
+# 模板随包发布，启动时加载一次（Jinja2 会缓存编译后的模板）
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+templates = Jinja2Templates(directory=TEMPLATES_DIR)
+
+router = APIRouter()
+
+
+def _app_state(request: Request):
+    """取出 create_app 启动时创建的数据库、调度器和响应缓存"""
+    state = request.app.state
+    return state.db, state.scheduler, state.response_cache
+
+
+@router.get("/", response_class=HTMLResponse)
+async def home(request: Request):
+    """首页，显示问题列表
+
+    渲染结果按数据版本缓存，两次爬取之间的请求只需读取一次版本号。
+    调度器状态也会显示在页面上，因此一并作为缓存键的一部分。
+    """
+    db, scheduler, response_cache = _app_state(request)
+    version = await db.get_data_version()
+    key = ("home", scheduler.running, scheduler.last_run)
+    entry = response_cache.get(key, version)
+    if entry is None:
+        questions, total_count, trending = await asyncio.gather(
+            db.get_all_questions(limit=100),
+            db.count_questions(),
+            db.get_trending(limit=10)
+        )
+        with span("render", "home"):
+            html = templates.get_template("index.html").render({
+                "request": request,
+                "questions": questions,
+                "trending": trending,
+                "total_count": total_count,
+                "last_run": scheduler.last_run,
+                "is_running": scheduler.running
+            })
+        entry = response_cache.put(key, version, html, "text/html; charset=utf-8")
+    return cached_response(request, entry)
+
+
+@router.get("/settings", response_class=HTMLResponse)
+async def settings_page(request: Request):
+    """设置页面"""
+    # 读取已保存的 cookies 文件内容（在线程池中读取文件）
+    cookies_text = ""
+    try:
+        cookies_data = await run_in_threadpool(settings.load_cookies)
+        # 将 cookies 转换为文本格式：name=value; name2=value2;
+        cookies_text = "; ".join([f"{name}={value}" for name, value in cookies_data.items()])
+    except Exception as e:
+        print(f"读取 cookies 文件时出错: {e}")
+    
+    return templates.TemplateResponse("settings.html", {
+        "request": request,
+        "settings": settings,
+        "cookies_text": cookies_text
+    })
+
+
+@router.post("/settings/save")
+async def save_settings(
+    request: Request,
+    scrape_interval: int = Form(...),
+    question_limit: int = Form(...),
+    headless: bool = Form(False)
+):
+    """保存设置"""
+    # 更新设置
+    settings.scrape_interval = scrape_interval
+    settings.question_limit = question_limit
+    settings.headless = headless
+    
+    # 保存到配置文件
+    await run_in_threadpool(settings.save_to_file, "config.json")
+    
+    # 更新调度器（stop 会等待调度线程退出，放到线程池中执行）
+    scheduler = request.app.state.scheduler
+    was_running = scheduler.running
+    if was_running:
+        await run_in_threadpool(scheduler.stop)
+    
+    scheduler.interval_minutes = scrape_interval
+    scheduler.question_limit = question_limit
+    
+    if was_running:
+        await run_in_threadpool(scheduler.start)
+    
+    return RedirectResponse(url="/settings", status_code=303)
+
+
+@router.post("/settings/cookies")
+async def save_cookies(cookies: str = Form(...)):
+    """保存 Cookies"""
+    success = await run_in_threadpool(settings.save_cookies, cookies)
+    return {"success": success}
+
+
+@router.post("/scraper/start")
+async def start_scraper(request: Request):
+    """启动爬虫调度器"""
+    success = await run_in_threadpool(request.app.state.scheduler.start)
+    return {"success": success}
+
+
+@router.post("/scraper/stop")
+async def stop_scraper(request: Request):
+    """停止爬虫调度器"""
+    await run_in_threadpool(request.app.state.scheduler.stop)
+    return {"success": True}
+
+
+@router.post("/scraper/run-once")
+async def run_scraper_once(request: Request):
+    """手动运行一次爬虫"""
+    from app.scheduler.scheduler import manual_run
+    
+    scheduler = request.app.state.scheduler
+    try:
+        if settings.crawl_mode == "distributed":
+            queued = await run_in_threadpool(scheduler.run_once, "manual")
+            return {"success": True, "message": f"已为爬虫节点排入 {queued} 个爬取任务。"}
+        if scheduler.worker is not None or scheduler.profile_next:
+            # 交给爬虫子进程执行（与定时任务排队，不在服务进程中启动浏览器）；
+            # 待剖析的运行也走调度器，在单独的线程和事件循环中运行，剖析结果不混入服务本身
+            questions_count = await run_in_threadpool(scheduler.run_once, "manual")
+        else:
+            # 直接await异步函数
+            questions_count = await manual_run(db=request.app.state.db)
+        
+        return {"success": True, "message": f"爬虫运行成功，采集了 {questions_count} 个问题。"}
+    except Exception as e:
+        print(f"手动运行爬虫时出错: {e}")
+        import traceback
+        traceback.print_exc()
+        return {"success": False, "message": f"爬虫运行出错: {str(e)}"}
+
+
+@router.get("/api/profile")
+async def get_profile(request: Request):
+    """性能剖析状态：下一次爬取是否剖析，以及最近一次剖析的摘要"""
+    scheduler = request.app.state.scheduler
+    return {"pending": scheduler.profile_next, "last": scheduler.last_profile}
+
+
+@router.post("/api/profile")
+async def request_profile(request: Request, enabled: bool = True):
+    """剖析（或取消剖析）下一次爬取，定时或手动触发的都算
+
+    结果目录包含 cProfile、Playwright trace、各阶段耗时和热点摘要，见 GET /api/profile。
+    """
+    scheduler = request.app.state.scheduler
+    scheduler.profile_next = enabled
+    return {"success": True, "pending": scheduler.profile_next}
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """解析逗号分隔的字段投影参数"""
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()]
+
+
+def _encode_cursor(after) -> Optional[str]:
+    """把 (timestamp, id) 编码为不透明的分页游标"""
+    if not after:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(list(after)).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: Optional[str]):
+    """解码分页游标，格式错误时返回 400"""
+    if not cursor:
+        return None
+    try:
+        timestamp, question_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(timestamp), str(question_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="无效的游标")
+
+
+def _question_filters(q, min_answers, min_follows, since, until) -> Dict[str, Any]:
+    """收集列表接口和导出接口共用的过滤条件"""
+    return {
+        "q": q,
+        "min_answers": min_answers,
+        "min_follows": min_follows,
+        "since": since,
+        "until": until,
+    }
+
+
+@router.get("/api/questions")
+async def api_questions(
+    request: Request,
+    q: Optional[str] = None,
+    min_answers: Optional[int] = None,
+    min_follows: Optional[int] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """问题列表 JSON 接口，支持过滤、键集游标分页和字段投影
+
+    返回 {"items": [...], "next_cursor": "..."}，把 next_cursor 作为 cursor 参数传回即可取下一页。
+    """
+    db, _, response_cache = _app_state(request)
+    version = await db.get_data_version()
+    key = ("api_questions", str(request.query_params))
+    entry = response_cache.get(key, version)
+    if entry is None:
+        try:
+            selected, rows, next_after = await db.query_questions(
+                fields=_parse_fields(fields),
+                filters=_question_filters(q, min_answers, min_follows, since, until),
+                after=_decode_cursor(cursor),
+                limit=limit
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        with span("render", "api_questions"):
+            body = json.dumps({
+                "items": [dict(zip(selected, row)) for row in rows],
+                "next_cursor": _encode_cursor(next_after)
+            }, ensure_ascii=False)
+        entry = response_cache.put(key, version, body, "application/json")
+    return cached_response(request, entry)
+
+
+@router.get("/api/trending")
+async def api_trending(request: Request, limit: int = Query(10, ge=1, le=100)):
+    """趋势榜 JSON 接口，直接读取物化的 top-K 表
+
+    返回 {"items": [...]}，每项为问题字段加上 rank 和当前的趋势分 score。
+    """
+    db, _, response_cache = _app_state(request)
+    version = await db.get_data_version()
+    key = ("api_trending", limit)
+    entry = response_cache.get(key, version)
+    if entry is None:
+        trending = await db.get_trending(limit=limit)
+        with span("render", "api_trending"):
+            body = json.dumps({
+                "items": [
+                    dict(question.to_dict(), rank=rank, score=round(score, 3))
+                    for rank, (question, score) in enumerate(trending, 1)
+                ]
+            }, ensure_ascii=False)
+        entry = response_cache.put(key, version, body, "application/json")
+    return cached_response(request, entry)
+
+
+@router.get("/api/stats")
+async def api_stats(request: Request, days: float = Query(7, gt=0, le=3650)):
+    """聚合统计 JSON 接口：每小时（或每天）新增问题、各批次更新量和指标分布
+
+    在列式分析库（DuckDB）中用向量化查询计算，结果缓存到下一次爬取写库为止。
+    未安装 duckdb 或关闭了 analytics_path 时返回 503。
+    """
+    from app.database.analytics import AnalyticsStore
+    
+    store = AnalyticsStore.from_settings()
+    if store is None:
+        raise HTTPException(status_code=503, detail="分析库未启用（需要安装 duckdb 并设置 analytics_path）")
+    db, _, response_cache = _app_state(request)
+    version = await db.get_data_version()
+    key = ("api_stats", days)
+    entry = response_cache.get(key, version)
+    if entry is None:
+        def compute():
+            # 调度器每轮爬取后都会导出；手动运行等其他写入在这里补上
+            store.ensure_exported(settings.database_path, version)
+            return store.stats(days=days)
+        
+        try:
+            stats = await run_in_threadpool(compute)
+        except Exception as e:
+            # 另一个进程（如单独运行的 run-scheduler）正持有分析库的写锁
+            print(f"查询分析库出错: {e}")
+            raise HTTPException(status_code=503, detail=f"分析库暂时不可用: {e}")
+        with span("render", "api_stats"):
+            body = json.dumps(stats, ensure_ascii=False)
+        entry = response_cache.put(key, version, body, "application/json")
+    return cached_response(request, entry)
+
+
+def _export_ndjson(fields, chunks):
+    """把行块编码为 NDJSON，每块输出一次"""
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(fields, row)), ensure_ascii=False) + "\n" for row in rows
+        ).encode("utf-8")
+
+
+def _export_csv(fields, chunks):
+    """把行块编码为 CSV，首块前输出表头"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+@router.get("/api/questions/export")
+async def export_questions(
+    request: Request,
+    format: str = "ndjson",
+    q: Optional[str] = None,
+    min_answers: Optional[int] = None,
+    min_follows: Optional[int] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    fields: Optional[str] = None,
+    chunk_size: int = Query(1000, ge=1, le=10000)
+):
+    """流式导出问题归档（NDJSON 或 CSV）
+
+    直接从 SQLite 游标按块读取并编码，不构造 Question 对象，内存占用与数据量无关。
+    同步生成器由 Starlette 在线程池中迭代，不会阻塞事件循环。
+    """
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format 只支持 ndjson 或 csv")
+    db = request.app.state.db
+    try:
+        selected = db.select_fields(_parse_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    chunks = db.iter_question_rows(
+        fields=selected,
+        filters=_question_filters(q, min_answers, min_follows, since, until),
+        chunk_size=chunk_size
+    )
+    if format == "csv":
+        return StreamingResponse(
+            _export_csv(selected, chunks),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="questions.csv"'}
+        )
+    return StreamingResponse(
+        _export_ndjson(selected, chunks),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="questions.ndjson"'}
+    )
+
+
+def _check_worker_token(request: Request):
+    """分布式爬虫接口的认证
+
+    只有 crawl_mode 为 distributed 且设置了 worker_token 时才开放，
+    请求头 X-Worker-Token 必须与之一致。
+    """
+    if settings.crawl_mode != "distributed":
+        raise HTTPException(status_code=404, detail="未启用分布式爬取")
+    if not settings.worker_token:
+        raise HTTPException(status_code=403, detail="协调节点未设置 worker_token，拒绝爬虫节点请求")
+    token = request.headers.get("X-Worker-Token", "")
+    if not hmac.compare_digest(token, settings.worker_token):
+        raise HTTPException(status_code=401, detail="无效的 worker token")
+
+
+async def _worker_request(request: Request) -> Dict[str, Any]:
+    """认证并解析爬虫节点的 JSON 请求体，要求带有 worker 名称"""
+    _check_worker_token(request)
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="请求体不是有效的 JSON")
+    if not isinstance(body, dict) or not body.get("worker"):
+        raise HTTPException(status_code=400, detail="缺少 worker")
+    return body
+
+
+def _optional_int(item: Dict[str, Any], name: str) -> Optional[int]:
+    """取出整数或 null 字段，其他类型（字符串、浮点数、布尔值等）视为格式错误"""
+    value = item.get(name)
+    if value is None or (isinstance(value, int) and not isinstance(value, bool)):
+        return value
+    raise ValueError(f"{name} 必须是整数或 null")
+
+
+def _task_result(data: Dict[str, Any]):
+    """把节点提交的一个任务结果转换为 (task_id, 问题列表, 错误信息)
+
+    采集时间按协调节点收到结果的时间记录，不依赖各节点的时钟。
+    """
+    questions = [
+        Question(
+            id=str(item["id"]),
+            title=str(item["title"]),
+            url=str(item["url"]),
+            answer_count=_optional_int(item, "answer_count"),
+            follow_count=_optional_int(item, "follow_count"),
+            hot_score=_optional_int(item, "hot_score")
+        )
+        for item in data.get("questions") or []
+    ]
+    error = data.get("error")
+    return int(data["task_id"]), questions, str(error) if error else None
+
+
+@router.post("/api/tasks/lease")
+async def lease_tasks(request: Request):
+    """分布式爬虫节点领取爬取任务
+
+    请求体 {"worker": 节点名称, "limit": 最多领取的任务数, "lease_seconds": 租约秒数}，
+    返回 {"tasks": [{"id", "url", "source", "max_questions", "attempts", "expires_in"}]}。
+    租约到期仍未提交结果的任务会分配给下一个来领取的节点。
+    """
+    body = await _worker_request(request)
+    try:
+        limit = min(max(int(body.get("limit", 4)), 1), 50)
+        lease_seconds = min(max(float(body.get("lease_seconds", 300)), 10), 3600)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="limit 或 lease_seconds 无效")
+    tasks = await request.app.state.db.lease_scrape_tasks(
+        str(body["worker"]), limit=limit, lease_seconds=lease_seconds
+    )
+    return {"tasks": tasks}
+
+
+@router.post("/api/tasks/results")
+async def submit_task_results(request: Request):
+    """分布式爬虫节点批量提交任务结果
+
+    请求体 {"worker": 节点名称, "results": [{"task_id", "questions": [...], "error": null 或错误信息}]}。
+    只有当前租给该节点的任务的结果才会写库；未知任务、从未租给该节点或租约已转给其他节点的结果被丢弃。
+    返回每个任务保存的问题数，以及结果是否被接受。
+    """
+    body = await _worker_request(request)
+    try:
+        results = [_task_result(item) for item in body.get("results") or []]
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"结果格式无效: {e}")
+    with span("task_results", str(body["worker"])):
+        outcomes = await request.app.state.db.save_scrape_results(str(body["worker"]), results)
+    return {"results": outcomes}
+
+
+@router.get("/api/tasks")
+async def task_stats(request: Request):
+    """爬取任务队列中各状态的任务数"""
+    _check_worker_token(request)
+    return await request.app.state.db.scrape_task_stats()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 监控指标（各阶段耗时直方图、问题数、去重和失败计数）"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/events")
+async def live_events(request: Request):
+    """实时事件流（Server-Sent Events）
+
+    每次爬取提交后推送新增或变化的问题（questions 事件），以及调度器状态变化（scheduler 事件）。
+    """
+    scheduler = request.app.state.scheduler
+    subscription = broker.subscribe()
+    
+    async def stream():
+        try:
+            # 初始状态，浏览器重连后也能立刻同步
+            yield "retry: 3000\n\n"
+            yield format_sse("scheduler", {
+                "running": scheduler.running,
+                "last_run": scheduler.last_run.isoformat() if scheduler.last_run else None
+            })
+            while not await request.is_disconnected():
+                message = await subscription.get(timeout=15)
+                # 超时发送注释行保活，防止代理断开空闲连接
+                yield message if message is not None else ": keepalive\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+    
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+def create_app() -> FastAPI:
+    """创建 FastAPI 应用
+
+    数据库、调度器和缓存在启动事件中创建并挂到 app.state 上，
+    导入本模块不会打开数据库，也不会加载 Playwright。
+    """
+    app = FastAPI(title="知乎热点问题爬虫")
+    app.include_router(router)
+    
+    if os.path.isdir(STATIC_DIR):
+        app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+    
+    @app.on_event("startup")
+    async def startup_event():
+        """初始化数据库和调度器（数据库访问全部经由线程池，不阻塞事件循环）"""
+        from app.scheduler.scheduler import ScraperScheduler
+        
+        app.state.db = AsyncQuestionDatabase(settings.database_path)
+        app.state.scheduler = ScraperScheduler(
+            interval_minutes=settings.scrape_interval,
+            question_limit=settings.question_limit,
+            database_path=settings.database_path
+        )
+        # 首页和列表接口的响应缓存，数据版本变化时自动失效
+        app.state.response_cache = ResponseCache()
+    
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        """停止调度器和爬虫子进程，关闭数据库"""
+        await run_in_threadpool(app.state.scheduler.shutdown)
+        await run_in_threadpool(app.state.db.close)
+    
+    return app
+
+
+# Create a main function to run the app using uvicorn
+def start_server(host="0.0.0.0", port=8000):
+    """启动网络服务器"""
+    import uvicorn
+    print(f"服务器正在启动，访问地址: http://{host}:{port}")
+    uvicorn.run(create_app(), host=host, port=port) 
\ No newline at end of file
@@ -1,128 +1,328 @@
-"""
-知乎热点问题爬虫主脚本
-"""
-import os
-import sys
-import argparse
-import asyncio
-
-from app.config.settings import settings
-from app.database.models import QuestionDatabase
-from app.scraper.zhihu_scraper import scrape_questions
-from app.scheduler.scheduler import ScraperScheduler
-from app.frontend.server import start_server
-
-
-def save_cookies_from_string(cookies_str):
-    """从字符串保存 cookies 到文件"""
-    success = settings.save_cookies(cookies_str)
-    if success:
-        print("Cookies 保存成功。")
-    else:
-        print("Cookies 保存失败。")
-    return success
-
-
-def run_once():
-    """运行一次爬虫并退出"""
-    print("正在运行爬虫...")
-    db = QuestionDatabase(settings.database_path)
-    
-    # 在事件循环中运行爬虫
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    questions = loop.run_until_complete(
-        scrape_questions(limit=settings.question_limit, headless=settings.headless)
-    )
-    loop.close()
-    
-    if questions:
-        saved_count = db.add_questions(questions)
-        print(f"已保存 {saved_count} 个问题到数据库。")
-    else:
-        print("未爬取到任何问题。")
-    
-    return len(questions)
-
-
-def run_scheduler():
-    """在前台运行调度器"""
-    print("正在启动调度器...")
-    scheduler = ScraperScheduler(
-        interval_minutes=settings.scrape_interval,
-        question_limit=settings.question_limit
-    )
-    
-    try:
-        scheduler.start()
-        print(f"调度器已启动。每 {settings.scrape_interval} 分钟爬取一次。")
-        print("按 Ctrl+C 停止。")
-        
-        # 保持主线程运行
-        while True:
-            import time
-            time.sleep(1)
-    except KeyboardInterrupt:
-        print("\n正在停止调度器...")
-        scheduler.stop()
-        print("调度器已停止。")
-
-
-def run_server(host="0.0.0.0", port=8000):
-    """运行网络服务器"""
-    print(f"正在启动网络服务器，地址：{host}:{port}...")
-    start_server(host=host, port=port)
-
-
-def main():
-    """主函数"""
-    parser = argparse.ArgumentParser(description="知乎热点问题爬虫")
-    
-    # 设置子解析器
-    subparsers = parser.add_subparsers(dest="command", help="要运行的命令")
-    
-    # save-cookies 命令
-    cookies_parser = subparsers.add_parser("save-cookies", help="保存 cookies")
-    cookies_parser.add_argument("cookies", help="从浏览器获取的 cookies 字符串")
-    
-    # run-once 命令
-    subparsers.add_parser("run-once", help="运行一次爬虫并退出")
-    
-    # run-scheduler 命令
-    scheduler_parser = subparsers.add_parser("run-scheduler", help="在前台运行调度器")
-    scheduler_parser.add_argument("--interval", type=int, help="爬取间隔（分钟）")
-    scheduler_parser.add_argument("--limit", type=int, help="爬取问题数量限制")
-    
-    # run-server 命令
-    server_parser = subparsers.add_parser("run-server", help="运行网络服务器")
-    server_parser.add_argument("--host", type=str, default="0.0.0.0", help="绑定的主机地址")
-    server_parser.add_argument("--port", type=int, default=8000, help="服务器端口")
-    
-    # 解析参数
-    args = parser.parse_args()
-    
-    # 处理命令
-    if args.command == "save-cookies":
-        save_cookies_from_string(args.cookies)
-    
-    elif args.command == "run-once":
-        run_once()
-    
-    elif args.command == "run-scheduler":
-        # Override settings if provided
-        if args.interval:
-            settings.scrape_interval = args.interval
-        if args.limit:
-            settings.question_limit = args.limit
-        
-        run_scheduler()
-    
-    elif args.command == "run-server":
-        run_server(host=args.host, port=args.port)
-    
-    else:
-        parser.print_help()
-
-
-if __name__ == "__main__":
+"""
+知乎热点问题爬虫主脚本
+"""
+import os
+import sys
+import argparse
+
+from app.config.settings import settings
+
+# 其余模块（Playwright、FastAPI、数据库）在各子命令中按需导入，
+# 这样 save-cookies 和 --help 之类的命令不必为用不到的依赖付出启动时间。
+
+
+def save_cookies_from_string(cookies_str):
+    """从字符串保存 cookies 到文件"""
+    success = settings.save_cookies(cookies_str)
+    if success:
+        print("Cookies 保存成功。")
+    else:
+        print("Cookies 保存失败。")
+    return success
+
+
+def run_once(profile=False):
+    """运行一次爬虫并退出
+
+    profile 为 True 时剖析这次运行（cProfile、Playwright trace 和各阶段耗时），
+    结果写到 settings.profile_dir 下的一个目录。
+    """
+    import asyncio
+    import contextlib
+    from app.database.models import QuestionDatabase
+    from app.metrics.profiler import RunProfiler
+    from app.scraper.zhihu_scraper import scrape_into
+    
+    print("正在运行爬虫...")
+    db = QuestionDatabase(settings.database_path)
+    
+    async def save(questions):
+        return await asyncio.to_thread(db.add_questions, questions)
+    
+    # 在事件循环中运行爬虫，每个来源的结果提取出来就写库
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    with RunProfiler("once") if profile else contextlib.nullcontext():
+        found, saved_count = loop.run_until_complete(
+            scrape_into(save, limit=settings.question_limit, headless=settings.headless)
+        )
+    loop.close()
+    
+    if found:
+        print(f"已保存 {saved_count} 个问题到数据库。")
+    else:
+        print("未爬取到任何问题。")
+    
+    return found
+
+
+def check_session():
+    """探测 cookies 对应的登录会话是否有效"""
+    import asyncio
+    from app.scraper.session import SessionManager
+    
+    session = SessionManager(settings.cookies_file)
+    result = asyncio.run(session.probe())
+    if result is True:
+        print("登录会话有效。")
+    elif result is False:
+        print("登录会话已失效，请重新保存 cookies。")
+    else:
+        print("无法判断登录状态（网络错误或意外响应）。")
+    return result
+
+
+def crawl_details(max_pages=None, concurrency=None):
+    """抓取详情队列中到期的问题页，补全回答数和关注数"""
+    import asyncio
+    from app.database.models import QuestionDatabase
+    from app.scraper.detail_crawler import crawl_details as run_detail_crawl
+    
+    db = QuestionDatabase(settings.database_path)
+    print(f"详情队列: {db.detail_frontier_stats()}")
+    stats = asyncio.run(run_detail_crawl(
+        max_pages=max_pages,
+        db=db,
+        concurrency=concurrency or settings.detail_concurrency
+    ))
+    db.close()
+    return stats
+
+
+def list_sites():
+    """列出已注册的站点适配器和本地已保存的记录数"""
+    from app.sites.registry import site_registry
+    from app.database.models import QuestionDatabase
+    
+    db = QuestionDatabase(settings.database_path)
+    try:
+        counts = db.site_record_counts()
+        counts["zhihu"] = db.count_questions()
+    finally:
+        db.close()
+    for name in site_registry.names():
+        info = site_registry.get(name).describe()
+        print(f"{name:<12} {info['fetch']:<8} {counts.get(name, 0):>8} 条  {info['description']}")
+
+
+def crawl_site(name, limit=None, concurrency=None):
+    """用爬取引擎抓取一个已注册的站点并写库"""
+    import asyncio
+    from app.sites.engine import crawl_site as run_site_crawl
+    
+    try:
+        return asyncio.run(run_site_crawl(name, limit=limit, concurrency=concurrency, headless=settings.headless))
+    except KeyError as e:
+        print(e.args[0])
+        return None
+
+
+def maintain(database_path=None):
+    """运行一次数据库维护：降采样、归档过期数据、回收空间
+
+    旧数据库第一次维护时会做一次完整的 VACUUM，转换为增量自动清理模式；
+    期间写入都会被阻塞，所以只在这里做，调度器不做。
+    """
+    from app.database.models import QuestionDatabase
+    from app.database.maintenance import DatabaseMaintenance
+    
+    db = QuestionDatabase(database_path or settings.database_path)
+    try:
+        size_before = os.path.getsize(db.database_path)
+        report = DatabaseMaintenance(
+            db,
+            settings.archive_dir,
+            raw_days=settings.snapshot_raw_days,
+            snapshot_retention_days=settings.snapshot_retention_days,
+            question_retention_days=settings.question_retention_days,
+            convert_auto_vacuum=True
+        ).run()
+        size_after = os.path.getsize(db.database_path)
+    finally:
+        db.close()
+    print(f"维护完成: {report}")
+    print(f"数据库大小: {size_before / 1e6:.1f} MB -> {size_after / 1e6:.1f} MB")
+    return report
+
+
+def push_tasks(limit=None, ttl=None, base_url=None):
+    """为分布式爬虫节点排入一轮爬取任务（每个来源页面一个）"""
+    from app.database.models import QuestionDatabase
+    from app.scheduler.scheduler import dispatch_scrape_tasks
+    
+    db = QuestionDatabase(settings.database_path)
+    try:
+        queued = dispatch_scrape_tasks(
+            db,
+            limit or settings.question_limit,
+            (ttl or settings.scrape_interval) * 60,
+            base_url=base_url
+        )
+        print(f"已排入 {queued} 个任务，任务队列: {db.scrape_task_stats()}")
+    finally:
+        db.close()
+    return queued
+
+
+def crawl_worker(coordinator, name=None, token=None, capacity=4, idle_exit=None):
+    """作为分布式爬虫节点运行：从协调节点领取任务，用本机的浏览器抓取并回传结果"""
+    import asyncio
+    from app.scraper.remote_worker import RemoteCrawlWorker
+    
+    worker = RemoteCrawlWorker(
+        coordinator,
+        name=name,
+        token=settings.worker_token if token is None else token,
+        capacity=capacity,
+        headless=settings.headless
+    )
+    try:
+        stats = asyncio.run(worker.run(idle_exit=idle_exit))
+        print(f"爬虫节点退出: {stats}")
+    except KeyboardInterrupt:
+        print("\n爬虫节点已停止。")
+
+
+def run_scheduler(profile=False):
+    """在前台运行调度器，profile 为 True 时剖析第一次爬取"""
+    from app.scheduler.scheduler import ScraperScheduler
+    
+    print("正在启动调度器...")
+    scheduler = ScraperScheduler(
+        interval_minutes=settings.scrape_interval,
+        question_limit=settings.question_limit
+    )
+    scheduler.profile_next = profile
+    
+    try:
+        scheduler.start()
+        print(f"调度器已启动。每 {settings.scrape_interval} 分钟爬取一次。")
+        print("按 Ctrl+C 停止。")
+        
+        # 保持主线程运行
+        while True:
+            import time
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n正在停止调度器...")
+        scheduler.shutdown()
+        print("调度器已停止。")
+
+
+def run_server(host="0.0.0.0", port=8000):
+    """运行网络服务器"""
+    from app.frontend.server import start_server
+    
+    print(f"正在启动网络服务器，地址：{host}:{port}...")
+    start_server(host=host, port=port)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="知乎热点问题爬虫")
+    
+    # 设置子解析器
+    subparsers = parser.add_subparsers(dest="command", help="要运行的命令")
+    
+    # save-cookies 命令
+    cookies_parser = subparsers.add_parser("save-cookies", help="保存 cookies")
+    cookies_parser.add_argument("cookies", help="从浏览器获取的 cookies 字符串")
+    
+    # check-session 命令
+    subparsers.add_parser("check-session", help="检查 cookies 是否仍处于登录状态")
+    
+    # run-once 命令
+    once_parser = subparsers.add_parser("run-once", help="运行一次爬虫并退出")
+    once_parser.add_argument("--profile", action="store_true", help="剖析这次运行，结果写到 profile_dir")
+    
+    # crawl-details 命令
+    details_parser = subparsers.add_parser("crawl-details", help="抓取问题详情页，补全回答数和关注数")
+    details_parser.add_argument("--max-pages", type=int, help="最多抓取的问题页数量（默认抓完所有到期的问题）")
+    details_parser.add_argument("--concurrency", type=int, help="并发请求数")
+    
+    # list-sites / crawl-site 命令
+    subparsers.add_parser("list-sites", help="列出可以爬取的站点")
+    site_parser = subparsers.add_parser("crawl-site", help="用爬取引擎抓取一个站点（如 douban）")
+    site_parser.add_argument("site", help="站点名（见 list-sites）")
+    site_parser.add_argument("--limit", type=int, help="最多采集的记录数（默认全部）")
+    site_parser.add_argument("--concurrency", type=int, help="并发请求数（默认使用站点自己的设置）")
+    
+    # maintain 命令
+    maintain_parser = subparsers.add_parser("maintain", help="降采样和归档过期数据，回收数据库空间")
+    maintain_parser.add_argument("--database", help="数据库文件（默认使用配置中的 database_path）")
+    
+    # push-tasks 命令
+    push_parser = subparsers.add_parser("push-tasks", help="为分布式爬虫节点排入一轮爬取任务")
+    push_parser.add_argument("--limit", type=int, help="每个来源最多采集的问题数")
+    push_parser.add_argument("--ttl", type=int, help="任务的有效期（分钟，默认为爬取间隔）")
+    push_parser.add_argument("--base-url", help="来源页面的站点地址（默认使用配置中的 zhihu_base_url）")
+    
+    # crawl-worker 命令
+    worker_parser = subparsers.add_parser("crawl-worker", help="作为分布式爬虫节点运行")
+    worker_parser.add_argument("--coordinator", required=True, help="协调节点地址，例如 http://10.0.0.5:8000")
+    worker_parser.add_argument("--name", help="节点名称（默认为 主机名-进程号）")
+    worker_parser.add_argument("--token", help="与协调节点 worker_token 相同的令牌（默认读取配置）")
+    worker_parser.add_argument("--capacity", type=int, default=4, help="每轮最多领取的任务数")
+    worker_parser.add_argument("--idle-exit", type=float, help="连续这么多秒没有任务时退出（默认一直运行）")
+    
+    # run-scheduler 命令
+    scheduler_parser = subparsers.add_parser("run-scheduler", help="在前台运行调度器")
+    scheduler_parser.add_argument("--interval", type=int, help="爬取间隔（分钟）")
+    scheduler_parser.add_argument("--limit", type=int, help="爬取问题数量限制")
+    scheduler_parser.add_argument("--profile", action="store_true", help="剖析第一次爬取，结果写到 profile_dir")
+    
+    # run-server 命令
+    server_parser = subparsers.add_parser("run-server", help="运行网络服务器")
+    server_parser.add_argument("--host", type=str, default="0.0.0.0", help="绑定的主机地址")
+    server_parser.add_argument("--port", type=int, default=8000, help="服务器端口")
+    
+    # 解析参数
+    args = parser.parse_args()
+    
+    # 处理命令
+    if args.command == "save-cookies":
+        save_cookies_from_string(args.cookies)
+    
+    elif args.command == "check-session":
+        check_session()
+    
+    elif args.command == "run-once":
+        run_once(profile=args.profile)
+    
+    elif args.command == "crawl-details":
+        crawl_details(max_pages=args.max_pages, concurrency=args.concurrency)
+    
+    elif args.command == "list-sites":
+        list_sites()
+    
+    elif args.command == "crawl-site":
+        crawl_site(args.site, limit=args.limit, concurrency=args.concurrency)
+    
+    elif args.command == "maintain":
+        maintain(args.database)
+    
+    elif args.command == "push-tasks":
+        push_tasks(limit=args.limit, ttl=args.ttl, base_url=args.base_url)
+    
+    elif args.command == "crawl-worker":
+        crawl_worker(args.coordinator, name=args.name, token=args.token,
+                     capacity=args.capacity, idle_exit=args.idle_exit)
+    
+    elif args.command == "run-scheduler":
+        # Override settings if provided
+        if args.interval:
+            settings.scrape_interval = args.interval
+        if args.limit:
+            settings.question_limit = args.limit
+        
+        run_scheduler(profile=args.profile)
+    
+    elif args.command == "run-server":
+        run_server(host=args.host, port=args.port)
+    
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
     main() 
\ No newline at end of file
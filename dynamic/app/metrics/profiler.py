@@ -0,0 +1,162 @@
+"""
+Profiling bundle for a single scrape run
+"""
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import datetime
+from typing import Any, Dict, List, Optional
+
+from app.config.settings import settings
+from app.metrics.registry import STAGE_SECONDS
+
+
+class RunProfiler:
+    """Profile one run into its own artifact directory.
+
+    Used as a context manager around a scrape (in the thread that runs its
+    event loop). On exit the directory under settings.profile_dir holds:
+
+    - profile.pstats: cProfile of that thread (python -m pstats, snakeviz)
+    - profile.txt: the top functions by own and by cumulative time
+    - stages.json: pipeline stage timings recorded during the run
+    - trace-<context>.zip: a Playwright trace of every browser context
+      (python -m playwright show-trace), written by ContextPool.close
+    - summary.json / summary.txt: wall and CPU time and the top hot spots
+
+    Comparing CPU time with wall time tells Python work apart from waiting:
+    navigation and scroll stages are browser and network time, db_write is
+    SQLite (run on worker threads, so it is timed by its stage rather than
+    by cProfile).
+    """
+
+    # The profiler of the run in progress in this process, if any
+    _active: Optional['RunProfiler'] = None
+
+    def __init__(self, label: str = "run", directory: Optional[str] = None, top: int = 15):
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.label = label
+        self.directory = directory or os.path.join(settings.profile_dir, f"{stamp}-{label}")
+        self.top = top
+        self.profile = cProfile.Profile()
+        self.summary: Optional[Dict[str, Any]] = None
+        self._stages_before = {}
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+
+    @classmethod
+    def active(cls) -> Optional['RunProfiler']:
+        """The profiler of the run in progress, so the scraper can start browser tracing"""
+        return cls._active
+
+    def path(self, name: str) -> str:
+        """Path of an artifact in the profile directory"""
+        return os.path.join(self.directory, name)
+
+    def __enter__(self) -> 'RunProfiler':
+        os.makedirs(self.directory, exist_ok=True)
+        self._stages_before = STAGE_SECONDS.snapshot()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        RunProfiler._active = self
+        self.profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profile.disable()
+        RunProfiler._active = None
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.process_time() - self._cpu_start
+        try:
+            self.summary = self._write(wall, cpu, failed=exc_type is not None)
+            print(f"Profile written to {self.directory}")
+            for line in self.summary["hot_spots"]:
+                print(f"  {line}")
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+        return False
+
+    def _stage_timings(self) -> List[Dict[str, Any]]:
+        """Stage timings recorded since __enter__, slowest first"""
+        timings = []
+        for key, state in STAGE_SECONDS.snapshot().items():
+            before = self._stages_before.get(key, {"count": 0, "sum": 0.0})
+            count = state["count"] - before["count"]
+            if count <= 0:
+                continue
+            stage, _, source = key.partition("|")
+            timings.append({
+                "stage": stage,
+                "source": source,
+                "count": count,
+                "seconds": round(state["sum"] - before["sum"], 4),
+            })
+        return sorted(timings, key=lambda t: t["seconds"], reverse=True)
+
+    def _hot_functions(self, stats: pstats.Stats) -> List[Dict[str, Any]]:
+        """Functions with the most own time"""
+        rows = []
+        for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{name} ({os.path.basename(filename)}:{line})" if line else name,
+                "calls": calls,
+                "own_seconds": round(own, 4),
+                "cumulative_seconds": round(cumulative, 4),
+            })
+        return sorted(rows, key=lambda r: r["own_seconds"], reverse=True)[:self.top]
+
+    def _write(self, wall: float, cpu: float, failed: bool) -> Dict[str, Any]:
+        self.profile.dump_stats(self.path("profile.pstats"))
+        text = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=text)
+        stats.sort_stats("tottime").print_stats(40)
+        stats.sort_stats("cumulative").print_stats(40)
+        with open(self.path("profile.txt"), "w", encoding="utf-8") as f:
+            f.write(text.getvalue())
+
+        stages = self._stage_timings()
+        with open(self.path("stages.json"), "w", encoding="utf-8") as f:
+            json.dump(stages, f, indent=2, ensure_ascii=False)
+
+        # Sources of the same stage summed up, e.g. navigation over all pages
+        by_stage: Dict[str, Dict[str, float]] = {}
+        for timing in stages:
+            total = by_stage.setdefault(timing["stage"], {"seconds": 0.0, "count": 0})
+            total["seconds"] += timing["seconds"]
+            total["count"] += timing["count"]
+        # The whole-run stages contain all the others
+        ranked = sorted(
+            ((stage, total) for stage, total in by_stage.items() if not stage.endswith("_run")),
+            key=lambda item: item[1]["seconds"], reverse=True
+        )
+        functions = self._hot_functions(stats)
+
+        wall = max(wall, 1e-9)
+        hot_spots = [f"wall {wall:.2f}s, process CPU {cpu:.2f}s ({cpu / wall:.0%} of wall)"]
+        for stage, total in ranked[:5]:
+            hot_spots.append(f"stage {stage}: {total['seconds']:.2f}s over {total['count']} calls "
+                             f"({total['seconds'] / wall:.0%} of wall)")
+        for row in functions[:5]:
+            hot_spots.append(f"python {row['function']}: {row['own_seconds']:.3f}s own time, {row['calls']} calls")
+
+        summary = {
+            "label": self.label,
+            "directory": self.directory,
+            "finished_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "failed": failed,
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(cpu, 3),
+            "stages": [{"stage": s, **{k: round(v, 4) for k, v in t.items()}} for s, t in ranked],
+            "functions": functions,
+            "traces": sorted(name for name in os.listdir(self.directory) if name.startswith("trace-")),
+            "hot_spots": hot_spots,
+        }
+        with open(self.path("summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        with open(self.path("summary.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Profile of {self.label} run, {summary['finished_at']}\n\n")
+            f.write("\n".join(summary["hot_spots"]) + "\n")
+        return summary
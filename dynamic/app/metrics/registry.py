@@ -0,0 +1,325 @@
+"""
+Timing spans, counters and histograms exposed in Prometheus text format
+"""
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Tuple
+
+
+# Seconds; covers sub-millisecond DB writes up to multi-minute scrapes
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _label_key(label_names: Tuple[str, ...], labels: Dict[str, str]) -> Tuple[str, ...]:
+    """Order label values by the metric's declared label names"""
+    return tuple(str(labels.get(name, "")) for name in label_names)
+
+
+def _format_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    """Render {a="1",b="2"}; values are escaped per the exposition format"""
+    rendered = []
+    for name, value in pairs:
+        value = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        rendered.append(f'{name}="{value}"')
+    return "{" + ",".join(rendered) + "}" if rendered else ""
+
+
+class Counter:
+    """Monotonically increasing counter"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        """Increase the counter"""
+        key = _label_key(self.label_names, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        """Current value for one label set"""
+        return self.values.get(_label_key(self.label_names, labels), 0)
+
+    def render(self):
+        with self.lock:
+            items = list(self.values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(zip(self.label_names, key))} {value}"
+
+    def snapshot(self):
+        with self.lock:
+            return {"|".join(key): value for key, value in self.values.items()}
+
+    def export(self, reset: bool = False):
+        with self.lock:
+            values = dict(self.values)
+            if reset:
+                self.values.clear()
+        return values
+
+    def merge(self, values):
+        with self.lock:
+            for key, value in values.items():
+                self.values[key] = self.values.get(key, 0) + value
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        """Set the gauge"""
+        key = _label_key(self.label_names, labels)
+        with self.lock:
+            self.values[key] = value
+
+    def export(self, reset: bool = False):
+        # A gauge is a current value, not an accumulation: never reset
+        return super().export(False)
+
+    def merge(self, values):
+        with self.lock:
+            self.values.update(values)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        """Record one observation"""
+        key = _label_key(self.label_names, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        with self.lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self.values.items()]
+        for key, (counts, total, count) in items:
+            pairs = list(zip(self.label_names, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{_format_labels(pairs + [('le', le)])} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(pairs)} {total}"
+            yield f"{self.name}_count{_format_labels(pairs)} {count}"
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "|".join(key): {"count": state[2], "sum": round(state[1], 6)}
+                for key, state in self.values.items()
+            }
+
+    def export(self, reset: bool = False):
+        with self.lock:
+            values = {key: [list(state[0]), state[1], state[2]] for key, state in self.values.items()}
+            if reset:
+                self.values.clear()
+        return values
+
+    def merge(self, values):
+        with self.lock:
+            for key, (counts, total, count) in values.items():
+                state = self.values.get(key)
+                if state is None:
+                    state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                state[0] = [a + b for a, b in zip(state[0], counts)]
+                state[1] += total
+                state[2] += count
+
+
+class MetricsRegistry:
+    """Holds every metric of the process and renders them for /metrics"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, label_names, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help_text, label_names, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, label_names)
+
+    def gauge(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, label_names)
+
+    def histogram(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, label_names, buckets=buckets)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Plain-dict copy of every metric, for reports and benchmarks"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def export(self, reset: bool = False) -> list:
+        """Raw state of every metric, picklable, to ship to another process.
+
+        With reset=True counters and histograms start again from zero, so
+        successive exports are deltas that merge() can simply add up.
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return [
+            (type(metric).__name__, metric.name, metric.help_text, metric.label_names,
+             getattr(metric, "buckets", None), metric.export(reset))
+            for metric in metrics
+        ]
+
+    def merge(self, exported: list):
+        """Add exported counters and histograms; exported gauges overwrite ours"""
+        classes = {cls.__name__: cls for cls in (Counter, Gauge, Histogram)}
+        for class_name, name, help_text, label_names, buckets, values in exported:
+            kwargs = {"buckets": tuple(buckets)} if buckets is not None else {}
+            metric = self._get_or_create(classes[class_name], name, help_text, label_names, **kwargs)
+            metric.merge(values)
+
+
+# Create a default registry instance
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "zhihu_stage_duration_seconds",
+    "Time spent in each pipeline stage",
+    ("stage", "source")
+)
+STAGE_FAILURES = registry.counter(
+    "zhihu_stage_failures_total",
+    "Pipeline stages that raised an exception",
+    ("stage", "source")
+)
+QUESTIONS_FOUND = registry.counter(
+    "zhihu_questions_found_total",
+    "Questions extracted from each source page",
+    ("source",)
+)
+QUESTIONS_WRITTEN = registry.counter(
+    "zhihu_questions_written_total",
+    "Questions handed to the database, by outcome (new, changed, unchanged)",
+    ("outcome",)
+)
+SCRAPE_RUNS = registry.counter(
+    "zhihu_scrape_runs_total",
+    "Completed scrape runs by trigger and status",
+    ("trigger", "status")
+)
+CONTEXT_REQUESTS = registry.counter(
+    "zhihu_context_requests_total",
+    "Page loads per pooled browser context, by outcome (ok, throttled, logged_out)",
+    ("context", "outcome")
+)
+SESSION_PROBES = registry.counter(
+    "zhihu_session_probes_total",
+    "Login probes sent before scraping, by result (valid, invalid, unknown)",
+    ("result",)
+)
+DETAIL_FETCHES = registry.counter(
+    "zhihu_detail_fetches_total",
+    "Question pages fetched by the detail crawler, by outcome (ok, failed, gone, throttled)",
+    ("outcome",)
+)
+SOURCE_RESULTS = registry.counter(
+    "zhihu_source_results_total",
+    "Scrape attempts per source page, by outcome (ok, failed, retried, skipped)",
+    ("source", "outcome")
+)
+CIRCUIT_STATE = registry.gauge(
+    "zhihu_circuit_state",
+    "Circuit breaker state per source page (0 closed, 1 half-open, 2 open)",
+    ("source",)
+)
+SOURCE_FAILURE_RATIO = registry.gauge(
+    "zhihu_source_failure_ratio",
+    "Share of failed scrapes among the recent attempts of each source page",
+    ("source",)
+)
+SITE_RECORDS = registry.counter(
+    "crawler_site_records_total",
+    "Records handled by the site crawl engine, by site and outcome (found, saved)",
+    ("site", "outcome")
+)
+ASSET_CACHE_REQUESTS = registry.counter(
+    "zhihu_asset_cache_requests_total",
+    "Static asset requests seen by the browser asset cache, by outcome (hit, miss)",
+    ("outcome",)
+)
+ASSET_CACHE_BYTES = registry.counter(
+    "zhihu_asset_cache_bytes_total",
+    "Static asset bytes served from the cache (saved) or downloaded (downloaded)",
+    ("outcome",)
+)
+ASSET_CACHE_SIZE = registry.gauge(
+    "zhihu_asset_cache_size_bytes",
+    "Bytes stored in the browser asset cache"
+)
+WORKER_RESTARTS = registry.counter(
+    "zhihu_worker_restarts_total",
+    "Scraper worker process restarts, by reason (crashed, memory, timeout)",
+    ("reason",)
+)
+WORKER_MEMORY = registry.gauge(
+    "zhihu_worker_memory_bytes",
+    "Resident memory of the scraper worker process and its browser processes"
+)
+
+
+@contextmanager
+def span(stage: str, source: str = ""):
+    """Time a pipeline stage into zhihu_stage_duration_seconds.
+
+    Exceptions are counted in zhihu_stage_failures_total and re-raised.
+    Works inside coroutines as a plain `with` block.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_FAILURES.inc(stage=stage, source=source)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage, source=source)
@@ -1,3 +1,3 @@
-"""
-Scheduler module for Zhihu Hot Questions Scraper
+"""
+Scheduler module for Zhihu Hot Questions Scraper
 """ 
\ No newline at end of file
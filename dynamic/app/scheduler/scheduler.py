@@ -1,128 +1,300 @@
-"""
-Scheduler for running scraper at intervals
-"""
-import asyncio
-import time
-import datetime
-import threading
-from typing import Callable, Any, Optional
-import traceback
-
-from app.config.settings import settings
-from app.database.models import QuestionDatabase
-from app.scraper.zhihu_scraper import scrape_questions
-
-
-class ScraperScheduler:
-    """Scheduler for running the Zhihu scraper at regular intervals"""
-    
-    def __init__(self, 
-                 interval_minutes: int = None,
-                 question_limit: int = None,
-                 database_path: str = None):
-        """Initialize the scheduler"""
-        self.interval_minutes = interval_minutes or settings.scrape_interval
-        self.question_limit = question_limit or settings.question_limit
-        self.database_path = database_path or settings.database_path
-        self.running = False
-        self.last_run = None
-        self.thread = None
-        self.db = QuestionDatabase(self.database_path)
-    
-    def start(self):
-        """Start the scheduler in a separate thread"""
-        if self.running:
-            print("Scheduler is already running")
-            return False
-        
-        self.running = True
-        self.thread = threading.Thread(target=self._run_loop)
-        self.thread.daemon = True
-        self.thread.start()
-        return True
-    
-    def stop(self):
-        """Stop the scheduler"""
-        self.running = False
-        if self.thread:
-            self.thread.join(timeout=30)
-            self.thread = None
-    
-    def _run_loop(self):
-        """Main scheduler loop"""
-        while self.running:
-            try:
-                print(f"Running scheduled scraping at {datetime.datetime.now()}")
-                
-                # Run the scraper
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
-                questions = loop.run_until_complete(
-                    scrape_questions(limit=self.question_limit, headless=settings.headless)
-                )
-                
-                # Save to database
-                if questions:
-                    saved_count = self.db.add_questions(questions)
-                    print(f"Saved {saved_count} questions to database")
-                else:
-                    print("No questions were scraped")
-                
-                self.last_run = datetime.datetime.now()
-                loop.close()
-            except Exception as e:
-                print(f"Error in scheduler: {e}")
-            
-            # Sleep until next run
-            next_run = datetime.datetime.now() + datetime.timedelta(minutes=self.interval_minutes)
-            print(f"Next run scheduled for {next_run}")
-            
-            # Check if should stop every 5 seconds
-            for _ in range(self.interval_minutes * 60 // 5):
-                if not self.running:
-                    break
-                time.sleep(5)
-    
-    def run_once(self):
-        """Run the scraper once immediately"""
-        try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            questions = loop.run_until_complete(
-                scrape_questions(limit=self.question_limit, headless=settings.headless)
-            )
-            
-            if questions:
-                saved_count = self.db.add_questions(questions)
-                print(f"Saved {saved_count} questions to database")
-            else:
-                print("No questions were scraped")
-            
-            self.last_run = datetime.datetime.now()
-            loop.close()
-            return len(questions)
-        except Exception as e:
-            print(f"Error in manual run: {e}")
-            return 0 
-
-async def manual_run():
-    """手动运行一次爬虫任务"""
-    try:
-        print("开始手动运行爬虫...")
-        questions = await scrape_questions(limit=settings.question_limit, headless=settings.headless)
-        
-        if questions:
-            # 保存到数据库
-            db = QuestionDatabase(settings.database_path)
-            saved_count = db.add_questions(questions)
-            print(f"爬取成功，采集了 {len(questions)} 个问题，保存了 {saved_count} 个问题。")
-            return len(questions)
-        else:
-            print("爬取结束，未采集到问题。")
-            return 0
-    except Exception as e:
-        print(f"手动爬取出错: {e}")
-        traceback.print_exc()
+"""
+Scheduler for running scraper at intervals
+
+The Playwright scraper is imported inside the functions that run it, so
+importing this module (e.g. from the web server) stays cheap. With
+settings.worker_process the scraper does not run in this process at all
+but in a supervised worker process (see app/scheduler/worker.py).
+"""
+import asyncio
+import time
+import datetime
+import contextlib
+import threading
+from typing import Callable, Any, Optional
+import traceback
+
+from app.config.settings import settings
+from app.database.models import QuestionDatabase
+from app.events.broker import broker
+from app.metrics.registry import span, SCRAPE_RUNS
+from app.metrics.profiler import RunProfiler
+from app.scheduler.worker import ScraperWorker
+
+
+class ScraperScheduler:
+    """Scheduler for running the Zhihu scraper at regular intervals"""
+    
+    def __init__(self, 
+                 interval_minutes: int = None,
+                 question_limit: int = None,
+                 database_path: str = None):
+        """Initialize the scheduler"""
+        self.interval_minutes = interval_minutes or settings.scrape_interval
+        self.question_limit = question_limit or settings.question_limit
+        self.database_path = database_path or settings.database_path
+        self.running = False
+        self.last_run = None
+        self.thread = None
+        self.db = QuestionDatabase(self.database_path)
+        # Browser and detail crawls run in a child process that is restarted
+        # when it crashes or grows too large
+        self.worker = None
+        if settings.worker_process:
+            self.worker = ScraperWorker(memory_limit_mb=settings.worker_memory_limit_mb)
+        # Set to profile the next scrape (run-scheduler --profile, the settings page);
+        # the summary of the latest profile is kept in last_profile
+        self.profile_next = False
+        self.last_profile = None
+    
+    def start(self):
+        """Start the scheduler in a separate thread"""
+        if self.running:
+            print("Scheduler is already running")
+            return False
+        
+        self.running = True
+        self.thread = threading.Thread(target=self._run_loop)
+        self.thread.daemon = True
+        self.thread.start()
+        self.publish_state()
+        return True
+    
+    def stop(self):
+        """Stop the scheduler"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=30)
+            self.thread = None
+        self.publish_state()
+    
+    def shutdown(self):
+        """Stop the scheduler and the worker process"""
+        self.stop()
+        if self.worker is not None:
+            self.worker.stop()
+    
+    def publish_state(self):
+        """Publish the scheduler state to live dashboards"""
+        broker.publish("scheduler", {
+            "running": self.running,
+            "last_run": self.last_run.isoformat() if self.last_run else None
+        })
+    
+    async def _save_batch(self, questions) -> int:
+        """Commit one batch of scraped questions without blocking the event loop"""
+        return await asyncio.to_thread(self.db.add_questions, questions)
+    
+    def _scrape(self, profile: bool = False):
+        """Scrape once, in the worker process if there is one; returns (found, saved)
+
+        Each source's batch is committed as soon as it is extracted. With
+        profile the run is profiled (see RunProfiler) where it executes.
+        """
+        if self.worker is not None:
+            result = self.worker.run_job("scrape", limit=self.question_limit, headless=settings.headless,
+                                         profile=profile)
+            if result.get("profile"):
+                self.last_profile = result["profile"]
+            return result["found"], result["saved"]
+        
+        from app.scraper.zhihu_scraper import scrape_into
+        with RunProfiler("scrape") if profile else contextlib.nullcontext() as profiler:
+            found_saved = asyncio.run(
+                scrape_into(self._save_batch, limit=self.question_limit, headless=settings.headless)
+            )
+        if profiler is not None and profiler.summary:
+            self.last_profile = profiler.summary
+        return found_saved
+    
+    def _scrape_round(self, trigger: str) -> int:
+        """Scrape here (or in the worker process) and return the number of questions found.
+
+        In distributed mode nothing is scraped here: one task per source page
+        is queued for the crawl workers and the number queued is returned.
+        """
+        if settings.crawl_mode == "distributed":
+            # A round's tasks are not worth running once the next round is queued
+            queued = dispatch_scrape_tasks(self.db, self.question_limit, self.interval_minutes * 60,
+                                           base_url=settings.zhihu_base_url)
+            print(f"Queued {queued} scrape tasks for crawl workers: {self.db.scrape_task_stats()}")
+            SCRAPE_RUNS.inc(trigger=trigger, status="queued")
+            return queued
+        
+        profile, self.profile_next = self.profile_next, False
+        with span("scrape_run", trigger):
+            found, saved_count = self._scrape(profile)
+        
+        if found:
+            print(f"Saved {saved_count} of {found} scraped questions to database")
+        else:
+            print("No questions were scraped")
+        SCRAPE_RUNS.inc(trigger=trigger, status="ok" if found else "empty")
+        return found
+    
+    def tick(self, trigger: str = "scheduled"):
+        """Run one scheduler cycle: scrape, details, other sites and maintenance.
+
+        Called by the loop once per interval; bench/soak.py calls it back to
+        back to look for resources that build up over many cycles.
+        """
+        try:
+            print(f"Running scheduled scraping at {datetime.datetime.now()}")
+            
+            self._scrape_round(trigger)
+            
+            # Fill in answer/follower counts for new, trending and stale questions
+            if settings.detail_pages > 0:
+                self._crawl_details()
+            
+            if settings.extra_sites:
+                self._crawl_sites()
+            
+            self._maintain_if_due()
+            
+            self._export_analytics()
+            
+            self.last_run = datetime.datetime.now()
+            self.publish_state()
+        except Exception as e:
+            SCRAPE_RUNS.inc(trigger=trigger, status="error")
+            print(f"Error in scheduler: {e}")
+    
+    def _run_loop(self):
+        """Main scheduler loop"""
+        while self.running:
+            self.tick()
+            
+            # Sleep until next run
+            next_run = datetime.datetime.now() + datetime.timedelta(minutes=self.interval_minutes)
+            print(f"Next run scheduled for {next_run}")
+            
+            # Check if should stop every 5 seconds
+            for _ in range(self.interval_minutes * 60 // 5):
+                if not self.running:
+                    break
+                time.sleep(5)
+    
+    def _crawl_details(self):
+        """Run the detail crawler for at most settings.detail_pages pages"""
+        try:
+            with span("detail_crawl", "scheduled"):
+                if self.worker is not None:
+                    self.worker.run_job("details", max_pages=settings.detail_pages,
+                                        concurrency=settings.detail_concurrency)
+                else:
+                    from app.scraper.detail_crawler import crawl_details
+                    asyncio.run(crawl_details(max_pages=settings.detail_pages, db=self.db,
+                                              concurrency=settings.detail_concurrency))
+        except Exception as e:
+            print(f"Error in detail crawl: {e}")
+    
+    def _crawl_sites(self):
+        """Crawl the other sites in settings.extra_sites through the site engine"""
+        try:
+            with span("site_crawl", "scheduled"):
+                if self.worker is not None:
+                    self.worker.run_job("sites", names=list(settings.extra_sites), headless=settings.headless)
+                else:
+                    from app.sites.engine import crawl_site
+                    for name in settings.extra_sites:
+                        asyncio.run(crawl_site(name, db=self.db, headless=settings.headless))
+        except Exception as e:
+            print(f"Error in site crawl: {e}")
+    
+    def _maintain_if_due(self):
+        """Run database maintenance once every settings.maintenance_interval hours"""
+        from app.database.maintenance import DatabaseMaintenance
+        
+        try:
+            maintenance = DatabaseMaintenance(
+                self.db,
+                settings.archive_dir,
+                raw_days=settings.snapshot_raw_days,
+                snapshot_retention_days=settings.snapshot_retention_days,
+                question_retention_days=settings.question_retention_days
+            )
+            if maintenance.is_due(settings.maintenance_interval):
+                print(f"Database maintenance: {maintenance.run()}")
+        except Exception as e:
+            print(f"Error in database maintenance: {e}")
+    
+    def _export_analytics(self):
+        """Copy new and changed rows to the columnar analytics store, if enabled"""
+        from app.database.analytics import AnalyticsStore
+        
+        store = AnalyticsStore.from_settings()
+        if store is None:
+            return
+        try:
+            version = self.db.get_data_version()
+            print(f"Analytics export: {store.export(self.database_path, version)}")
+        except Exception as e:
+            print(f"Error in analytics export: {e}")
+    
+    def run_once(self, trigger: str = "once"):
+        """Run the scraper once immediately"""
+        try:
+            found = self._scrape_round(trigger)
+            
+            self.last_run = datetime.datetime.now()
+            self.publish_state()
+            return found
+        except Exception as e:
+            SCRAPE_RUNS.inc(trigger=trigger, status="error")
+            print(f"Error in manual run: {e}")
+            return 0 
+
+def dispatch_scrape_tasks(db: QuestionDatabase,
+                          limit: int,
+                          ttl_seconds: float,
+                          base_url: Optional[str] = None) -> int:
+    """Queue one scrape task per source page for distributed crawl workers.
+
+    Source pages are on base_url, settings.zhihu_base_url by default.
+    """
+    from app.scraper.zhihu_scraper import ZhihuScraper, source_urls
+    
+    tasks = [(url, ZhihuScraper.source_name(url), limit) for url in source_urls(base_url or settings.zhihu_base_url)]
+    return db.push_scrape_tasks(tasks, ttl_seconds)
+
+
+def _save_questions(questions) -> int:
+    """在独立连接中保存问题（供线程池调用）"""
+    db = QuestionDatabase(settings.database_path)
+    try:
+        return db.add_questions(questions)
+    finally:
+        db.close()
+
+
+async def manual_run(db=None):
+    """手动运行一次爬虫任务
+
+    db 为 AsyncQuestionDatabase 时复用其线程池写库，否则临时打开数据库并在线程池中写入，
+    避免在事件循环中执行阻塞的 SQLite 操作。
+    """
+    from app.scraper.zhihu_scraper import scrape_into
+    
+    async def save(questions):
+        if db is not None:
+            return await db.add_questions(questions)
+        return await asyncio.to_thread(_save_questions, questions)
+    
+    try:
+        print("开始手动运行爬虫...")
+        # 每个来源的结果提取出来就写库
+        with span("scrape_run", "manual"):
+            found, saved_count = await scrape_into(save, limit=settings.question_limit, headless=settings.headless)
+        SCRAPE_RUNS.inc(trigger="manual", status="ok" if found else "empty")
+        
+        if found:
+            print(f"爬取成功，采集了 {found} 个问题，保存了 {saved_count} 个问题。")
+        else:
+            print("爬取结束，未采集到问题。")
+        return found
+    except Exception as e:
+        SCRAPE_RUNS.inc(trigger="manual", status="error")
+        print(f"手动爬取出错: {e}")
+        traceback.print_exc()
         return 0 
\ No newline at end of file
@@ -0,0 +1,280 @@
+"""
+Isolated scraper worker process and its supervisor
+
+The browser scraper and the detail crawler run in a child process so that
+Chromium's memory and CPU, and the Python work of handling results, stay
+out of the process serving the web pages. The child writes to the shared
+SQLite database itself (WAL, so the server keeps reading while it writes)
+and relays its live events and metrics back over the job pipe.
+"""
+import os
+import time
+import signal
+import asyncio
+import contextlib
+import threading
+import traceback
+import multiprocessing
+from typing import Any, Dict, Optional
+
+from app.config.settings import settings
+from app.events.broker import broker
+from app.metrics.registry import registry, WORKER_RESTARTS, WORKER_MEMORY
+from app.metrics.profiler import RunProfiler
+
+
+class WorkerError(Exception):
+    """A job failed in, or took down, the worker process"""
+
+
+def process_tree(pid: int) -> Optional[Dict[int, int]]:
+    """Resident memory in bytes of pid and each of its descendants, by pid.
+
+    Reads /proc, so it covers the browser processes Playwright starts under
+    the worker. Returns None where /proc is not available or pid is gone.
+    """
+    if not os.path.isdir('/proc'):
+        return None
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    children: Dict[int, list] = {}
+    rss: Dict[int, int] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                stat = f.read()
+            # Fields after the parenthesised command name start at field 3 (state)
+            fields = stat[stat.rindex(b')') + 2:].split()
+            parent, pages = int(fields[1]), int(fields[21])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+        rss[int(entry)] = pages * page_size
+    if pid not in rss:
+        return None
+    tree, stack = {}, [pid]
+    while stack:
+        current = stack.pop()
+        tree[current] = rss.get(current, 0)
+        stack.extend(children.get(current, ()))
+    return tree
+
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """Resident memory in bytes of pid and all its descendants (see process_tree)"""
+    tree = process_tree(pid)
+    return sum(tree.values()) if tree is not None else None
+
+
+async def _scrape_job(db, limit: int, headless: bool, profile: bool = False) -> Dict[str, Any]:
+    from app.scraper.zhihu_scraper import scrape_into
+
+    async def save(questions):
+        return await asyncio.to_thread(db.add_questions, questions)
+
+    with RunProfiler("scrape") if profile else contextlib.nullcontext() as profiler:
+        found, saved = await scrape_into(save, limit=limit, headless=headless)
+    result = {"found": found, "saved": saved}
+    if profiler is not None:
+        result["profile"] = profiler.summary
+    return result
+
+
+async def _details_job(db, max_pages: int, concurrency: int) -> Dict[str, int]:
+    from app.scraper.detail_crawler import crawl_details
+
+    return await crawl_details(max_pages=max_pages, db=db, concurrency=concurrency)
+
+
+async def _sites_job(db, names, headless: bool) -> Dict[str, Any]:
+    from app.sites.engine import crawl_site
+
+    return {name: await crawl_site(name, db=db, headless=headless) for name in names}
+
+
+JOBS = {
+    "scrape": _scrape_job,
+    "details": _details_job,
+    "sites": _sites_job,
+}
+
+
+def worker_main(conn):
+    """Entry point of the worker process: run jobs until told to stop.
+
+    Messages from the supervisor are ("run", job_id, kind, params, settings)
+    and ("stop",). The worker answers each job with any number of
+    ("event", type, data) messages, one ("metrics", exported) message and
+    finally ("result", job_id, ok, value_or_error).
+    """
+    from app.database.models import QuestionDatabase
+
+    # Ctrl+C reaches the whole process group; the supervisor decides when we stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    send_lock = threading.Lock()
+
+    def send(*message):
+        # Events are published from the database thread pool as well
+        with send_lock:
+            conn.send(message)
+
+    broker.forward_to(lambda event_type, data: send("event", event_type, data))
+    db = None
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message[0] == "stop":
+                break
+            _, job_id, kind, params, settings_state = message
+            # Pick up settings changed in the server since the worker started
+            settings.__dict__.update(settings_state)
+            if db is None or db.database_path != settings.database_path:
+                if db is not None:
+                    db.close()
+                db = QuestionDatabase(settings.database_path)
+            try:
+                result = asyncio.run(JOBS[kind](db, **params))
+                ok = True
+            except Exception as e:
+                traceback.print_exc()
+                result, ok = f"{type(e).__name__}: {e}", False
+            send("metrics", registry.export(reset=True))
+            send("result", job_id, ok, result)
+    finally:
+        if db is not None:
+            db.close()
+
+
+class ScraperWorker:
+    """Supervisor of one scraper worker process.
+
+    Jobs run one at a time (run_job blocks the calling thread until the
+    result arrives). The process is started on the first job and restarted
+    when it crashes, when a job runs past job_timeout seconds, or when the
+    resident memory of the worker and its browser processes passes
+    memory_limit_mb; memory is checked while a job runs and after it ends.
+    Questions are committed batch by batch, so a restart loses at most the
+    batch being extracted.
+    """
+
+    def __init__(self,
+                 memory_limit_mb: Optional[float] = 1500,
+                 job_timeout: Optional[float] = 3600,
+                 poll_interval: float = 2.0):
+        self.memory_limit = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        self.job_timeout = job_timeout
+        self.poll_interval = poll_interval
+        self.context = multiprocessing.get_context("spawn")
+        self.process = None
+        self.conn = None
+        self.job_id = 0
+        self.restarts = 0
+        self.stopping = False
+        self.lock = threading.Lock()
+
+    def _start(self):
+        self.stopping = False
+        self.conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(target=worker_main, args=(child_conn,),
+                                            name="scraper-worker", daemon=True)
+        self.process.start()
+        child_conn.close()
+        print(f"Scraper worker started (pid {self.process.pid})")
+
+    def _kill(self):
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=10)
+        self.conn.close()
+        self.process = None
+        self.conn = None
+
+    def _restart(self, reason: str, detail: str):
+        print(f"Restarting scraper worker ({detail})")
+        WORKER_RESTARTS.inc(reason=reason)
+        self.restarts += 1
+        self._kill()
+
+    def memory(self) -> Optional[int]:
+        """Resident bytes of the worker and its browsers, None if unknown"""
+        if self.process is None or not self.process.is_alive():
+            return None
+        rss = process_tree_rss(self.process.pid)
+        if rss is not None:
+            WORKER_MEMORY.set(rss)
+        return rss
+
+    def _over_memory_limit(self) -> bool:
+        rss = self.memory()
+        return self.memory_limit is not None and rss is not None and rss > self.memory_limit
+
+    def run_job(self, kind: str, **params) -> Any:
+        """Run one job in the worker and return its result.
+
+        Raises WorkerError if the job raised, or if the worker had to be
+        restarted before it finished.
+        """
+        with self.lock:
+            if self.process is None or not self.process.is_alive():
+                if self.process is not None:
+                    self._restart("crashed", f"exit code {self.process.exitcode} between jobs")
+                self._start()
+            # stop() may close these from another thread while we wait
+            conn, process = self.conn, self.process
+            self.job_id += 1
+            conn.send(("run", self.job_id, kind, params, dict(vars(settings))))
+            started = last_check = time.monotonic()
+
+            while True:
+                try:
+                    message = conn.recv() if conn.poll(self.poll_interval) else None
+                except (EOFError, OSError):
+                    message = None
+                if message is not None:
+                    if message[0] == "event":
+                        broker.publish(message[1], message[2])
+                    elif message[0] == "metrics":
+                        registry.merge(message[1])
+                    elif message[0] == "result" and message[1] == self.job_id:
+                        _, _, ok, value = message
+                        if self._over_memory_limit():
+                            self._restart("memory", f"{self.memory_limit // 2 ** 20} MB limit passed")
+                        if not ok:
+                            raise WorkerError(value)
+                        return value
+
+                now = time.monotonic()
+                if message is not None and now - last_check < self.poll_interval:
+                    continue
+                last_check = now
+                if not process.is_alive():
+                    if self.stopping:
+                        raise WorkerError("Scraper worker was stopped")
+                    code = process.exitcode
+                    self._restart("crashed", f"exit code {code} during {kind}")
+                    raise WorkerError(f"Scraper worker exited with code {code}")
+                if self._over_memory_limit():
+                    self._restart("memory", f"{self.memory_limit // 2 ** 20} MB limit passed during {kind}")
+                    raise WorkerError("Scraper worker passed its memory limit")
+                if self.job_timeout and now - started > self.job_timeout:
+                    self._restart("timeout", f"{kind} ran longer than {self.job_timeout:.0f}s")
+                    raise WorkerError(f"{kind} timed out after {self.job_timeout:.0f}s")
+
+    def stop(self, timeout: float = 30):
+        """Ask the worker to exit after its current job; kill it after timeout"""
+        if self.process is None:
+            return
+        self.stopping = True
+        try:
+            self.conn.send(("stop",))
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=timeout)
+        self._kill()
@@ -1,3 +1,3 @@
-"""
-Scraper module for Zhihu Hot Questions Scraper
+"""
+Scraper module for Zhihu Hot Questions Scraper
 """ 
\ No newline at end of file
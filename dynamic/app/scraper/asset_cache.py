@@ -0,0 +1,209 @@
+"""
+浏览器静态资源的持久缓存：带内容哈希的 JS/CSS/字体按内容寻址存到磁盘，跨运行复用
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.config.settings import settings
+from app.metrics.registry import ASSET_CACHE_REQUESTS, ASSET_CACHE_BYTES, ASSET_CACHE_SIZE
+
+# 只拦截这些扩展名的请求；其余请求（页面、接口、图片）不经过路由，直接走浏览器网络
+ASSET_EXTENSIONS = (".js", ".mjs", ".css", ".woff", ".woff2", ".ttf", ".otf")
+RESOURCE_TYPES = ("script", "stylesheet", "font")
+# 构建产物的文件名里带内容哈希（main.app.216a26f4.js、chunk-3f2a9c1b.css），同一 URL 的内容不会变
+HASHED_NAME_RE = re.compile(r'[.\-_~][0-9a-f]{8,}[.\-_~]', re.I)
+# 从缓存回放时保留的响应头；Content-Encoding、Content-Length 等和原始传输有关的头不保留
+KEPT_HEADERS = ("content-type", "cache-control", "access-control-allow-origin", "timing-allow-origin")
+
+
+def is_immutable(url: str, headers: Dict[str, str]) -> bool:
+    """响应是否可以长期缓存：文件名带内容哈希，或服务器声明了 immutable"""
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-store" in cache_control or "private" in cache_control:
+        return False
+    filename = urlsplit(url).path.rsplit("/", 1)[-1]
+    return bool(HASHED_NAME_RE.search(filename)) or "immutable" in cache_control
+
+
+class AssetCache:
+    """浏览器上下文的静态资源缓存
+
+    每次运行都会启动一个空白配置的 Chromium，不加缓存时每次导航都要重新下载
+    知乎的大体积 JS/CSS。attach() 在上下文上注册路由：命中的资源直接从磁盘回放，
+    未命中的由 Playwright 代为下载，不可变的资源（见 is_immutable）写入缓存。
+
+    文件按 SHA-256 存放在 objects/ 下，内容相同的 URL 只存一份；index.db 记录
+    URL 到内容的映射和最近使用时间。总大小超过 max_bytes 时按最近最少使用淘汰。
+    同一目录在进程内共用一个实例（for_directory），多个进程可以共用同一目录。
+    """
+
+    _instances: Dict[str, 'AssetCache'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(directory, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS assets (
+                    url TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            ''')
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_last_used ON assets (last_used)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_digest ON assets (digest)")
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0, "bytes_saved": 0, "bytes_downloaded": 0}
+        ASSET_CACHE_SIZE.set(self.size())
+
+    @classmethod
+    def for_directory(cls, directory: str, max_bytes: int) -> 'AssetCache':
+        """返回目录对应的共享实例"""
+        directory = os.path.abspath(directory)
+        with cls._instances_lock:
+            cache = cls._instances.get(directory)
+            if cache is None:
+                cache = cls._instances[directory] = cls(directory, max_bytes)
+            cache.max_bytes = max_bytes
+            return cache
+
+    @classmethod
+    def from_settings(cls) -> Optional['AssetCache']:
+        """按 asset_cache_dir / asset_cache_mb 创建；asset_cache_mb 为空或 0 时不使用缓存"""
+        if not settings.asset_cache_mb:
+            return None
+        return cls.for_directory(settings.asset_cache_dir, int(settings.asset_cache_mb * 1024 * 1024))
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    @staticmethod
+    def matches(url: str) -> bool:
+        """路由过滤：URL 是否像一个静态资源"""
+        return urlsplit(url).path.lower().endswith(ASSET_EXTENSIONS)
+
+    def lookup(self, url: str) -> Optional[Tuple[Dict[str, str], bytes]]:
+        """返回缓存的 (响应头, 内容)，并刷新最近使用时间；没有时返回 None"""
+        with self.lock:
+            row = self.conn.execute("SELECT digest, headers FROM assets WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            digest, headers = row
+            try:
+                with open(self._path(digest), "rb") as f:
+                    body = f.read()
+            except OSError:
+                # 文件被手动删除了：当作未命中，下次重新下载
+                with self.conn:
+                    self.conn.execute("DELETE FROM assets WHERE url = ?", (url,))
+                return None
+            with self.conn:
+                self.conn.execute("UPDATE assets SET last_used = ? WHERE url = ?", (time.time(), url))
+            return json.loads(headers), body
+
+    def store(self, url: str, body: bytes, headers: Dict[str, str]):
+        """保存一个资源，必要时淘汰最久未用的资源"""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._path(digest)
+        kept = {name: value for name, value in headers.items() if name.lower() in KEPT_HEADERS}
+        with self.lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(body)
+                os.replace(temp_path, path)
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO assets (url, digest, size, headers, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (url, digest, len(body), json.dumps(kept), time.time())
+                )
+            self.stats["stored"] += 1
+            self._evict()
+
+    def size(self) -> int:
+        """缓存中文件的总字节数（相同内容只算一次）"""
+        row = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM assets)"
+        ).fetchone()
+        return row[0]
+
+    def _evict(self):
+        total = self.size()
+        if total > self.max_bytes:
+            rows = self.conn.execute("SELECT url, digest, size FROM assets ORDER BY last_used").fetchall()
+            with self.conn:
+                for url, digest, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    self.conn.execute("DELETE FROM assets WHERE url = ?", (url,))
+                    self.stats["evicted"] += 1
+                    # 内容可能还被别的 URL 引用，最后一个引用删除时才删文件
+                    if self.conn.execute("SELECT 1 FROM assets WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+                        continue
+                    total -= size
+                    try:
+                        os.remove(self._path(digest))
+                    except OSError:
+                        pass
+        ASSET_CACHE_SIZE.set(total)
+
+    async def attach(self, context):
+        """在浏览器上下文上注册缓存路由"""
+        await context.route(self.matches, self._handle)
+
+    async def _handle(self, route, request):
+        if request.method != "GET" or request.resource_type not in RESOURCE_TYPES:
+            await route.continue_()
+            return
+        cached = await asyncio.to_thread(self.lookup, request.url)
+        if cached is not None:
+            headers, body = cached
+            self.stats["hits"] += 1
+            self.stats["bytes_saved"] += len(body)
+            ASSET_CACHE_REQUESTS.inc(outcome="hit")
+            ASSET_CACHE_BYTES.inc(len(body), outcome="saved")
+            await route.fulfill(status=200, headers=headers, body=body)
+            return
+
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            # 下载失败（页面已关闭、网络错误）交还给浏览器自己处理
+            await route.continue_()
+            return
+        self.stats["misses"] += 1
+        self.stats["bytes_downloaded"] += len(body)
+        ASSET_CACHE_REQUESTS.inc(outcome="miss")
+        ASSET_CACHE_BYTES.inc(len(body), outcome="downloaded")
+        if response.status == 200 and is_immutable(request.url, response.headers):
+            try:
+                await asyncio.to_thread(self.store, request.url, body, response.headers)
+            except Exception as e:
+                print(f"缓存静态资源 {request.url} 失败: {e}")
+        await route.fulfill(response=response, body=body)
+
+    def summary(self, since: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        """统计（since 为之前取得的 stats 副本时返回这段时间的差值）和当前缓存大小"""
+        since = since or {}
+        result = {name: value - since.get(name, 0) for name, value in self.stats.items()}
+        with self.lock:
+            result["size_bytes"] = self.size()
+        return result
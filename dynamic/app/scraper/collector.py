@@ -0,0 +1,182 @@
+"""
+页面内增量收集器：用 MutationObserver 在滚动过程中收集新插入的问题，分批推送回 Python
+"""
+import weakref
+from typing import Dict, List
+
+from playwright.async_api import Page
+
+from app.database.models import Question
+
+# 注入页面的收集脚本。参数：{mode, binding, batchSize, flushMs}
+#
+# 安装时先扫描一遍已有节点，之后只处理 MutationObserver 报告的新增节点及其子树，
+# 每个节点只看一次（O(新增节点)）。虚拟列表滚出视口后删除的节点在插入时已经收集过，
+# 不会丢失。问题 id 在页面内去重，新问题攒够 batchSize 个或 flushMs 毫秒后
+# 通过 expose_binding 暴露的函数推送一批。
+COLLECTOR_SCRIPT = r"""
+(options) => {
+    if (window.__zhihuCollector) return window.__zhihuCollector.seen.size;
+
+    const seen = new Set();
+    let pending = [];
+    let timer = null;
+
+    // 相对链接按当前页面解析，站点指向 zhihu_base_url 的其他主机（如模拟站点）时也正确
+    const fullUrl = (href) => new URL(href, location.href).href;
+
+    // 热榜项：标题、链接和热度（如 "1234 万热度"，换算为整数）
+    const parseHotItem = (item) => {
+        const link = item.querySelector('.HotItem-title a');
+        if (!link) return null;
+        const href = link.getAttribute('href') || '';
+        const idMatch = href.match(/\/question\/(\d+)/);
+        const title = link.textContent.trim();
+        if (!idMatch || !title) return null;
+
+        let heat = null;
+        const metrics = item.querySelector('.HotItem-metrics');
+        const heatMatch = metrics && metrics.textContent.match(/(\d+(?:\.\d+)?)\s*(万|亿)?\s*热度/);
+        if (heatMatch) {
+            const unit = heatMatch[2] === '亿' ? 1e8 : heatMatch[2] === '万' ? 1e4 : 1;
+            heat = Math.round(parseFloat(heatMatch[1]) * unit);
+        }
+        return {id: idMatch[1], title, url: fullUrl(href), hot_score: heat};
+    };
+
+    // 普通问题链接：忽略过短或明显不是问题标题的链接
+    const parseQuestionLink = (link) => {
+        const href = link.getAttribute('href') || '';
+        const idMatch = href.match(/\/question\/(\d+)/);
+        const title = link.textContent.trim();
+        if (!idMatch || !title || title.length < 5 ||
+            title.includes('查看全部') || title.includes('更多') ||
+            title.includes('登录') || title.includes('...')) return null;
+        return {id: idMatch[1], title, url: fullUrl(href)};
+    };
+
+    const flush = () => {
+        if (timer) {
+            clearTimeout(timer);
+            timer = null;
+        }
+        if (!pending.length) return Promise.resolve(0);
+        const batch = pending;
+        pending = [];
+        return window[options.binding](batch).then(() => batch.length);
+    };
+
+    const take = (record) => {
+        if (!record || seen.has(record.id)) return;
+        seen.add(record.id);
+        pending.push(record);
+    };
+
+    const scan = (node) => {
+        if (options.mode === 'hot') {
+            // 标题可能晚于热榜项本身插入，此时从祖先找回所在的热榜项
+            const owner = node.closest('.HotItem');
+            if (owner) take(parseHotItem(owner));
+            node.querySelectorAll('.HotItem').forEach(item => take(parseHotItem(item)));
+        } else {
+            if (node.matches('a[href*="/question/"]')) take(parseQuestionLink(node));
+            node.querySelectorAll('a[href*="/question/"]').forEach(link => take(parseQuestionLink(link)));
+        }
+    };
+
+    const schedule = () => {
+        if (pending.length >= options.batchSize) flush();
+        else if (pending.length && !timer) timer = setTimeout(flush, options.flushMs);
+    };
+
+    const observer = new MutationObserver((mutations) => {
+        for (const mutation of mutations) {
+            for (const node of mutation.addedNodes) {
+                if (node.nodeType === Node.ELEMENT_NODE) scan(node);
+            }
+        }
+        schedule();
+    });
+
+    scan(document.documentElement);
+    observer.observe(document.documentElement, {childList: true, subtree: true});
+    window.__zhihuCollector = {
+        seen,
+        flush,
+        stop: () => {
+            observer.disconnect();
+            delete window.__zhihuCollector;
+            return flush();
+        },
+    };
+    schedule();
+    return seen.size;
+}
+"""
+
+STOP_SCRIPT = "() => window.__zhihuCollector ? window.__zhihuCollector.stop() : 0"
+
+
+class QuestionCollector:
+    """页面内增量收集器的 Python 端
+
+    用法：导航前 attach(page) 注册推送函数，导航后 start(page) 注入收集脚本，
+    滚动结束后 finish(page) 推送剩余的问题并停止观察，返回按出现顺序排列的问题。
+    与滚动后整页 querySelectorAll 相比，每个节点只解析一次，且不会漏掉
+    虚拟列表中已经滚出并被删除的条目。
+    """
+
+    BINDING = "__zhihuCollect"
+
+    # 每个页面只能注册一次推送函数；它把批次转给该页面当前的收集器
+    _active: 'weakref.WeakKeyDictionary[Page, QuestionCollector]' = weakref.WeakKeyDictionary()
+
+    def __init__(self, mode: str = "links", batch_size: int = 50, flush_ms: int = 250):
+        """mode 为 'hot'（热榜项，带热度）或 'links'（所有问题链接）"""
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_ms = flush_ms
+        self.questions: Dict[str, Question] = {}
+        self.batches = 0
+
+    async def attach(self, page: Page):
+        """让页面的推送交给本收集器；在页面导航前调用"""
+        if page not in self._active:
+            await page.expose_binding(self.BINDING, self._dispatch)
+        self._active[page] = self
+
+    @classmethod
+    def _dispatch(cls, source, batch: List[dict]):
+        collector = cls._active.get(source["page"])
+        if collector is not None:
+            collector._receive(batch)
+
+    async def start(self, page: Page) -> int:
+        """在当前页面注入收集脚本，返回初次扫描收集到的问题数"""
+        return await page.evaluate(COLLECTOR_SCRIPT, {
+            "mode": self.mode,
+            "binding": self.BINDING,
+            "batchSize": self.batch_size,
+            "flushMs": self.flush_ms,
+        })
+
+    def _receive(self, batch: List[dict]):
+        """页面推送的一批问题（页面内已去重，这里再按 id 去重一次以防页面重新加载）"""
+        self.batches += 1
+        for data in batch:
+            if data["id"] in self.questions:
+                continue
+            self.questions[data["id"]] = Question(
+                id=data["id"],
+                title=data["title"],
+                url=data["url"],
+                # 列表页不显示回答数和关注数，留空由详情爬虫补全
+                answer_count=None,
+                follow_count=None,
+                hot_score=data.get("hot_score")
+            )
+
+    async def finish(self, page: Page) -> List[Question]:
+        """推送页面中剩余的问题、停止观察，返回收集到的全部问题"""
+        await page.evaluate(STOP_SCRIPT)
+        return list(self.questions.values())
@@ -0,0 +1,240 @@
+"""
+多账号浏览器上下文池：按账号轮换、限速，并在被限流时冷却
+"""
+import os
+import re
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse
+
+from app.config.settings import settings
+from app.metrics.registry import CONTEXT_REQUESTS
+from app.scraper.session import SessionManager, DEFAULT_USER_AGENT, PROBE_URL
+
+# 被限流时知乎会跳转到人机验证页，或直接返回这些状态码
+THROTTLE_STATUSES = (403, 429)
+THROTTLE_URL_MARKERS = ("/account/unhuman",)
+
+
+class PoolExhausted(Exception):
+    """没有可用的上下文（会话全部失效，或冷却时间超过了等待上限）"""
+
+
+class AccountConfig:
+    """一个账号的配置：cookies 文件、浏览器标识和请求间隔"""
+
+    def __init__(self,
+                 cookies_file: str,
+                 user_agent: str = DEFAULT_USER_AGENT,
+                 viewport: Optional[Dict[str, int]] = None,
+                 min_interval: float = 5.0,
+                 name: Optional[str] = None):
+        self.cookies_file = cookies_file
+        self.user_agent = user_agent
+        self.viewport = viewport or {"width": 1280, "height": 800}
+        self.min_interval = min_interval
+        self.name = name or cookies_file
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AccountConfig':
+        """从 config.json 中 accounts 列表的一项创建"""
+        return cls(**data)
+
+
+class PooledContext:
+    """池中的一个上下文及其调度状态"""
+
+    def __init__(self, account: AccountConfig, session: SessionManager):
+        self.account = account
+        self.session = session
+        self.name = account.name
+        self.context = None
+        self.busy = False
+        self.retired = False
+        self.next_allowed = 0.0
+        self.cooldown_until = 0.0
+        self.strikes = 0
+        self.requests = 0
+
+    def ready_at(self) -> float:
+        """最早可以再次发出请求的时间（time.monotonic）"""
+        return max(self.next_allowed, self.cooldown_until)
+
+
+def throttle_signal(response) -> Optional[float]:
+    """判断一次导航是否被限流
+
+    返回 None 表示正常；否则返回服务器建议的等待秒数（没有 Retry-After 时为 0）。
+    """
+    if response is None:
+        return None
+    if response.status in THROTTLE_STATUSES or any(m in response.url for m in THROTTLE_URL_MARKERS):
+        retry_after = response.headers.get("retry-after", "")
+        return float(retry_after) if retry_after.isdigit() else 0.0
+    return None
+
+
+class ContextPool:
+    """在多个账号的浏览器上下文之间调度页面请求
+
+    每个账号一个上下文，各自使用自己的 cookies（storage_state）、User-Agent 和视口。
+    lease() 交出最早可用的空闲上下文：同一上下文两次请求之间至少间隔
+    min_interval 秒；被限流后进入冷却，连续被限流时冷却时间按指数增长，
+    直到 max_cooldown。登录失效的上下文退出轮换。
+    """
+
+    def __init__(self,
+                 accounts: List[AccountConfig],
+                 cooldown: float = 60.0,
+                 max_cooldown: float = 900.0,
+                 max_wait: float = 120.0,
+                 sessions: Optional[List[SessionManager]] = None):
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.max_wait = max_wait
+        if sessions is None:
+            sessions = [SessionManager.for_cookies_file(a.cookies_file) for a in accounts]
+        self.contexts = [PooledContext(a, s) for a, s in zip(accounts, sessions)]
+        self._changed = None
+        # 不为空时记录每个上下文的 Playwright trace，关闭时写到这个目录
+        self.trace_dir = None
+
+    @classmethod
+    def from_settings(cls) -> 'ContextPool':
+        """按 config.json 的 accounts 配置创建；未配置时只用 cookies_file 一个账号
+
+        zhihu_base_url 指向其他站点（如本地模拟站点）时，会话的探测地址和 cookies 域名随之改变。
+        """
+        accounts = [AccountConfig.from_dict(a) for a in settings.accounts]
+        if not accounts:
+            accounts = [AccountConfig(settings.cookies_file, name="default")]
+        base_url = settings.zhihu_base_url.rstrip("/")
+        probe_url = base_url + "/api/v4/me"
+        if probe_url == PROBE_URL:
+            return cls(accounts)
+        domain = urlparse(base_url).hostname
+        return cls(accounts, sessions=[
+            SessionManager(a.cookies_file, probe_url=probe_url, domain=domain) for a in accounts
+        ])
+
+    @property
+    def active(self) -> List[PooledContext]:
+        return [c for c in self.contexts if not c.retired]
+
+    def _condition(self) -> asyncio.Condition:
+        # 在首次使用时创建，确保绑定到当前运行的事件循环
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    async def probe(self) -> int:
+        """并发探测所有账号的登录状态，失效的退出轮换；返回剩余可用数量"""
+        results = await asyncio.gather(*(c.session.probe() for c in self.contexts))
+        for pooled, result in zip(self.contexts, results):
+            if result is False:
+                print(f"账号 {pooled.name} 的登录会话已失效，不参与本次爬取")
+                pooled.retired = True
+        return len(self.active)
+
+    async def open(self, browser, init_script: Optional[str] = None, asset_cache=None):
+        """为每个可用账号创建浏览器上下文；asset_cache 为 AssetCache 时各上下文共用它"""
+        for pooled in self.active:
+            pooled.context = await pooled.session.new_context(
+                browser,
+                user_agent=pooled.account.user_agent,
+                viewport=pooled.account.viewport
+            )
+            if init_script:
+                await pooled.context.add_init_script(init_script)
+            if asset_cache is not None:
+                await asset_cache.attach(pooled.context)
+            if self.trace_dir:
+                await pooled.context.tracing.start(screenshots=True, snapshots=True)
+
+    @asynccontextmanager
+    async def lease(self):
+        """借出一个上下文，用完后自动归还并记录请求间隔"""
+        pooled = await self._acquire()
+        try:
+            yield pooled
+        finally:
+            condition = self._condition()
+            async with condition:
+                pooled.busy = False
+                pooled.requests += 1
+                pooled.next_allowed = time.monotonic() + pooled.account.min_interval
+                condition.notify_all()
+
+    async def _acquire(self) -> PooledContext:
+        condition = self._condition()
+        async with condition:
+            while True:
+                active = self.active
+                if not active:
+                    raise PoolExhausted("没有登录有效的账号")
+                now = time.monotonic()
+                idle = [c for c in active if not c.busy]
+                ready = [c for c in idle if c.ready_at() <= now]
+                if ready:
+                    # 优先使用请求最少的上下文，让负载均匀分布到各账号
+                    pooled = min(ready, key=lambda c: (c.requests, c.ready_at()))
+                    pooled.busy = True
+                    return pooled
+                timeout = None
+                if idle:
+                    timeout = min(c.ready_at() for c in idle) - now
+                    if timeout > self.max_wait:
+                        raise PoolExhausted(f"所有账号都在冷却中，最早 {timeout:.0f} 秒后可用")
+                try:
+                    await asyncio.wait_for(condition.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+    def report_success(self, pooled: PooledContext):
+        """一次请求成功，清除连续限流计数"""
+        pooled.strikes = 0
+        CONTEXT_REQUESTS.inc(context=pooled.name, outcome="ok")
+
+    def report_throttled(self, pooled: PooledContext, retry_after: float = 0.0):
+        """一次请求被限流，让该上下文进入冷却"""
+        pooled.strikes += 1
+        cooldown = min(self.max_cooldown, self.cooldown * 2 ** (pooled.strikes - 1))
+        cooldown = max(cooldown, retry_after)
+        pooled.cooldown_until = time.monotonic() + cooldown
+        CONTEXT_REQUESTS.inc(context=pooled.name, outcome="throttled")
+        print(f"账号 {pooled.name} 被限流，冷却 {cooldown:.0f} 秒")
+
+    def retire(self, pooled: PooledContext):
+        """登录失效：本次运行不再使用该上下文"""
+        pooled.retired = True
+        CONTEXT_REQUESTS.inc(context=pooled.name, outcome="logged_out")
+
+    async def check_logged_out(self, pooled: PooledContext) -> bool:
+        """页面上出现了登录入口时调用：以 HTTP 探测为准确认是否真的掉线
+
+        登录按钮也可能出现在已登录页面的横幅或弹窗里，所以丢弃缓存的探测结果重新探测，
+        只有探测明确返回未登录时才让该上下文退出轮换（探测结果随之缓存），返回是否已退出。
+        """
+        pooled.session.invalidate_probe()
+        if await pooled.session.probe() is False:
+            self.retire(pooled)
+            return True
+        return False
+
+    async def close(self):
+        """保存仍然有效的会话并关闭所有上下文"""
+        for pooled in self.contexts:
+            if pooled.context is None:
+                continue
+            try:
+                if self.trace_dir:
+                    name = re.sub(r'[^\w.-]+', '_', pooled.name)
+                    await pooled.context.tracing.stop(path=os.path.join(self.trace_dir, f"trace-{name}.zip"))
+                if not pooled.retired:
+                    await pooled.session.save(pooled.context)
+                await pooled.context.close()
+            except Exception as e:
+                print(f"关闭上下文 {pooled.name} 时出错: {e}")
+            pooled.context = None
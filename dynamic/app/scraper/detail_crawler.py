@@ -0,0 +1,172 @@
+"""
+知乎问题详情爬虫：从详情队列（detail_frontier）取出问题，抓取问题页补全回答数和关注数
+"""
+import re
+import html
+import asyncio
+import datetime
+from typing import Dict, Optional, Tuple
+
+from app.config.settings import settings
+from app.database.models import Question, QuestionDatabase
+from app.metrics.registry import span, DETAIL_FETCHES
+from app.scraper.context_pool import THROTTLE_STATUSES, THROTTLE_URL_MARKERS
+from app.scraper.session import SessionManager, DEFAULT_USER_AGENT
+
+# 问题页服务端渲染的 schema.org 元数据：
+# <div itemProp="mainEntity" itemscope="" itemType="http://schema.org/Question">
+#   <meta itemProp="name" content="..."/> ... <meta itemProp="answerCount" content="56"/> ...
+#   <meta itemProp="zhihu:followerCount" content="123"/>
+QUESTION_SCOPE_RE = re.compile(r'itemtype="https?://schema\.org/Question"', re.I)
+META_RE = re.compile(r'<meta\s[^>]*>', re.I)
+ATTR_RE = re.compile(r'([\w:-]+)="([^"]*)"')
+
+
+def parse_question_page(page_html: str) -> Optional[Dict[str, object]]:
+    """从问题页 HTML 中解析标题、回答数和关注数
+
+    只读取问题本身的 meta（问题作用域内、第一个子元素之前），
+    避免把回答作者的 zhihu:followerCount 当成问题的关注数。
+    找不到问题元数据（例如登录页、验证页）时返回 None。
+    """
+    scope = QUESTION_SCOPE_RE.search(page_html)
+    if not scope:
+        return None
+    end = page_html.find('<div', scope.end())
+    header = page_html[scope.end():end if end != -1 else len(page_html)]
+    props = {}
+    for tag in META_RE.finditer(header):
+        attrs = {name.lower(): value for name, value in ATTR_RE.findall(tag.group(0))}
+        if 'itemprop' in attrs and 'content' in attrs:
+            props.setdefault(attrs['itemprop'], html.unescape(attrs['content']))
+
+    details = {}
+    if props.get('name'):
+        details['title'] = props['name']
+    for prop, field in (('answerCount', 'answer_count'), ('zhihu:followerCount', 'follow_count')):
+        if props.get(prop, '').isdigit():
+            details[field] = int(props[prop])
+    return details if 'answer_count' in details or 'follow_count' in details else None
+
+
+class DetailCrawler:
+    """问题详情爬虫
+
+    通过一个共享的 aiohttp 连接池抓取问题页（问题页的计数在服务端渲染，
+    不需要浏览器），并发数由 concurrency 限制。每批从详情队列领取 batch_size
+    个问题，抓取完成后一次性写回数据库：成功的更新计数并按问题年龄重新排期，
+    失败的指数退避重试，已删除的问题移出队列。遇到限流立即结束本次运行。
+    """
+
+    def __init__(self,
+                 db: QuestionDatabase,
+                 session: Optional[SessionManager] = None,
+                 concurrency: int = 4,
+                 batch_size: int = 20,
+                 timeout: float = 15,
+                 lease_seconds: float = 600):
+        """初始化详情爬虫"""
+        self.db = db
+        self.session = session or SessionManager.for_cookies_file(settings.cookies_file)
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.lease_seconds = lease_seconds
+        self.throttled = False
+
+    async def run(self, max_pages: Optional[int] = None) -> Dict[str, int]:
+        """抓取到队列中没有到期的问题、达到 max_pages 或被限流为止，返回各结果的数量"""
+        import aiohttp
+
+        stats = {"ok": 0, "failed": 0, "gone": 0, "throttled": 0, "changed": 0}
+        self.throttled = False
+        headers = {"User-Agent": DEFAULT_USER_AGENT, "Accept": "text/html"}
+        cookie_header = self.session.cookie_header()
+        if cookie_header:
+            headers["Cookie"] = cookie_header
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as http:
+            remaining = max_pages
+            while not self.throttled and (remaining is None or remaining > 0):
+                size = self.batch_size if remaining is None else min(self.batch_size, remaining)
+                questions = await asyncio.to_thread(self.db.claim_detail_tasks, size, self.lease_seconds)
+                if not questions:
+                    break
+                if remaining is not None:
+                    remaining -= len(questions)
+
+                async def fetch_bounded(question):
+                    async with semaphore:
+                        return await self.fetch(http, question)
+
+                with span("detail_batch"):
+                    outcomes = await asyncio.gather(*(fetch_bounded(q) for q in questions))
+
+                fetched, failed, gone = [], [], []
+                for question, (outcome, detail) in zip(questions, outcomes):
+                    stats[outcome] += 1
+                    DETAIL_FETCHES.inc(outcome=outcome)
+                    if outcome == "ok":
+                        fetched.append(question)
+                    elif outcome == "gone":
+                        gone.append(question.id)
+                    else:
+                        failed.append((question.id, detail))
+                with span("detail_write"):
+                    stats["changed"] += await asyncio.to_thread(
+                        self.db.save_question_details, fetched, failed, gone
+                    )
+
+        print(f"详情爬取完成: 成功 {stats['ok']}，失败 {stats['failed']}，已删除 {stats['gone']}，"
+              f"被限流 {stats['throttled']}，更新 {stats['changed']} 个问题")
+        return stats
+
+    async def fetch(self, http, question: Question) -> Tuple[str, str]:
+        """抓取一个问题页并把解析结果写入 question
+
+        返回 (结果, 说明)，结果为 ok、failed、gone 或 throttled。
+        """
+        import aiohttp
+
+        if self.throttled:
+            return "throttled", "跳过：本次运行已被限流"
+        try:
+            async with http.get(question.url) as response:
+                if response.status in (404, 410):
+                    return "gone", f"HTTP {response.status}"
+                if (response.status in THROTTLE_STATUSES
+                        or any(marker in str(response.url) for marker in THROTTLE_URL_MARKERS)):
+                    self.throttled = True
+                    print(f"详情爬取被限流（HTTP {response.status}），停止本次运行")
+                    return "throttled", f"HTTP {response.status} {response.url}"
+                if response.status != 200:
+                    return "failed", f"HTTP {response.status}"
+                page_html = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return "failed", f"{type(e).__name__}: {e}"
+
+        details = parse_question_page(page_html)
+        if details is None:
+            return "failed", "页面中没有问题元数据"
+        question.title = details.get("title") or question.title
+        question.answer_count = details.get("answer_count", question.answer_count)
+        question.follow_count = details.get("follow_count", question.follow_count)
+        # 作为一次新的观测写入：last_seen 和趋势快照都记在抓取时间
+        question.timestamp = datetime.datetime.now()
+        return "ok", ""
+
+
+async def crawl_details(max_pages: Optional[int] = None,
+                        db: Optional[QuestionDatabase] = None,
+                        concurrency: int = 4) -> Dict[str, int]:
+    """运行一次详情爬取的便捷函数"""
+    own_db = db is None
+    db = db or QuestionDatabase(settings.database_path)
+    try:
+        return await DetailCrawler(db, concurrency=concurrency).run(max_pages=max_pages)
+    finally:
+        if own_db:
+            db.close()
@@ -0,0 +1,164 @@
+"""
+分布式爬虫节点：从协调节点领取爬取任务，用本机的浏览器和账号池抓取，批量回传结果
+"""
+import os
+import time
+import socket
+import asyncio
+import traceback
+from typing import Any, Dict, List, Optional
+
+from app.metrics.registry import span
+
+
+class RemoteCrawlWorker:
+    """分布式爬虫节点
+
+    协调节点（运行 run-server 并设置 crawl_mode 为 distributed 的机器）每轮为每个来源页面
+    排入一个任务。节点循环领取最多 capacity 个任务，用本机的浏览器和上下文池并发抓取，
+    一轮的结果在一个请求里提交。截止时间或租约内没有抓完的任务按失败提交，
+    由协调节点重新排队；节点中途退出时，租约到期后任务自动转给其他节点。
+    """
+
+    def __init__(self,
+                 coordinator_url: str,
+                 name: Optional[str] = None,
+                 token: str = "",
+                 capacity: int = 4,
+                 lease_seconds: float = 300,
+                 poll_interval: float = 10,
+                 headless: bool = True,
+                 scraper=None):
+        """初始化节点
+
+        name 默认为 主机名-进程号；scraper 默认按本机 config.json 创建 ZhihuScraper，
+        也可以传入指向本地测试站点的实例。
+        """
+        self.coordinator_url = coordinator_url.rstrip('/')
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.token = token
+        self.capacity = capacity
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.headless = headless
+        self.scraper = scraper
+
+    async def run(self, max_rounds: Optional[int] = None, idle_exit: Optional[float] = None) -> Dict[str, int]:
+        """领取并执行任务，直到执行了 max_rounds 轮或连续 idle_exit 秒没有任务；返回统计"""
+        import aiohttp
+        from app.scraper.zhihu_scraper import ZhihuScraper
+
+        stats = {"rounds": 0, "tasks": 0, "failed": 0, "questions": 0, "saved": 0, "rejected": 0}
+        scraper = self.scraper or ZhihuScraper(headless=self.headless)
+        headers = {"X-Worker-Token": self.token} if self.token else {}
+        timeout = aiohttp.ClientTimeout(total=60)
+        print(f"爬虫节点 {self.name} 已启动，协调节点 {self.coordinator_url}")
+
+        try:
+            async with aiohttp.ClientSession(headers=headers, timeout=timeout) as http:
+                idle_since = time.monotonic()
+                while max_rounds is None or stats["rounds"] < max_rounds:
+                    try:
+                        tasks = await self.lease(http)
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        print(f"无法从协调节点领取任务: {e}")
+                        tasks = []
+                    if not tasks:
+                        if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                            break
+                        await asyncio.sleep(self.poll_interval)
+                        continue
+
+                    stats["rounds"] += 1
+                    with span("remote_round", self.name):
+                        results = await self.run_tasks(scraper, tasks)
+                    stats["tasks"] += len(results)
+                    stats["failed"] += sum(1 for r in results if r["error"])
+                    stats["questions"] += sum(len(r["questions"]) for r in results)
+                    outcomes = await self.submit(http, results)
+                    stats["saved"] += sum(o["saved"] for o in outcomes)
+                    stats["rejected"] += sum(1 for o in outcomes if not o["accepted"])
+                    idle_since = time.monotonic()
+        finally:
+            await scraper.close()
+        return stats
+
+    async def lease(self, http) -> List[Dict[str, Any]]:
+        """向协调节点领取任务"""
+        async with http.post(f"{self.coordinator_url}/api/tasks/lease", json={
+            "worker": self.name,
+            "limit": self.capacity,
+            "lease_seconds": self.lease_seconds,
+        }) as response:
+            response.raise_for_status()
+            return (await response.json())["tasks"]
+
+    async def run_tasks(self, scraper, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """并发执行一轮任务，返回每个任务的结果"""
+        # 浏览器只启动一次；熔断中的来源和全部账号失效时直接按失败提交
+        try:
+            runnable = set(await scraper.prepare([task["url"] for task in tasks]))
+        except Exception as e:
+            traceback.print_exc()
+            runnable, reason = set(), f"{type(e).__name__}: {e}"
+        else:
+            reason = "来源已熔断或没有可用的账号"
+        finished = await asyncio.gather(*(self.run_task(scraper, task) for task in tasks if task["url"] in runnable))
+        by_id = {result["task_id"]: result for result in finished}
+        return [by_id.get(task["id"]) or self._result(task, error=reason) for task in tasks]
+
+    async def run_task(self, scraper, task: Dict[str, Any]) -> Dict[str, Any]:
+        """抓取一个任务的来源页面"""
+        # 截止时间和租约取较早者：之后的结果协调节点已经不再等待
+        timeout = min(task["expires_in"], self.lease_seconds)
+        if timeout <= 0:
+            return self._result(task, error="任务已过截止时间")
+        try:
+            questions = await asyncio.wait_for(
+                scraper.scrape_url(task["url"], task["max_questions"], [0]), timeout
+            )
+        except asyncio.TimeoutError:
+            return self._result(task, error=f"超过 {timeout:.0f} 秒未完成")
+        if not questions:
+            return self._result(task, error="未提取到任何问题")
+        print(f"任务 {task['id']}（{task['source']}）完成，{len(questions)} 个问题")
+        return self._result(task, questions)
+
+    @staticmethod
+    def _result(task: Dict[str, Any], questions=(), error: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "task_id": task["id"],
+            "questions": [
+                {
+                    "id": q.id,
+                    "title": q.title,
+                    "url": q.url,
+                    "answer_count": q.answer_count,
+                    "follow_count": q.follow_count,
+                    "hot_score": q.hot_score,
+                }
+                for q in questions
+            ],
+            "error": error,
+        }
+
+    async def submit(self, http, results: List[Dict[str, Any]], attempts: int = 3) -> List[Dict[str, Any]]:
+        """把一轮的结果一次性提交给协调节点
+
+        网络错误时重试；仍然失败就放弃，任务在租约到期后会由其他节点重做。
+        """
+        import aiohttp
+
+        for attempt in range(1, attempts + 1):
+            try:
+                async with http.post(f"{self.coordinator_url}/api/tasks/results", json={
+                    "worker": self.name,
+                    "results": results,
+                }) as response:
+                    response.raise_for_status()
+                    return (await response.json())["results"]
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"提交结果失败（第 {attempt} 次）: {e}")
+                if attempt < attempts:
+                    await asyncio.sleep(2 ** attempt)
+        return []
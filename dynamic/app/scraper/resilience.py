@@ -0,0 +1,169 @@
+"""
+爬虫容错：有限次数的重试和按来源的熔断器
+"""
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from typing import Dict
+
+from app.metrics.registry import SOURCE_RESULTS, CIRCUIT_STATE, SOURCE_FAILURE_RATIO
+
+# 错误信息中出现这些片段时视为临时错误（超时、网络中断、页面崩溃），值得重试
+TRANSIENT_MARKERS = ("Timeout", "timeout", "net::ERR_", "Target closed", "Navigation failed", "crashed")
+
+
+class TransientError(Exception):
+    """可以重试的临时错误"""
+
+
+def is_transient(error: BaseException) -> bool:
+    """判断一个异常是否值得重试"""
+    if isinstance(error, (TransientError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    return any(marker in f"{type(error).__name__}: {error}" for marker in TRANSIENT_MARKERS)
+
+
+class RetryPolicy:
+    """有限次数的重试，临时错误之间按指数退避（带随机抖动）等待
+
+    非临时错误（例如页面结构变化导致的脚本错误）不重试，直接抛出。
+    """
+
+    def __init__(self, attempts: int = 3, base_delay: float = 2.0, max_delay: float = 15.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """第 attempt 次失败后的等待秒数"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def run(self, func, *args, source: str = "", **kwargs):
+        """调用协程函数 func，临时错误时重试，最多 attempts 次"""
+        for attempt in range(1, self.attempts + 1):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.attempts or not is_transient(e):
+                    raise
+                delay = self.delay(attempt)
+                SOURCE_RESULTS.inc(source=source, outcome="retried")
+                print(f"{source or func.__name__} 第 {attempt} 次尝试失败（{e}），{delay:.1f} 秒后重试")
+                await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """一个来源（页面）的熔断器
+
+    连续失败 failure_threshold 次，或最近 window 次结果中失败比例达到
+    failure_rate 时断开：在冷却期内直接跳过该来源，不再占用浏览器时间。
+    冷却结束后进入半开状态放行一次，成功则恢复，失败则再次断开，
+    冷却时间按断开次数指数增长，直到 max_cooldown。
+
+    同一来源在进程内共用一个实例（for_source），状态在多次定时运行之间保留。
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    _instances: Dict[str, 'CircuitBreaker'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self,
+                 name: str,
+                 failure_threshold: int = 3,
+                 window: int = 10,
+                 failure_rate: float = 0.5,
+                 cooldown: float = 600.0,
+                 max_cooldown: float = 6 * 3600.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.state = self.CLOSED
+        self.open_until = 0.0
+        self.last_error = None
+        self.lock = threading.Lock()
+        self._publish()
+
+    @classmethod
+    def for_source(cls, name: str) -> 'CircuitBreaker':
+        """返回来源对应的共享熔断器"""
+        with cls._instances_lock:
+            breaker = cls._instances.get(name)
+            if breaker is None:
+                breaker = cls._instances[name] = cls(name)
+            return breaker
+
+    def allow(self) -> bool:
+        """是否可以请求该来源；冷却结束时转为半开并放行"""
+        with self.lock:
+            if self.state == self.OPEN:
+                if time.monotonic() < self.open_until:
+                    SOURCE_RESULTS.inc(source=self.name, outcome="skipped")
+                    return False
+                self.state = self.HALF_OPEN
+                self._publish()
+            return True
+
+    def remaining(self) -> float:
+        """断开状态下距离冷却结束的秒数"""
+        return max(0.0, self.open_until - time.monotonic()) if self.state == self.OPEN else 0.0
+
+    def current_failure_rate(self) -> float:
+        """最近 window 次结果中的失败比例"""
+        return sum(1 for ok in self.outcomes if not ok) / len(self.outcomes) if self.outcomes else 0.0
+
+    def record_success(self):
+        """记录一次成功；半开状态下恢复为闭合"""
+        with self.lock:
+            self.outcomes.append(True)
+            self.consecutive_failures = 0
+            self.trips = 0
+            self.state = self.CLOSED
+            self._publish()
+        SOURCE_RESULTS.inc(source=self.name, outcome="ok")
+
+    def record_failure(self, error=None):
+        """记录一次失败（已经用完重试），必要时断开"""
+        with self.lock:
+            self.outcomes.append(False)
+            self.consecutive_failures += 1
+            self.last_error = str(error) if error is not None else None
+            if (self.state == self.HALF_OPEN
+                    or self.consecutive_failures >= self.failure_threshold
+                    or (len(self.outcomes) == self.outcomes.maxlen
+                        and self.current_failure_rate() >= self.failure_rate)):
+                self._trip()
+            self._publish()
+        SOURCE_RESULTS.inc(source=self.name, outcome="failed")
+
+    def _trip(self):
+        self.trips += 1
+        cooldown = min(self.max_cooldown, self.cooldown * 2 ** (self.trips - 1))
+        self.state = self.OPEN
+        self.open_until = time.monotonic() + cooldown
+        print(f"来源 {self.name} 连续失败，熔断 {cooldown:.0f} 秒（最近错误: {self.last_error}）")
+
+    def _publish(self):
+        CIRCUIT_STATE.set(self.STATE_VALUES[self.state], source=self.name)
+        SOURCE_FAILURE_RATIO.set(round(self.current_failure_rate(), 4), source=self.name)
+
+    def describe(self) -> Dict[str, object]:
+        """状态摘要（用于日志和调试）"""
+        return {
+            "state": self.state,
+            "failure_rate": round(self.current_failure_rate(), 4),
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in": round(self.remaining()),
+            "last_error": self.last_error,
+        }
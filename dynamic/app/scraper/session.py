@@ -0,0 +1,208 @@
+"""
+知乎登录会话管理：持久化 Playwright storage_state 并在爬取前探测登录状态
+"""
+import os
+import json
+import time
+import asyncio
+import tempfile
+import threading
+import traceback
+from typing import Dict, Any, Optional
+
+from app.metrics.registry import SESSION_PROBES
+
+# 已登录时返回当前用户信息，未登录时返回 401，只需一次轻量的 HTTP 请求
+PROBE_URL = "https://www.zhihu.com/api/v4/me"
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+
+
+def cookies_to_state(cookies_data: Dict[str, str], domain: str = ".zhihu.com") -> Dict[str, Any]:
+    """把 cookies.json 中的 {name: value} 转换为 Playwright 的 storage_state 结构"""
+    return {
+        "cookies": [
+            {
+                "name": name,
+                "value": value,
+                "domain": domain,
+                "path": "/",
+                "expires": -1,
+                "httpOnly": False,
+                "secure": False,
+                "sameSite": "Lax",
+            }
+            for name, value in cookies_data.items()
+        ],
+        "origins": [],
+    }
+
+
+class SessionManager:
+    """一个知乎账号的登录会话
+
+    会话以 Playwright storage_state（cookies + localStorage）的形式保存在 state_file 中，
+    每个浏览器上下文创建时直接传入，不必再逐个 add_cookies；爬取结束后把浏览器中
+    刷新过的 cookies 和 localStorage 写回文件，供下一次运行复用。
+
+    cookies_file 比 state_file 新时（例如在设置页重新粘贴了 cookies），
+    以 cookies_file 为准重新生成 storage_state。
+
+    probe() 用一次 HTTP 请求检查登录是否有效，结果缓存 probe_ttl 秒，
+    这样会话失效时可以在启动浏览器之前就结束本次运行。
+    """
+
+    # 同一个 cookies 文件共用一个实例，探测结果在多次运行之间保留
+    _instances: Dict[str, 'SessionManager'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, cookies_file: str, state_file: Optional[str] = None,
+                 probe_ttl: float = 300, probe_url: str = PROBE_URL, domain: str = ".zhihu.com"):
+        """初始化会话管理器（probe_url 和 domain 可指向本地测试站点）"""
+        self.cookies_file = cookies_file
+        self.domain = domain
+        self.state_file = state_file or os.path.splitext(cookies_file)[0] + ".state.json"
+        self.probe_ttl = probe_ttl
+        self.probe_url = probe_url
+        self._state = None
+        self._state_key = None
+        self._probe_result = None
+        self._probe_key = None
+        self._probe_time = 0.0
+
+    @classmethod
+    def for_cookies_file(cls, cookies_file: str) -> 'SessionManager':
+        """返回 cookies 文件对应的共享会话"""
+        key = os.path.abspath(cookies_file)
+        with cls._instances_lock:
+            session = cls._instances.get(key)
+            if session is None:
+                session = cls._instances[key] = cls(cookies_file)
+            return session
+
+    @staticmethod
+    def _mtime(path: str) -> float:
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0.0
+
+    def _source_key(self):
+        """cookies 文件和 state 文件的修改时间，任一变化都会使缓存失效"""
+        return self._mtime(self.cookies_file), self._mtime(self.state_file)
+
+    def storage_state(self) -> Optional[Dict[str, Any]]:
+        """返回当前的 storage_state；两个文件都不存在时返回 None"""
+        key = self._source_key()
+        if self._state is not None and key == self._state_key:
+            return self._state
+
+        cookies_mtime, state_mtime = key
+        state = None
+        if state_mtime and state_mtime >= cookies_mtime:
+            try:
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except Exception as e:
+                print(f"读取会话状态 {self.state_file} 时出错: {e}")
+        if state is None and cookies_mtime:
+            try:
+                with open(self.cookies_file, "r", encoding="utf-8") as f:
+                    state = cookies_to_state(json.load(f), self.domain)
+                self._write_state(state)
+                print(f"已从 {self.cookies_file} 生成会话状态，共 {len(state['cookies'])} 个 cookies")
+            except Exception as e:
+                print(f"从 cookies 生成会话状态时出错: {e}")
+                traceback.print_exc()
+
+        self._state = state
+        self._state_key = self._source_key()
+        return state
+
+    def _write_state(self, state: Dict[str, Any]):
+        """原子地写入 state 文件，避免并发读到写了一半的 JSON"""
+        directory = os.path.dirname(os.path.abspath(self.state_file))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=".state-", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(temp_path, self.state_file)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+
+    async def new_context(self, browser, **kwargs):
+        """用保存的会话创建浏览器上下文"""
+        return await browser.new_context(storage_state=self.storage_state(), **kwargs)
+
+    async def save(self, context):
+        """把上下文中刷新后的 cookies 和 localStorage 写回 state 文件"""
+        try:
+            state = await context.storage_state()
+            if state.get("cookies"):
+                self._write_state(state)
+                self._state = state
+                self._state_key = self._source_key()
+        except Exception as e:
+            print(f"保存会话状态时出错: {e}")
+
+    def invalidate_probe(self):
+        """丢弃缓存的探测结果，下次 probe() 重新请求"""
+        self._probe_result = None
+
+    def cookie_header(self) -> str:
+        """当前会话中目标域名下的 cookies，拼成 Cookie 请求头"""
+        state = self.storage_state() or {}
+        domain = self.domain.lstrip(".")
+        return "; ".join(
+            f"{c['name']}={c['value']}"
+            for c in state.get("cookies", [])
+            if c.get("domain", "").lstrip(".").endswith(domain)
+        )
+
+    async def probe(self, timeout: float = 10) -> Optional[bool]:
+        """检查会话是否处于登录状态
+
+        返回 True（已登录）、False（未登录或没有 cookies）或 None（网络错误等无法判断）。
+        结果按会话文件的修改时间和 probe_ttl 缓存。
+        """
+        # 先取 cookies：必要时会重新生成 state 文件，从而改变缓存键
+        cookie_header = self.cookie_header()
+        key = self._source_key()
+        if (self._probe_key == key and self._probe_result is not None
+                and time.monotonic() - self._probe_time < self.probe_ttl):
+            return self._probe_result
+
+        if not cookie_header:
+            result = False
+        else:
+            result = await self._request_probe(cookie_header, timeout)
+        SESSION_PROBES.inc(result={True: "valid", False: "invalid"}.get(result, "unknown"))
+
+        if result is not None:
+            self._probe_key = key
+            self._probe_result = result
+            self._probe_time = time.monotonic()
+        return result
+
+    async def _request_probe(self, cookie_header: str, timeout: float) -> Optional[bool]:
+        """请求 probe_url，根据状态码判断登录状态"""
+        import aiohttp
+
+        headers = {
+            "Cookie": cookie_header,
+            "User-Agent": DEFAULT_USER_AGENT,
+            "Accept": "application/json",
+        }
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+                async with session.get(self.probe_url, headers=headers, allow_redirects=False) as response:
+                    if response.status == 200:
+                        return True
+                    if response.status in (401, 403):
+                        return False
+                    print(f"登录探测返回意外状态码: {response.status}")
+                    return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"登录探测失败: {e}")
+            return None
@@ -1,415 +1,500 @@
-"""
-知乎热点问题爬虫（使用 Playwright）
-"""
-import re
-import os
-import json
-import traceback
-import asyncio
-from typing import List, Dict, Any, Optional
-import time
-import random
-
-from playwright.async_api import async_playwright, Page, TimeoutError
-
-from app.database.models import Question
-from app.config.settings import settings
-
-
-class ZhihuScraper:
-    """知乎热点问题爬虫"""
-    
-    def __init__(self, headless: bool = True):
-        """初始化爬虫"""
-        self.headless = headless
-        self.browser = None
-        self.page = None
-        self.urls = [
-            "https://www.zhihu.com/question/waiting",  # 等你来答
-            "https://www.zhihu.com/hot",              # 热榜
-            "https://www.zhihu.com",                  # 首页
-            "https://www.zhihu.com/explore"           # 发现页
-        ]
-    
-    async def initialize(self):
-        """初始化浏览器"""
-        try:
-            print("正在初始化浏览器...")
-            playwright = await async_playwright().start()
-            self.browser = await playwright.chromium.launch(
-                headless=self.headless,
-                args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-blink-features=AutomationControlled']
-            )
-            
-            # 创建一个新的浏览器上下文
-            context = await self.browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
-                viewport={"width": 1280, "height": 800}
-            )
-            
-            # 修改webdriver检测
-            await context.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => false,
-            });
-            """)
-            
-            # 加载 cookies
-            print(f"尝试从 {settings.cookies_file} 加载cookies")
-            if os.path.exists(settings.cookies_file):
-                try:
-                    with open(settings.cookies_file, 'r', encoding='utf-8') as f:
-                        cookies_data = json.load(f)
-                    
-                    if settings.debug:
-                        print(f"cookies文件内容: {cookies_data}")
-                    
-                    # 格式化cookies，确保格式正确
-                    cookies = []
-                    for name, value in cookies_data.items():
-                        cookies.append({
-                            "name": name,
-                            "value": value,
-                            "domain": ".zhihu.com",
-                            "path": "/"
-                        })
-                    
-                    # 添加 cookies 到浏览器上下文
-                    if cookies:
-                        await context.add_cookies(cookies)
-                        print(f"已加载 {len(cookies)} 个 cookies")
-                    else:
-                        print("警告: 没有有效的cookies可加载")
-                except Exception as e:
-                    print(f"加载 cookies 时出错: {e}")
-                    traceback.print_exc()
-            else:
-                print(f"Cookie文件 {settings.cookies_file} 不存在")
-            
-            # 创建新页面
-            self.page = await context.new_page()
-            
-            # 设置超时（增加超时时间）
-            self.page.set_default_timeout(60000)  # 60秒
-            print("浏览器初始化完成")
-            
-            return True
-        except Exception as e:
-            print(f"初始化浏览器时出错: {e}")
-            traceback.print_exc()
-            return False
-    
-    async def close(self):
-        """关闭浏览器"""
-        try:
-            if self.browser:
-                await self.browser.close()
-                self.browser = None
-                print("已关闭浏览器")
-        except Exception as e:
-            print(f"关闭浏览器时出错: {e}")
-    
-    async def scrape(self, limit: int = 20) -> List[Question]:
-        """爬取知乎问题"""
-        questions = []
-        
-        if not self.browser:
-            success = await self.initialize()
-            if not success:
-                print("浏览器初始化失败，无法继续爬取")
-                return []
-        
-        # 确保debug目录存在
-        debug_dir = os.path.join(os.getcwd(), "debug")
-        os.makedirs(debug_dir, exist_ok=True)
-        
-        try:
-            # 尝试所有URL，直到找到问题
-            for url in self.urls:
-                print(f"尝试从 {url} 爬取问题...")
-                page_questions = await self.extract_questions_from_url(url)
-                
-                if page_questions:
-                    questions.extend(page_questions)
-                    print(f"成功从 {url} 爬取到 {len(page_questions)} 个问题")
-                    
-                    # 如果已经获取足够的问题，就停止
-                    if len(questions) >= limit:
-                        break
-            
-            # 如果收集到的问题超过限制，截取到限制大小
-            if len(questions) > limit:
-                questions = questions[:limit]
-            
-            print(f"最终收集到 {len(questions)} 个问题")
-            
-            # 生成报告文件
-            self.create_debug_report(questions, debug_dir)
-            
-        except Exception as e:
-            print(f"爬取过程中发生错误: {e}")
-            traceback.print_exc()
-        
-        return questions
-    
-    def create_debug_report(self, questions, debug_dir=None):
-        """创建爬取结果报告"""
-        try:
-            # 如果没有提供debug_dir，使用默认路径
-            if not debug_dir:
-                debug_dir = os.path.join(os.getcwd(), "debug")
-                os.makedirs(debug_dir, exist_ok=True)
-                
-            report_path = os.path.join(debug_dir, "scrape_report.txt")
-            print(f"正在创建爬取报告: {report_path}")
-            
-            with open(report_path, "w", encoding="utf-8") as f:
-                f.write(f"爬取时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"采集到问题数量: {len(questions)}\n\n")
-                
-                if questions:
-                    f.write("问题列表:\n")
-                    for i, q in enumerate(questions, 1):
-                        f.write(f"{i}. ID: {q.id}\n")
-                        f.write(f"   标题: {q.title}\n")
-                        f.write(f"   链接: {q.url}\n")
-                        f.write(f"   回答数: {q.answer_count}\n")
-                        f.write(f"   关注数: {q.follow_count}\n\n")
-                else:
-                    f.write("未采集到任何问题\n")
-                    
-            print(f"爬取报告已保存到: {report_path}")
-        except Exception as e:
-            print(f"创建报告时出错: {e}")
-            traceback.print_exc()
-    
-    async def extract_questions_from_url(self, url: str) -> List[Question]:
-        """从指定URL提取问题"""
-        questions = []
-        
-        try:
-            print(f"导航到 {url}...")
-            await self.page.goto(url, wait_until="networkidle", timeout=60000)
-            
-            # 保存页面截图和源码用于调试
-            if settings.debug:
-                page_name = url.split('/')[-1] or 'home'
-                await self.page.screenshot(path=os.path.join("debug", f"{page_name}.png"))
-                
-                # 保存HTML源码
-                page_content = await self.page.content()
-                with open(os.path.join("debug", f"{page_name}.html"), "w", encoding="utf-8") as f:
-                    f.write(page_content)
-            
-            # 检查是否需要登录
-            login_elements = await self.page.query_selector_all('.SignContainer-content, .Login-content, button:text("登录")')
-            if login_elements:
-                print(f"⚠️ 页面需要登录，cookies可能无效")
-            
-            # 滚动页面以加载更多内容
-            await self.scroll_page()
-            
-            # 提取问题数据
-            print(f"从 {url} 提取问题...")
-            
-            # 热榜页面的提取
-            if 'hot' in url:
-                questions.extend(await self.extract_hot_questions())
-            
-            # 默认提取方法 - 匹配所有包含/question/的链接
-            if not questions:
-                questions.extend(await self.extract_question_links())
-            
-            return questions
-            
-        except Exception as e:
-            print(f"从 {url} 提取问题时出错: {e}")
-            traceback.print_exc()
-            # 出错时保存截图
-            if settings.debug:
-                try:
-                    page_name = url.split('/')[-1] or 'home'
-                    await self.page.screenshot(path=os.path.join("debug", f"error_{page_name}.png"))
-                except Exception as screenshot_error:
-                    print(f"保存错误截图时出错: {screenshot_error}")
-                
-            return []
-    
-    async def scroll_page(self, scroll_count=5):
-        """滚动页面加载更多内容"""
-        try:
-            print("滚动页面加载更多内容...")
-            for i in range(scroll_count):
-                await self.page.evaluate("window.scrollBy(0, 800)")
-                # 添加随机等待模拟真实用户
-                await asyncio.sleep(random.uniform(1, 2))
-        except Exception as e:
-            print(f"滚动页面时出错: {e}")
-    
-    async def extract_hot_questions(self) -> List[Question]:
-        """提取热榜问题"""
-        try:
-            question_data = await self.page.evaluate("""
-            () => {
-                const questions = [];
-                const processed = new Set(); // 避免重复
-                
-                // 查找热榜项
-                const hotItems = document.querySelectorAll('.HotItem');
-                console.log(`找到 ${hotItems.length} 个热榜项`);
-                
-                if (hotItems.length > 0) {
-                    hotItems.forEach(item => {
-                        try {
-                            // 提取标题和链接
-                            const titleElement = item.querySelector('.HotItem-title');
-                            if (!titleElement) return;
-                            
-                            const link = titleElement.querySelector('a');
-                            if (!link) return;
-                            
-                            const href = link.getAttribute('href');
-                            const title = link.textContent.trim();
-                            
-                            if (!href || !href.includes('/question/') || !title) return;
-                            
-                            // 提取问题ID
-                            const idMatch = href.match(/\\/question\\/(\\d+)/);
-                            if (!idMatch) return;
-                            
-                            const id = idMatch[1];
-                            if (processed.has(id)) return;
-                            processed.add(id);
-                            
-                            // 构建完整URL
-                            const fullUrl = href.startsWith('http') ? href : "https://www.zhihu.com" + href;
-                            
-                            // 提取热度值
-                            let heat = 0;
-                            const heatText = item.querySelector('.HotItem-metrics');
-                            if (heatText) {
-                                const heatMatch = heatText.textContent.match(/(\\d+(?:\\.\\d+)?)[^\\d]*热度/);
-                                if (heatMatch) {
-                                    heat = parseFloat(heatMatch[1]);
-                                }
-                            }
-                            
-                            questions.push({
-                                id,
-                                title,
-                                url: fullUrl,
-                                answer_count: 0,
-                                follow_count: heat || 0
-                            });
-                        } catch (e) {
-                            console.error('提取热榜问题时出错:', e);
-                        }
-                    });
-                }
-                
-                return questions;
-            }
-            """)
-            
-            # 转换为Question对象
-            questions = []
-            for data in question_data:
-                question = Question(
-                    id=data["id"],
-                    title=data["title"],
-                    url=data["url"],
-                    answer_count=data.get("answer_count", 0),
-                    follow_count=data.get("follow_count", 0)
-                )
-                questions.append(question)
-            
-            print(f"提取到 {len(questions)} 个热榜问题")
-            return questions
-            
-        except Exception as e:
-            print(f"提取热榜问题时出错: {e}")
-            traceback.print_exc()
-            return []
-    
-    async def extract_question_links(self) -> List[Question]:
-        """提取所有问题链接"""
-        try:
-            question_data = await self.page.evaluate("""
-            () => {
-                const questions = [];
-                const processed = new Set(); // 避免重复
-                
-                // 查找所有可能的问题链接
-                const links = document.querySelectorAll('a[href*="/question/"]');
-                console.log(`找到 ${links.length} 个可能的问题链接`);
-                
-                links.forEach(link => {
-                    try {
-                        const href = link.getAttribute('href');
-                        if (!href || !href.includes('/question/')) return;
-                        
-                        // 提取问题ID
-                        const idMatch = href.match(/\\/question\\/(\\d+)/);
-                        if (!idMatch) return;
-                        
-                        const id = idMatch[1];
-                        if (processed.has(id)) return;
-                        
-                        let title = link.textContent.trim();
-                        
-                        // 忽略过短或空标题，或者明显不是问题标题的链接
-                        if (!title || title.length < 5 || 
-                            title.includes('查看全部') || 
-                            title.includes('更多') || 
-                            title.includes('登录') ||
-                            title.includes('...')) return;
-                        
-                        processed.add(id);
-                        
-                        // 构建完整URL
-                        const fullUrl = href.startsWith('http') ? href : "https://www.zhihu.com" + href;
-                        
-                        questions.push({
-                            id,
-                            title,
-                            url: fullUrl,
-                            answer_count: 0,
-                            follow_count: 0
-                        });
-                    } catch (e) {
-                        console.error('提取问题链接时出错:', e);
-                    }
-                });
-                
-                return questions;
-            }
-            """)
-            
-            # 转换为Question对象
-            questions = []
-            for data in question_data:
-                question = Question(
-                    id=data["id"],
-                    title=data["title"],
-                    url=data["url"],
-                    answer_count=data.get("answer_count", 0),
-                    follow_count=data.get("follow_count", 0)
-                )
-                questions.append(question)
-            
-            print(f"提取到 {len(questions)} 个问题链接")
-            return questions
-            
-        except Exception as e:
-            print(f"提取问题链接时出错: {e}")
-            traceback.print_exc()
-            return []
-
-
-async def scrape_questions(limit: int = 20, headless: bool = True) -> List[Question]:
-    """爬取问题的便捷函数"""
-    scraper = ZhihuScraper(headless=headless)
-    try:
-        return await scraper.scrape(limit=limit)
-    finally:
-        await scraper.close() 
\ No newline at end of file
+"""
+知乎热点问题爬虫（使用 Playwright）
+"""
+import re
+import os
+import traceback
+import asyncio
+from typing import List, Dict, Any, Optional, AsyncIterator, Awaitable, Callable, Tuple
+import time
+import random
+
+from playwright.async_api import async_playwright, Page, TimeoutError
+
+from app.database.models import Question
+from app.config.settings import settings
+from app.metrics.registry import span, QUESTIONS_FOUND
+from app.metrics.profiler import RunProfiler
+from app.scraper.context_pool import ContextPool, PoolExhausted, throttle_signal
+from app.scraper.resilience import RetryPolicy, CircuitBreaker
+from app.scraper.collector import QuestionCollector
+from app.scraper.asset_cache import AssetCache
+
+# 隐藏 navigator.webdriver，每个上下文创建时注入
+WEBDRIVER_INIT_SCRIPT = """
+Object.defineProperty(navigator, 'webdriver', {
+    get: () => false,
+});
+"""
+
+
+def source_urls(base_url: str = "https://www.zhihu.com") -> List[str]:
+    """要抓取的来源页面"""
+    return [
+        f"{base_url}/question/waiting",  # 等你来答
+        f"{base_url}/hot",              # 热榜
+        base_url,                       # 首页
+        f"{base_url}/explore"           # 发现页
+    ]
+
+
+class ZhihuScraper:
+    """知乎热点问题爬虫"""
+    
+    def __init__(self,
+                 headless: bool = True,
+                 pool: Optional[ContextPool] = None,
+                 base_url: Optional[str] = None,
+                 max_attempts: int = 3,
+                 retry: Optional[RetryPolicy] = None,
+                 navigation_timeout: float = 30,
+                 asset_cache: Optional[AssetCache] = None):
+        """初始化爬虫
+
+        pool 默认按 config.json 的 accounts 创建；base_url 可指向本地测试站点，默认为 zhihu_base_url。
+        max_attempts 是被限流时换上下文重试的次数，retry 是超时等临时错误的重试策略。
+        asset_cache 默认按 asset_cache_dir / asset_cache_mb 创建（关闭时为 None）。
+        """
+        self.headless = headless
+        self.pool = pool or ContextPool.from_settings()
+        self.max_attempts = max_attempts
+        self.retry = retry or RetryPolicy()
+        self.navigation_timeout = navigation_timeout
+        self.asset_cache = asset_cache if asset_cache is not None else AssetCache.from_settings()
+        self._asset_stats = None
+        self.playwright = None
+        self.browser = None
+        self.page = None
+        self.urls = source_urls(base_url or settings.zhihu_base_url)
+    
+    async def initialize(self):
+        """初始化浏览器"""
+        try:
+            print("正在初始化浏览器...")
+            with span("browser_launch"):
+                self.playwright = await async_playwright().start()
+                self.browser = await self.playwright.chromium.launch(
+                    headless=self.headless,
+                    args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-blink-features=AutomationControlled']
+                )
+                
+                # 每个账号一个上下文，各自使用保存的会话（cookies + localStorage）
+                # 剖析中的运行为每个上下文记录 Playwright trace
+                profiler = RunProfiler.active()
+                self.pool.trace_dir = profiler.directory if profiler else None
+                # 静态资源走持久缓存，不必每次运行都重新下载
+                if self.asset_cache is not None:
+                    self._asset_stats = dict(self.asset_cache.stats)
+                await self.pool.open(self.browser, init_script=WEBDRIVER_INIT_SCRIPT,
+                                     asset_cache=self.asset_cache)
+            
+            print("浏览器初始化完成")
+            
+            return True
+        except Exception as e:
+            print(f"初始化浏览器时出错: {e}")
+            traceback.print_exc()
+            return False
+    
+    async def close(self):
+        """关闭浏览器"""
+        try:
+            # 把浏览器中刷新过的 cookies 写回各账号的会话文件，下次运行直接复用
+            await self.pool.close()
+            if self.browser:
+                await self.browser.close()
+                self.browser = None
+                print("已关闭浏览器")
+            if self.playwright:
+                await self.playwright.stop()
+                self.playwright = None
+            if self._asset_stats is not None:
+                stats = self.asset_cache.summary(since=self._asset_stats)
+                self._asset_stats = None
+                print(f"静态资源缓存: 命中 {stats['hits']}，未命中 {stats['misses']}，"
+                      f"节省 {stats['bytes_saved'] / 1e6:.1f} MB，缓存 {stats['size_bytes'] / 1e6:.1f} MB")
+        except Exception as e:
+            print(f"关闭浏览器时出错: {e}")
+    
+    async def scrape(self, limit: int = 20) -> List[Question]:
+        """爬取知乎问题，返回所有来源的问题（最多 limit 个）"""
+        questions = []
+        async for _, batch in self.stream(limit):
+            questions.extend(batch)
+        return questions
+    
+    async def stream(self, limit: int = 20) -> AsyncIterator[Tuple[str, List[Question]]]:
+        """逐个来源产出 (来源名称, 问题列表)
+
+        各页面并发抓取，每个页面从上下文池借用一个账号的上下文，哪个页面先完成就先产出，
+        调用方可以边爬边写库。累计达到 limit 个问题时截断最后一批，
+        并取消仍在抓取的页面。
+        """
+        urls = await self.prepare()
+        if not urls:
+            return
+        
+        # 确保debug目录存在
+        debug_dir = os.path.join(os.getcwd(), "debug")
+        os.makedirs(debug_dir, exist_ok=True)
+        
+        async def scrape_source(url):
+            return url, await self.scrape_url(url, limit, found)
+        
+        found = [0]
+        questions = []
+        tasks = [asyncio.ensure_future(scrape_source(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                url, page_questions = await next_done
+                if not page_questions:
+                    continue
+                batch = page_questions[:limit - len(questions)]
+                questions.extend(batch)
+                print(f"成功从 {url} 爬取到 {len(page_questions)} 个问题")
+                yield self.source_name(url), batch
+                if len(questions) >= limit:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            print(f"最终收集到 {len(questions)} 个问题")
+            # 生成报告文件
+            self.create_debug_report(questions, debug_dir)
+    
+    async def prepare(self, urls: Optional[List[str]] = None) -> List[str]:
+        """过滤掉熔断中的来源并启动浏览器，返回本次要抓取的 URL（默认 self.urls）"""
+        # 熔断中的来源本次直接跳过；全部熔断时不必启动浏览器
+        candidates, urls = urls or self.urls, []
+        for url in candidates:
+            breaker = CircuitBreaker.for_source(self.source_name(url))
+            if breaker.allow():
+                urls.append(url)
+            else:
+                print(f"跳过 {url}：来源已熔断，{breaker.remaining():.0f} 秒后重试")
+        if not urls:
+            print("所有来源都处于熔断状态，跳过本次爬取")
+            return []
+        
+        if not self.browser:
+            # 先用一次 HTTP 请求确认各账号登录有效，全部失效时不必启动浏览器
+            with span("session_probe"):
+                alive = await self.pool.probe()
+            if not alive:
+                print("⚠️ 登录会话已失效，跳过本次爬取。请在设置页更新 cookies。")
+                return []
+            
+            success = await self.initialize()
+            if not success:
+                print("浏览器初始化失败，无法继续爬取")
+                return []
+        return urls
+    
+    async def scrape_url(self, url: str, limit: int, found: List[int]) -> List[Question]:
+        """抓取一个页面：临时错误按 self.retry 重试，结果计入该来源的熔断器
+
+        found 是各页面共享的已采集数量；只有一个上下文时页面按顺序抓取，
+        前面的页面已经凑够 limit 个问题后，后面的页面不再打开。
+        """
+        source = self.source_name(url)
+        breaker = CircuitBreaker.for_source(source)
+        try:
+            page_questions = await self.retry.run(self._scrape_url_once, url, limit, found, source=source)
+        except PoolExhausted as e:
+            # 账号不可用不是页面的问题，不计入熔断器
+            print(f"无法抓取 {url}: {e}")
+            return []
+        except Exception as e:
+            print(f"从 {url} 提取问题失败，已放弃: {e}")
+            breaker.record_failure(e)
+            return []
+        
+        if page_questions is None:
+            return []
+        if page_questions:
+            breaker.record_success()
+        else:
+            # 页面打开了却一个问题也没有，多半是页面结构变了或被登录页拦截
+            breaker.record_failure("未提取到任何问题")
+        found[0] += len(page_questions)
+        return page_questions
+    
+    async def _scrape_url_once(self, url: str, limit: int, found: List[int]) -> Optional[List[Question]]:
+        """借用池中的上下文抓取一次页面，被限流时换一个上下文重试
+
+        已经凑够 limit 个问题或连续被限流时返回 None。
+        """
+        for attempt in range(self.max_attempts):
+            if found[0] >= limit:
+                return None
+            async with self.pool.lease() as pooled:
+                if found[0] >= limit:
+                    return None
+                print(f"尝试从 {url} 爬取问题（账号 {pooled.name}）...")
+                page = await pooled.context.new_page()
+                page.set_default_timeout(self.navigation_timeout * 1000)
+                try:
+                    page_questions = await self.extract_questions_from_url(url, page, pooled)
+                finally:
+                    await page.close()
+            if page_questions is not None:
+                return page_questions
+        print(f"{url} 连续 {self.max_attempts} 次被限流，放弃")
+        return None
+    
+    def create_debug_report(self, questions, debug_dir=None):
+        """创建爬取结果报告"""
+        try:
+            # 如果没有提供debug_dir，使用默认路径
+            if not debug_dir:
+                debug_dir = os.path.join(os.getcwd(), "debug")
+                os.makedirs(debug_dir, exist_ok=True)
+                
+            report_path = os.path.join(debug_dir, "scrape_report.txt")
+            print(f"正在创建爬取报告: {report_path}")
+            
+            with open(report_path, "w", encoding="utf-8") as f:
+                f.write(f"爬取时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"采集到问题数量: {len(questions)}\n\n")
+                
+                if questions:
+                    f.write("问题列表:\n")
+                    for i, q in enumerate(questions, 1):
+                        f.write(f"{i}. ID: {q.id}\n")
+                        f.write(f"   标题: {q.title}\n")
+                        f.write(f"   链接: {q.url}\n")
+                        f.write(f"   回答数: {q.answer_count}\n")
+                        f.write(f"   关注数: {q.follow_count}\n\n")
+                else:
+                    f.write("未采集到任何问题\n")
+                    
+            print(f"爬取报告已保存到: {report_path}")
+        except Exception as e:
+            print(f"创建报告时出错: {e}")
+            traceback.print_exc()
+    
+    @staticmethod
+    def source_name(url: str) -> str:
+        """URL 对应的来源名称（用于调试文件名和监控指标标签）"""
+        return url.rstrip('/').split('/')[-1] or 'home'
+    
+    async def extract_questions_from_url(self, url: str, page: Optional[Page] = None, pooled=None) -> Optional[List[Question]]:
+        """从指定URL提取问题
+
+        page 默认为 self.page；pooled 是借出 page 所属上下文的池条目，
+        用于上报限流和登录失效。被限流时返回 None，由调用方换上下文重试；
+        导航超时、脚本出错等异常保存截图后抛出，由调用方决定是否重试。
+        """
+        page = page or self.page
+        questions = []
+        source = self.source_name(url)
+        
+        # 热榜按热榜项收集（带热度），其他页面收集所有问题链接
+        collector = QuestionCollector(mode="hot" if 'hot' in url else "links")
+        
+        try:
+            await collector.attach(page)
+            print(f"导航到 {url}...")
+            with span("navigation", source):
+                response = await page.goto(url, wait_until="domcontentloaded",
+                                           timeout=self.navigation_timeout * 1000)
+                # 知乎页面常有长连接，networkidle 未必能等到；只作尽力等待
+                try:
+                    await page.wait_for_load_state("networkidle", timeout=10000)
+                except TimeoutError:
+                    pass
+            
+            retry_after = throttle_signal(response)
+            if retry_after is not None and pooled is not None:
+                self.pool.report_throttled(pooled, retry_after)
+                return None
+            
+            # 在滚动前注入收集器，滚动中新插入的问题随时推送回来
+            await collector.start(page)
+            
+            # 保存页面截图和源码用于调试
+            if settings.debug:
+                page_name = url.split('/')[-1] or 'home'
+                await page.screenshot(path=os.path.join("debug", f"{page_name}.png"))
+                
+                # 保存HTML源码
+                page_content = await page.content()
+                with open(os.path.join("debug", f"{page_name}.html"), "w", encoding="utf-8") as f:
+                    f.write(page_content)
+            
+            # 检查是否需要登录：页面上的登录入口只是线索，由 HTTP 探测确认
+            login_elements = await page.query_selector_all('.SignContainer-content, .Login-content, button:text("登录")')
+            if login_elements and pooled is not None and await self.pool.check_logged_out(pooled):
+                print(f"⚠️ 账号 {pooled.name} 的登录会话已失效，不再参与本次爬取")
+            elif login_elements and pooled is None:
+                print(f"⚠️ 页面需要登录，cookies可能无效")
+            elif pooled is not None:
+                if login_elements:
+                    print(f"页面上有登录入口，但账号 {pooled.name} 的登录探测仍然有效，继续使用")
+                self.pool.report_success(pooled)
+            
+            # 滚动页面以加载更多内容
+            with span("scroll", source):
+                await self.scroll_page(page=page)
+            
+            # 提取问题数据
+            print(f"从 {url} 提取问题...")
+            
+            with span("extract", source):
+                questions.extend(await collector.finish(page))
+                print(f"收集到 {len(questions)} 个问题（{collector.batches} 批）")
+                
+                # 热榜结构变化时退回整页提取所有包含/question/的链接
+                if not questions:
+                    questions.extend(await self.extract_question_links(page))
+            
+            QUESTIONS_FOUND.inc(len(questions), source=source)
+            return questions
+            
+        except Exception as e:
+            print(f"从 {url} 提取问题时出错: {e}")
+            traceback.print_exc()
+            # 出错时保存截图
+            if settings.debug:
+                try:
+                    page_name = url.split('/')[-1] or 'home'
+                    await page.screenshot(path=os.path.join("debug", f"error_{page_name}.png"))
+                except Exception as screenshot_error:
+                    print(f"保存错误截图时出错: {screenshot_error}")
+            raise
+    
+    async def scroll_page(self, scroll_count=5, page: Optional[Page] = None):
+        """滚动页面加载更多内容"""
+        page = page or self.page
+        try:
+            print("滚动页面加载更多内容...")
+            for i in range(scroll_count):
+                await page.evaluate("window.scrollBy(0, 800)")
+                # 添加随机等待模拟真实用户
+                await asyncio.sleep(random.uniform(1, 2))
+        except Exception as e:
+            print(f"滚动页面时出错: {e}")
+    
+    async def extract_question_links(self, page: Optional[Page] = None) -> List[Question]:
+        """提取所有问题链接"""
+        page = page or self.page
+        try:
+            question_data = await page.evaluate("""
+            () => {
+                const questions = [];
+                const processed = new Set(); // 避免重复
+                
+                // 查找所有可能的问题链接
+                const links = document.querySelectorAll('a[href*="/question/"]');
+                console.log(`找到 ${links.length} 个可能的问题链接`);
+                
+                links.forEach(link => {
+                    try {
+                        const href = link.getAttribute('href');
+                        if (!href || !href.includes('/question/')) return;
+                        
+                        // 提取问题ID
+                        const idMatch = href.match(/\\/question\\/(\\d+)/);
+                        if (!idMatch) return;
+                        
+                        const id = idMatch[1];
+                        if (processed.has(id)) return;
+                        
+                        let title = link.textContent.trim();
+                        
+                        // 忽略过短或空标题，或者明显不是问题标题的链接
+                        if (!title || title.length < 5 || 
+                            title.includes('查看全部') || 
+                            title.includes('更多') || 
+                            title.includes('登录') ||
+                            title.includes('...')) return;
+                        
+                        processed.add(id);
+                        
+                        // 构建完整URL（相对链接按当前页面的地址解析）
+                        const fullUrl = new URL(href, location.href).href;
+                        
+                        questions.push({
+                            id,
+                            title,
+                            url: fullUrl,
+                            answer_count: null,
+                            follow_count: null
+                        });
+                    } catch (e) {
+                        console.error('提取问题链接时出错:', e);
+                    }
+                });
+                
+                return questions;
+            }
+            """)
+            
+            # 转换为Question对象
+            questions = []
+            for data in question_data:
+                question = Question(
+                    id=data["id"],
+                    title=data["title"],
+                    url=data["url"],
+                    # 列表页不显示回答数和关注数，留空由详情爬虫补全
+                    answer_count=data.get("answer_count"),
+                    follow_count=data.get("follow_count")
+                )
+                questions.append(question)
+            
+            print(f"提取到 {len(questions)} 个问题链接")
+            return questions
+            
+        except Exception as e:
+            print(f"提取问题链接时出错: {e}")
+            traceback.print_exc()
+            return []
+
+
+async def scrape_questions(limit: int = 20, headless: bool = True) -> List[Question]:
+    """爬取问题的便捷函数"""
+    scraper = ZhihuScraper(headless=headless)
+    try:
+        return await scraper.scrape(limit=limit)
+    finally:
+        await scraper.close()
+
+
+async def scrape_into(save: Callable[[List[Question]], Awaitable[int]],
+                      limit: int = 20,
+                      headless: bool = True,
+                      scraper: Optional[ZhihuScraper] = None) -> Tuple[int, int]:
+    """爬取问题并逐批交给 save 写库，返回 (采集数量, 保存数量)
+
+    每个来源的结果一到就放进队列，由单独的写库任务依次调用 save 提交，
+    写库和后续页面的抓取同时进行；爬取中途出错时，已经完成的批次仍会写完。
+    """
+    scraper = scraper or ZhihuScraper(headless=headless)
+    queue = asyncio.Queue()
+    saved = 0
+    
+    async def writer():
+        nonlocal saved
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            try:
+                saved += await save(batch)
+            except Exception as e:
+                print(f"保存 {len(batch)} 个问题时出错: {e}")
+                traceback.print_exc()
+    
+    writer_task = asyncio.create_task(writer())
+    found = 0
+    try:
+        async for source, batch in scraper.stream(limit):
+            found += len(batch)
+            queue.put_nowait(batch)
+    finally:
+        queue.put_nowait(None)
+        await writer_task
+        await scraper.close()
+    return found, saved 
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""
+Site adapters for the shared crawl engine
+"""
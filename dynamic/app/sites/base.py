@@ -0,0 +1,72 @@
+"""
+站点适配器接口：每个站点声明抓取方式、提取逻辑和记录字段，由爬取引擎（app/sites/engine.py）统一运行
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+# 抓取方式
+HTTP = "http"
+BROWSER = "browser"
+
+
+class SiteAdapter:
+    """站点适配器基类
+
+    子类用类属性声明站点：
+    - name：站点名，同时用作注册表的键、指标标签和 site_records 表中的站点标识
+    - fetch：HTTP（引擎用共享的 aiohttp 连接池抓取 HTML）或 BROWSER（适配器自己驱动浏览器）
+    - record_fields / key_field：记录包含的字段和唯一标识记录的字段
+    - min_interval / concurrency：HTTP 站点两次请求开始之间的最小间隔（秒）和并发上限
+
+    HTTP 站点实现 start_urls 和 parse，浏览器站点实现 stream。
+    记录默认以 JSON 存入 site_records 表；有专用表的站点（知乎）覆盖 save。
+    """
+
+    name = ""
+    description = ""
+    fetch = HTTP
+    record_fields: Tuple[str, ...] = ()
+    key_field = "id"
+    min_interval = 0.0
+    concurrency = 4
+    headers: Dict[str, str] = {}
+
+    def start_urls(self, limit: Optional[int] = None) -> List[str]:
+        """本次要抓取的页面（HTTP 站点）；limit 为本次最多需要的记录数，None 表示全部"""
+        raise NotImplementedError
+
+    def parse(self, page_html: str, url: str) -> List[Dict[str, Any]]:
+        """从一个页面的 HTML 中提取记录（HTTP 站点）"""
+        raise NotImplementedError
+
+    async def stream(self, limit: Optional[int], headless: bool = True) -> AsyncIterator[Tuple[str, List[Any]]]:
+        """逐批产出 (来源名称, 记录列表)（浏览器站点）"""
+        raise NotImplementedError
+        yield
+
+    def source_name(self, url: str) -> str:
+        """页面在日志和指标中的来源名称"""
+        return self.name
+
+    def clean(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """只保留声明的字段，丢掉没有 key_field 的记录"""
+        fields = self.record_fields
+        return [
+            {field: record.get(field) for field in fields} if fields else record
+            for record in records
+            if record.get(self.key_field) not in (None, "")
+        ]
+
+    def save(self, db, records: List[Any]) -> int:
+        """写入一批记录，返回新增和有变化的数量"""
+        counts = db.save_site_records(self.name, records, self.key_field)
+        return counts["new"] + counts["changed"]
+
+    def describe(self) -> Dict[str, Any]:
+        """站点摘要（用于命令行列表）"""
+        return {
+            "name": self.name,
+            "fetch": self.fetch,
+            "fields": list(self.record_fields),
+            "key": self.key_field,
+            "description": self.description,
+        }
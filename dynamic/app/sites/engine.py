@@ -0,0 +1,191 @@
+"""
+站点爬取引擎：按适配器的声明抓取、提取、写库，连接池、限速、重试、熔断和指标对所有站点共用
+"""
+import time
+import asyncio
+import traceback
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.database.models import QuestionDatabase
+from app.metrics.registry import span, SITE_RECORDS
+from app.scraper.context_pool import THROTTLE_STATUSES, THROTTLE_URL_MARKERS
+from app.scraper.resilience import RetryPolicy, CircuitBreaker, TransientError
+from app.sites.base import SiteAdapter, HTTP
+
+
+class CrawlEngine:
+    """运行站点适配器的爬取引擎
+
+    HTTP 站点的所有页面通过一个 aiohttp 连接池抓取（keep-alive 复用连接，
+    不再每个请求新建连接），并发数不超过适配器的 concurrency，
+    请求开始时间按 min_interval 错开，取代逐页 sleep。超时、网络错误、
+    限流和 5xx 按 RetryPolicy 退避重试，每个站点一个熔断器（与知乎来源共用
+    CircuitBreaker 和 zhihu_source_results_total 等指标），熔断后本次剩余页面跳过。
+
+    浏览器站点由适配器的 stream 产出批次（知乎复用 ZhihuScraper 的上下文池）。
+    注意：调度器每轮的知乎爬取仍走原来的 ZhihuScraper / scrape_into 路径
+    （爬虫子进程、详情爬虫、zhihu_scrape_runs_total 和各来源的指标），知乎适配器只在
+    crawl-site zhihu 时经由本引擎运行；其他站点都由本引擎运行。
+
+    不论哪种站点，每批记录一提取出来就交给单独的写库任务，由适配器的 save
+    在数据库线程中提交，写库和后续页面的抓取同时进行。
+    """
+
+    def __init__(self,
+                 db: QuestionDatabase,
+                 concurrency: Optional[int] = None,
+                 timeout: float = 30,
+                 retry: Optional[RetryPolicy] = None):
+        """初始化引擎；concurrency 为空时使用适配器自己的并发上限"""
+        self.db = db
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retry = retry or RetryPolicy()
+
+    async def run(self, adapter: SiteAdapter, limit: Optional[int] = None, headless: bool = True) -> Dict[str, Any]:
+        """爬取一个站点，最多 limit 条记录（None 表示全部），返回统计"""
+        stats = {"site": adapter.name, "pages": 0, "failed": 0, "found": 0, "saved": 0}
+        queue = asyncio.Queue()
+
+        async def writer():
+            while True:
+                batch = await queue.get()
+                if batch is None:
+                    return
+                try:
+                    with span("site_write", adapter.name):
+                        saved = await asyncio.to_thread(adapter.save, self.db, batch)
+                    stats["saved"] += saved
+                    SITE_RECORDS.inc(saved, site=adapter.name, outcome="saved")
+                except Exception as e:
+                    print(f"保存 {len(batch)} 条 {adapter.name} 记录时出错: {e}")
+                    traceback.print_exc()
+
+        if adapter.fetch == HTTP:
+            batches = self._http_batches(adapter, limit, stats)
+        else:
+            batches = adapter.stream(limit, headless)
+
+        writer_task = asyncio.create_task(writer())
+        try:
+            with span("site_run", adapter.name):
+                async for source, records in batches:
+                    if adapter.fetch != HTTP:
+                        stats["pages"] += 1
+                    if limit is not None:
+                        records = records[:limit - stats["found"]]
+                    stats["found"] += len(records)
+                    SITE_RECORDS.inc(len(records), site=adapter.name, outcome="found")
+                    print(f"{source}: 提取到 {len(records)} 条记录")
+                    queue.put_nowait(records)
+                    if limit is not None and stats["found"] >= limit:
+                        break
+        finally:
+            await batches.aclose()
+            queue.put_nowait(None)
+            await writer_task
+
+        print(f"站点 {adapter.name} 爬取完成: {stats['pages']} 个页面，失败 {stats['failed']}，"
+              f"提取 {stats['found']} 条，新增或更新 {stats['saved']} 条")
+        return stats
+
+    async def _http_batches(self,
+                            adapter: SiteAdapter,
+                            limit: Optional[int],
+                            stats: Dict[str, Any]) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        """并发抓取 HTTP 站点的页面，哪个页面先解析完就先产出"""
+        import aiohttp
+
+        breaker = CircuitBreaker.for_source(adapter.name)
+        if not breaker.allow():
+            print(f"站点 {adapter.name} 熔断中，{breaker.remaining():.0f} 秒后再试")
+            return
+
+        concurrency = self.concurrency or adapter.concurrency
+        semaphore = asyncio.Semaphore(concurrency)
+        pace_lock = asyncio.Lock()
+        next_start = [0.0]
+
+        async def pace():
+            # 请求开始时间至少间隔 min_interval；并发的请求依次排队
+            async with pace_lock:
+                now = time.monotonic()
+                if next_start[0] > now:
+                    await asyncio.sleep(next_start[0] - now)
+                    now = time.monotonic()
+                next_start[0] = now + adapter.min_interval
+
+        async def paced_fetch(url):
+            # 重试同样排队，避免退避结束时和其他请求同时发出
+            await pace()
+            return await self.fetch(http, url)
+
+        async def fetch_page(url):
+            async with semaphore:
+                if not breaker.allow():
+                    return url, None
+                try:
+                    with span("site_fetch", adapter.name):
+                        page_html = await self.retry.run(paced_fetch, url, source=adapter.name)
+                    with span("site_parse", adapter.name):
+                        records = adapter.clean(adapter.parse(page_html, url))
+                except Exception as e:
+                    print(f"抓取 {url} 失败: {e}")
+                    breaker.record_failure(e)
+                    return url, None
+                if not records:
+                    breaker.record_failure(f"{url} 中没有记录")
+                    return url, None
+                breaker.record_success()
+                return url, records
+
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=adapter.headers) as http:
+            tasks = [asyncio.ensure_future(fetch_page(url)) for url in adapter.start_urls(limit)]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    url, records = await next_done
+                    if records is None:
+                        stats["failed"] += 1
+                        continue
+                    stats["pages"] += 1
+                    yield adapter.source_name(url), records
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def fetch(self, http, url: str) -> str:
+        """GET 一个页面；限流、5xx 和网络错误抛出 TransientError 以便重试"""
+        import aiohttp
+
+        try:
+            async with http.get(url) as response:
+                if (response.status in THROTTLE_STATUSES or response.status >= 500
+                        or any(marker in str(response.url) for marker in THROTTLE_URL_MARKERS)):
+                    raise TransientError(f"HTTP {response.status} {response.url}")
+                if response.status != 200:
+                    raise RuntimeError(f"HTTP {response.status} {url}")
+                return await response.text()
+        except aiohttp.ClientError as e:
+            raise TransientError(f"{type(e).__name__}: {e}") from e
+
+
+async def crawl_site(name: str,
+                     limit: Optional[int] = None,
+                     db: Optional[QuestionDatabase] = None,
+                     concurrency: Optional[int] = None,
+                     headless: bool = True) -> Dict[str, Any]:
+    """爬取一个已注册站点的便捷函数"""
+    from app.sites.registry import site_registry
+
+    adapter = site_registry.get(name)
+    own_db = db is None
+    db = db or QuestionDatabase(settings.database_path)
+    try:
+        return await CrawlEngine(db, concurrency=concurrency).run(adapter, limit=limit, headless=headless)
+    finally:
+        if own_db:
+            db.close()
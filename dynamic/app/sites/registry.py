@@ -0,0 +1,63 @@
+"""
+站点适配器注册表
+"""
+import importlib
+import threading
+from typing import Dict, List, Type
+
+from app.config.settings import settings
+from app.sites.base import SiteAdapter
+
+# 内置站点所在的模块；只在第一次查找站点时导入，不拖慢其他命令的启动
+BUILTIN_MODULES = ("app.sites.zhihu", "app.sites.douban")
+
+
+class SiteRegistry:
+    """站点名到适配器类的注册表
+
+    适配器模块用 @site_registry.register 登记自己。内置模块和 settings.site_plugins
+    中列出的第三方模块（例如 "mysites.weibo"）在第一次查找时导入，
+    新增站点只需要写一个适配器模块，不必改动引擎、调度器或存储。
+    """
+
+    def __init__(self):
+        self.adapters: Dict[str, Type[SiteAdapter]] = {}
+        self.loaded = False
+        self.lock = threading.Lock()
+
+    def register(self, adapter_class: Type[SiteAdapter]) -> Type[SiteAdapter]:
+        """登记一个适配器类（可作为类装饰器使用）"""
+        if not adapter_class.name:
+            raise ValueError(f"{adapter_class.__name__} 没有设置 name")
+        existing = self.adapters.get(adapter_class.name)
+        if existing is not None and existing is not adapter_class:
+            raise ValueError(f"站点 {adapter_class.name} 已由 {existing.__name__} 注册")
+        self.adapters[adapter_class.name] = adapter_class
+        return adapter_class
+
+    def _load(self):
+        with self.lock:
+            if self.loaded:
+                return
+            for module in BUILTIN_MODULES + tuple(settings.site_plugins):
+                try:
+                    importlib.import_module(module)
+                except Exception as e:
+                    print(f"加载站点模块 {module} 失败: {e}")
+            self.loaded = True
+
+    def get(self, name: str) -> SiteAdapter:
+        """返回站点的适配器实例；未知站点抛出 KeyError"""
+        self._load()
+        if name not in self.adapters:
+            raise KeyError(f"未知站点: {name}（可用: {', '.join(self.names())}）")
+        return self.adapters[name]()
+
+    def names(self) -> List[str]:
+        """所有已注册的站点名"""
+        self._load()
+        return sorted(self.adapters)
+
+
+# 默认注册表
+site_registry = SiteRegistry()
@@ -0,0 +1,36 @@
+"""
+知乎站点适配器：浏览器抓取，复用 ZhihuScraper 的上下文池、熔断器和页内采集器
+"""
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+from app.sites.base import SiteAdapter, BROWSER
+from app.sites.registry import site_registry
+
+
+@site_registry.register
+class ZhihuSite(SiteAdapter):
+    """知乎热榜、推荐和等你来答页面的问题
+
+    记录是 Question 对象，写入 questions 表（去重、快照、趋势和详情队列都由
+    QuestionDatabase.add_questions 处理），而不是通用的 site_records 表。
+    """
+
+    name = "zhihu"
+    description = "知乎热榜、推荐和等你来答页面的问题"
+    fetch = BROWSER
+    record_fields = ("id", "title", "url", "answer_count", "follow_count", "hot_score")
+    key_field = "id"
+
+    async def stream(self, limit: Optional[int], headless: bool = True) -> AsyncIterator[Tuple[str, List[Any]]]:
+        from app.config.settings import settings
+        from app.scraper.zhihu_scraper import ZhihuScraper
+
+        scraper = ZhihuScraper(headless=headless)
+        try:
+            async for source, questions in scraper.stream(limit or settings.question_limit):
+                yield source, questions
+        finally:
+            await scraper.close()
+
+    def save(self, db, records: List[Any]) -> int:
+        return db.add_questions(records)
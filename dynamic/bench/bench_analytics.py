@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+分析库基准：DuckDB 聚合查询与 Python 全表扫描的对比
+
+用法：
+
+    python bench/bench_analytics.py --rows 100000 1000000 --days 90
+
+对每个规模在临时目录中新建数据库，写入分布在 --days 天内的问题和同样多的指标快照，然后：
+- 测量首次导出到分析库（AnalyticsStore.export）的耗时，以及写入一批新问题后增量导出的耗时；
+- 测量 AnalyticsStore.stats（每天新增问题、更新量和三个指标的分位数与直方图）的耗时；
+- 作为对照，用 get_question_rows 读出全部问题，在 Python 中计算每天新增数和分位数。
+需要安装 duckdb；未安装时跳过。
+"""
+import os
+import random
+import shutil
+import argparse
+import datetime
+import tempfile
+
+from common import timed, write_json
+
+from app.database.models import QuestionDatabase, QUESTION_FIELDS, QUESTION_COLUMNS, Question
+
+
+def _seed(db, rows, days, seed=0):
+    """写入 rows 个问题和对应的快照，时间均匀分布在最近 days 天内"""
+    rng = random.Random(seed)
+    now = datetime.datetime.now()
+    batch = 50000
+    for start in range(0, rows, batch):
+        questions, snapshots = [], []
+        for i in range(start, min(rows, start + batch)):
+            seen = (now - datetime.timedelta(seconds=rng.uniform(0, days * 86400))).isoformat()
+            answers, follows = rng.randint(0, 500), rng.randint(0, 100000)
+            hot = rng.randint(0, 5000000) if i % 4 == 0 else None
+            questions.append((str(10 ** 8 + i), f"示例问题 {i}", f"https://www.zhihu.com/question/{i}",
+                              answers, follows, hot, seen, seen, seen))
+            snapshots.append((str(10 ** 8 + i), seen, answers, follows, hot))
+        with db.lock, db.conn:
+            db.conn.executemany(
+                f"INSERT OR REPLACE INTO questions ({QUESTION_COLUMNS}) "
+                f"VALUES ({', '.join('?' * len(QUESTION_FIELDS))})",
+                questions
+            )
+            db.conn.executemany(
+                'INSERT OR REPLACE INTO question_snapshots '
+                '(question_id, taken_at, answer_count, follow_count, hot_score) VALUES (?, ?, ?, ?, ?)',
+                snapshots
+            )
+            db.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+
+
+def _python_stats(db, days):
+    """对照组：读出全部问题，在 Python 中计算每天新增数和三个指标的分位数"""
+    since = (datetime.datetime.now() - datetime.timedelta(days=days)).isoformat()
+    fields = list(QUESTION_FIELDS)
+    first_seen, last_seen = fields.index('first_seen'), fields.index('last_seen')
+    per_day, values = {}, {'answer_count': [], 'follow_count': [], 'hot_score': []}
+    for row in db.get_question_rows(limit=None):
+        if row[first_seen] and row[first_seen] >= since:
+            day = row[first_seen][:10]
+            per_day[day] = per_day.get(day, 0) + 1
+        if row[last_seen] and row[last_seen] >= since:
+            for metric, column in values.items():
+                value = row[fields.index(metric)]
+                if value is not None:
+                    column.append(value)
+    quantiles = {}
+    for metric, column in values.items():
+        column.sort()
+        quantiles[metric] = [column[int(q * (len(column) - 1))] for q in (0.5, 0.9, 0.99)] if column else []
+    return per_day, quantiles
+
+
+def run(sizes=(100000,), days=90, repeats=3):
+    """对每个规模运行一次；未安装 duckdb 时跳过"""
+    from app.database.analytics import AnalyticsStore, duckdb
+
+    if duckdb is None:
+        return {"skipped": "duckdb 未安装"}
+    results = []
+    for rows in sizes:
+        temp_dir = tempfile.mkdtemp(prefix="bench_analytics_")
+        try:
+            db = QuestionDatabase(os.path.join(temp_dir, "bench.db"))
+            _seed(db, rows, days)
+            store = AnalyticsStore(os.path.join(temp_dir, "analytics.duckdb"))
+            _, export_seconds = timed(store.export, db.database_path)
+            db.add_questions([Question(f"new{i}", "新问题", "https://www.zhihu.com/question/0") for i in range(100)])
+            _, incremental_seconds = timed(store.export, db.database_path)
+            stats_seconds = min(timed(store.stats, days)[1] for _ in range(repeats))
+            python_seconds = min(timed(_python_stats, db, days)[1] for _ in range(repeats))
+            db.close()
+            results.append({
+                "rows": rows,
+                "export_seconds": round(export_seconds, 3),
+                "incremental_export_seconds": round(incremental_seconds, 3),
+                "stats_ms": round(stats_seconds * 1000, 1),
+                "python_scan_ms": round(python_seconds * 1000, 1),
+                "duckdb_bytes": os.path.getsize(store.path),
+            })
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    return {"days": days, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分析库聚合查询基准")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000], help="问题数量（可多个）")
+    parser.add_argument("--days", type=int, default=90, help="数据分布的天数")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    result = run(args.rows, args.days)
+    if "skipped" in result:
+        print(f"已跳过: {result['skipped']}")
+    else:
+        for r in result["results"]:
+            print(f"{r['rows']} 行: 首次导出 {r['export_seconds']}s, 增量导出 {r['incremental_export_seconds']}s, "
+                  f"stats {r['stats_ms']} ms, Python 扫描 {r['python_scan_ms']} ms")
+    if args.json:
+        write_json(args.json, result)
+
+
+if __name__ == "__main__":
+    main()
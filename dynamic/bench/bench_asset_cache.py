@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+静态资源缓存基准：同一缓存目录下连续多次运行爬虫，比较导航耗时和下载的静态资源字节数
+
+用法：
+
+    python bench/bench_asset_cache.py --runs 3 --assets-kb 800
+
+模拟站点（bench/stubsite.py）的每个页面引用一个脚本和一个样式表（带哈希文件名、immutable），
+各 --assets-kb KB。每次运行都新建 ZhihuScraper（新的浏览器和空白配置），
+分别在关闭和开启缓存时运行 --runs 次，报告每次运行的平均导航耗时、模拟站点发出的静态资源字节数和缓存命中数。
+需要安装 Playwright 及其 Chromium；未安装时跳过。
+"""
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+
+from common import write_json
+from stubsite import start_stub_site
+from bench_context_pool import _make_pool
+
+
+def _navigation_totals():
+    from app.metrics.registry import registry
+
+    histogram = registry.snapshot()["zhihu_stage_duration_seconds"]
+    count = sum(v["count"] for k, v in histogram.items() if k.startswith("navigation|"))
+    total = sum(v["sum"] for k, v in histogram.items() if k.startswith("navigation|"))
+    return count, total
+
+
+async def _run(runs, assets_kb, cached):
+    from app.config.settings import settings
+    from app.scraper.asset_cache import AssetCache
+    from app.scraper.zhihu_scraper import ZhihuScraper
+
+    # 不传缓存时 ZhihuScraper 按配置创建；关闭模式下让配置也不提供缓存
+    settings.asset_cache_mb = 0
+
+    runner, base_url, stub = await start_stub_site(rate=10 ** 6, window=60, assets_kb=assets_kb)
+    temp_dir = tempfile.mkdtemp(prefix="bench_assets_")
+    cache = AssetCache(f"{temp_dir}/cache", 512 * 1024 * 1024) if cached else None
+    results = []
+    try:
+        for _ in range(runs):
+            scraper = ZhihuScraper(
+                headless=True,
+                pool=_make_pool(temp_dir, 1, base_url, min_interval=0, cooldown=10),
+                base_url=base_url,
+                asset_cache=cache
+            )
+            asset_bytes, (nav_count, nav_total) = stub.asset_bytes, _navigation_totals()
+            hits = cache.stats["hits"] if cache else 0
+            start = time.perf_counter()
+            try:
+                questions = len(await scraper.scrape(limit=10 ** 6))
+            finally:
+                await scraper.close()
+            elapsed = time.perf_counter() - start
+            count, total = _navigation_totals()
+            results.append({
+                "seconds": round(elapsed, 3),
+                "navigation_ms": round((total - nav_total) / max(1, count - nav_count) * 1000, 1),
+                "asset_bytes_served": stub.asset_bytes - asset_bytes,
+                "cache_hits": (cache.stats["hits"] if cache else 0) - hits,
+                "questions": questions,
+            })
+    finally:
+        await runner.cleanup()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return results
+
+
+def run(runs=3, assets_kb=800):
+    """分别在关闭和开启缓存时运行；未安装 Playwright 时跳过"""
+    try:
+        import playwright.async_api  # noqa: F401
+    except ImportError:
+        return {"skipped": "playwright 未安装"}
+    return {
+        "assets_kb": assets_kb,
+        "uncached": asyncio.run(_run(runs, assets_kb, cached=False)),
+        "cached": asyncio.run(_run(runs, assets_kb, cached=True)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="静态资源缓存基准")
+    parser.add_argument("--runs", type=int, default=3, help="每种模式连续运行的次数")
+    parser.add_argument("--assets-kb", type=int, default=800, help="页面引用的 JS/CSS 各多少 KB")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    result = run(args.runs, args.assets_kb)
+    if "skipped" in result:
+        print(f"已跳过: {result['skipped']}")
+    else:
+        for mode in ("uncached", "cached"):
+            for i, r in enumerate(result[mode], 1):
+                print(f"{mode} 第 {i} 次: {r['seconds']}s, 平均导航 {r['navigation_ms']} ms, "
+                      f"静态资源 {r['asset_bytes_served'] / 1e6:.2f} MB, 命中 {r['cache_hits']}")
+    if args.json:
+        write_json(args.json, result)
+
+
+if __name__ == "__main__":
+    main()
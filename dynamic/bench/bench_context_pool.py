@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+上下文池吞吐基准：多账号 + 限流，针对本地模拟站点（bench/stubsite.py）
+
+用法：
+
+    python bench/bench_context_pool.py --accounts 1 3 --rounds 3 --rate 4 --window 30
+
+为每个账号生成一份 cookies 文件，在同一进程里启动模拟站点，然后用 ZhihuScraper
+连续爬取 --rounds 轮，报告每种账号数下的总耗时、成功页面数和被限流次数。
+需要安装 Playwright 及其 Chromium；未安装时跳过。
+"""
+import os
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+
+from common import write_json
+from stubsite import start_stub_site
+
+
+def _make_pool(temp_dir, count, base_url, min_interval, cooldown):
+    """生成 count 个账号的 cookies 文件和指向模拟站点的上下文池"""
+    from app.scraper.context_pool import AccountConfig, ContextPool
+    from app.scraper.session import SessionManager
+
+    accounts, sessions = [], []
+    for i in range(count):
+        cookies_file = os.path.join(temp_dir, f"account{i}.json")
+        with open(cookies_file, "w", encoding="utf-8") as f:
+            json.dump({"z_c0": f"token{i}"}, f)
+        accounts.append(AccountConfig(
+            cookies_file,
+            viewport={"width": 1280 + 40 * i, "height": 800},
+            min_interval=min_interval,
+            name=f"account{i}"
+        ))
+        sessions.append(SessionManager(cookies_file, probe_url=base_url + "/api/v4/me", domain="127.0.0.1"))
+    return ContextPool(accounts, cooldown=cooldown, max_wait=cooldown * 4, sessions=sessions)
+
+
+async def _run(count, rounds, rate, window, mode, min_interval):
+    from app.scraper.zhihu_scraper import ZhihuScraper
+
+    runner, base_url, stub = await start_stub_site(rate=rate, window=window, mode=mode)
+    temp_dir = tempfile.mkdtemp(prefix="bench_pool_")
+    scraper = ZhihuScraper(
+        headless=True,
+        pool=_make_pool(temp_dir, count, base_url, min_interval, cooldown=window),
+        base_url=base_url
+    )
+    try:
+        start = time.perf_counter()
+        questions = 0
+        for _ in range(rounds):
+            questions += len(await scraper.scrape(limit=10 ** 6))
+        elapsed = time.perf_counter() - start
+    finally:
+        await scraper.close()
+        await runner.cleanup()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    served = sum(s["served"] for s in stub.stats.values())
+    throttled = sum(s["throttled"] for s in stub.stats.values())
+    return {
+        "accounts": count,
+        "seconds": round(elapsed, 2),
+        "pages_served": served,
+        "pages_throttled": throttled,
+        "pages_per_minute": round(served / elapsed * 60, 2),
+        "questions": questions,
+    }
+
+
+def run(accounts=(1, 3), rounds=3, rate=4, window=30.0, mode="429", min_interval=1.0):
+    """对每种账号数运行一次；未安装 Playwright 时跳过"""
+    try:
+        import playwright.async_api  # noqa: F401
+    except ImportError:
+        return {"skipped": "playwright 未安装"}
+    return {str(count): asyncio.run(_run(count, rounds, rate, window, mode, min_interval)) for count in accounts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="上下文池吞吐基准")
+    parser.add_argument("--accounts", type=int, nargs="+", default=[1, 3], help="账号数")
+    parser.add_argument("--rounds", type=int, default=3, help="每种账号数爬取的轮数")
+    parser.add_argument("--rate", type=int, default=4, help="模拟站点每个账号在窗口内允许的请求数")
+    parser.add_argument("--window", type=float, default=30.0, help="模拟站点的限流窗口（秒）")
+    parser.add_argument("--mode", choices=("429", "redirect"), default="429", help="限流方式")
+    parser.add_argument("--min-interval", type=float, default=1.0, help="同一账号两次请求的最小间隔（秒）")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    results = run(args.accounts, args.rounds, args.rate, args.window, args.mode, args.min_interval)
+    if "skipped" in results:
+        print(f"已跳过: {results['skipped']}")
+    else:
+        for count, result in results.items():
+            print(f"{count} 个账号: {result['seconds']}s, 成功 {result['pages_served']} 页, "
+                  f"被限流 {result['pages_throttled']} 次, {result['pages_per_minute']} 页/分钟")
+    if args.json:
+        write_json(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
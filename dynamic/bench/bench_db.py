@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+QuestionDatabase 基准：批量写入与分页读取
+
+用法：
+
+    python bench/bench_db.py --sizes 10000 1000000
+
+对每个规模在临时目录中新建数据库：
+- 通过 add_questions 按批写入（与爬虫写库路径一致），统计行/秒；
+- 比较 OFFSET 分页（get_all_questions）与键集游标分页（query_questions）
+  读取首页和最后一页的耗时；
+- 测量 COUNT(*)。
+"""
+import os
+import shutil
+import argparse
+import tempfile
+
+from common import timed, sample_question_rows, write_json
+
+from app.database.models import QuestionDatabase, Question
+
+
+def _bulk_insert(db, count, batch):
+    """通过 add_questions 写入 count 个问题"""
+    rows = sample_question_rows(count)
+    written = 0
+    while True:
+        chunk = [Question.from_row(row) for _, row in zip(range(batch), rows)]
+        if not chunk:
+            return written
+        written += db.add_questions(chunk)
+
+
+def _offset_page(db, page, page_size):
+    return db.get_all_questions(limit=page_size, offset=page * page_size)
+
+
+def _keyset_cursor_at(db, offset):
+    """取第 offset 行的 (timestamp, id)，作为深处分页的游标（不计时）"""
+    with db.lock:
+        row = db.conn.execute(
+            "SELECT timestamp, id FROM questions ORDER BY timestamp DESC, id DESC LIMIT 1 OFFSET ?",
+            (offset,)
+        ).fetchone()
+    return tuple(row) if row else None
+
+
+def bench_size(count, batch=500, page_size=50):
+    """在一个新数据库上运行一个规模的全部测量"""
+    temp_dir = tempfile.mkdtemp(prefix="bench_db_")
+    try:
+        db = QuestionDatabase(os.path.join(temp_dir, "bench.db"))
+        written, insert_elapsed = timed(_bulk_insert, db, count, batch)
+
+        deep_page = max(0, count // page_size - 1)
+        _, first_offset = timed(_offset_page, db, 0, page_size)
+        _, deep_offset = timed(_offset_page, db, deep_page, page_size)
+        _, first_keyset = timed(db.query_questions, limit=page_size)
+        after = _keyset_cursor_at(db, max(0, deep_page * page_size - 1))
+        _, deep_keyset = timed(db.query_questions, after=after, limit=page_size)
+        total, count_elapsed = timed(db.count_questions)
+        db.close()
+
+        return {
+            "rows": written,
+            "insert_rows_per_sec": round(written / insert_elapsed),
+            "offset_first_page_ms": round(first_offset * 1000, 3),
+            "offset_deep_page_ms": round(deep_offset * 1000, 3),
+            "keyset_first_page_ms": round(first_keyset * 1000, 3),
+            "keyset_deep_page_ms": round(deep_keyset * 1000, 3),
+            "count_ms": round(count_elapsed * 1000, 3),
+            "count": total,
+        }
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def run(sizes=(10000,), batch=500, page_size=50):
+    """按规模运行数据库基准"""
+    return {str(size): bench_size(size, batch, page_size) for size in sizes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QuestionDatabase 基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 1000000], help="数据规模")
+    parser.add_argument("--batch", type=int, default=500, help="每次 add_questions 的问题数")
+    parser.add_argument("--page-size", type=int, default=50, help="分页大小")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.batch, args.page_size)
+    for size, result in results.items():
+        print(f"[{size} 行] 写入 {result['insert_rows_per_sec']} 行/秒, "
+              f"OFFSET 首页/深页 {result['offset_first_page_ms']}/{result['offset_deep_page_ms']}ms, "
+              f"键集 首页/深页 {result['keyset_first_page_ms']}/{result['keyset_deep_page_ms']}ms, "
+              f"COUNT {result['count_ms']}ms")
+    if args.json:
+        write_json(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
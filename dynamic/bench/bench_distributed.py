@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+分布式爬取端到端测试：一台机器上的协调节点 + 多个爬虫节点进程，针对本地模拟站点
+
+用法：
+
+    python bench/bench_distributed.py --workers 3 --rounds 3
+
+在本进程中启动模拟站点（bench/stubsite.py）和协调节点（create_app，临时数据库），
+再启动 --workers 个爬虫节点子进程（RemoteCrawlWorker，各自的浏览器和账号）。
+每轮通过任务队列排入每个来源页面一个任务，等所有任务结束后再排下一轮。
+报告总耗时、各状态的任务数、入库的问题数和每个节点的统计。
+需要安装 Playwright 及其 Chromium；未安装时跳过。
+"""
+import os
+import time
+import shutil
+import socket
+import secrets
+import asyncio
+import argparse
+import tempfile
+import threading
+import multiprocessing
+
+from common import write_json
+from stubsite import start_stub_site
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_stub(options):
+    """在后台线程的事件循环中运行模拟站点，返回其地址"""
+    ready = threading.Event()
+    box = {}
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _, box["base_url"], box["stub"] = loop.run_until_complete(start_stub_site(**options))
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return box["base_url"], box["stub"]
+
+
+def _start_coordinator(port):
+    """在后台线程中运行协调节点（Web 服务器），等待其开始监听"""
+    import uvicorn
+    from app.frontend.server import create_app
+
+    server = uvicorn.Server(uvicorn.Config(create_app(), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def _worker_process(index, coordinator_url, token, base_url, idle_exit, results):
+    """爬虫节点子进程：一个账号，上下文池指向模拟站点"""
+    from bench_context_pool import _make_pool
+    from app.scraper.zhihu_scraper import ZhihuScraper
+    from app.scraper.remote_worker import RemoteCrawlWorker
+
+    temp_dir = tempfile.mkdtemp(prefix=f"bench_worker{index}_")
+    try:
+        scraper = ZhihuScraper(
+            headless=True,
+            pool=_make_pool(temp_dir, 1, base_url, min_interval=0.5, cooldown=10),
+            base_url=base_url
+        )
+        worker = RemoteCrawlWorker(coordinator_url, name=f"worker{index}", token=token, capacity=2,
+                                   poll_interval=0.5, scraper=scraper)
+        results.put((worker.name, asyncio.run(worker.run(idle_exit=idle_exit))))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _run(workers, rounds, rate, window, idle_exit):
+    from app.config.settings import settings
+    from app.database.models import QuestionDatabase
+    from app.scheduler.scheduler import dispatch_scrape_tasks
+
+    temp_dir = tempfile.mkdtemp(prefix="bench_distributed_")
+    settings.database_path = os.path.join(temp_dir, "coordinator.db")
+    settings.crawl_mode = "distributed"
+    settings.worker_token = secrets.token_hex(16)
+    base_url, stub = _start_stub(dict(rate=rate, window=window))
+    port = _free_port()
+    server = _start_coordinator(port)
+    db = QuestionDatabase(settings.database_path)
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker_process, args=(i, f"http://127.0.0.1:{port}", settings.worker_token, base_url, idle_exit, results))
+        for i in range(workers)
+    ]
+    try:
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for _ in range(rounds):
+            dispatch_scrape_tasks(db, 10 ** 6, ttl_seconds=600, base_url=base_url)
+            while True:
+                stats = db.scrape_task_stats()
+                if not stats["pending"] and not stats["leased"]:
+                    break
+                time.sleep(0.2)
+        elapsed = time.perf_counter() - start
+        worker_stats = dict(results.get(timeout=idle_exit + 120) for _ in processes)
+        for process in processes:
+            process.join(timeout=30)
+        return {
+            "workers": workers,
+            "rounds": rounds,
+            "seconds": round(elapsed, 2),
+            "tasks": db.scrape_task_stats(),
+            "questions_stored": db.count_questions(),
+            "pages_served": sum(s["served"] for s in stub.stats.values()),
+            "per_worker": worker_stats,
+        }
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+        server.should_exit = True
+        db.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def run(workers=3, rounds=3, rate=20, window=60.0, idle_exit=5.0):
+    """运行一次端到端测试；未安装 Playwright 时跳过"""
+    try:
+        import playwright.async_api  # noqa: F401
+    except ImportError:
+        return {"skipped": "playwright 未安装"}
+    return _run(workers, rounds, rate, window, idle_exit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分布式爬取端到端测试")
+    parser.add_argument("--workers", type=int, default=3, help="爬虫节点进程数")
+    parser.add_argument("--rounds", type=int, default=3, help="排入任务的轮数")
+    parser.add_argument("--rate", type=int, default=20, help="模拟站点每个账号在窗口内允许的请求数")
+    parser.add_argument("--window", type=float, default=60.0, help="模拟站点的限流窗口（秒）")
+    parser.add_argument("--idle-exit", type=float, default=5.0, help="节点连续空闲多少秒后退出")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    result = run(args.workers, args.rounds, args.rate, args.window, args.idle_exit)
+    if "skipped" in result:
+        print(f"已跳过: {result['skipped']}")
+    else:
+        print(f"{result['workers']} 个节点, {result['rounds']} 轮: {result['seconds']}s, "
+              f"任务 {result['tasks']}, 入库 {result['questions_stored']} 个问题")
+        for name, stats in result["per_worker"].items():
+            print(f"  {name}: {stats}")
+    if args.json:
+        write_json(args.json, result)
+
+
+if __name__ == "__main__":
+    main()
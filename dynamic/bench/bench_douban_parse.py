@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+豆瓣列表页解析基准（离线，使用 bench/fixtures 中保存的页面）
+
+用法：
+
+    python bench/bench_douban_parse.py --iterations 200
+"""
+import os
+import sys
+import argparse
+
+from common import ROOT, FIXTURES_DIR, timed, write_json
+
+sys.path.insert(0, os.path.join(os.path.dirname(ROOT), "static"))
+
+FIXTURE = os.path.join(FIXTURES_DIR, "douban_top250_page1.html")
+
+
+def run(iterations=200):
+    """重复解析同一页面，返回每页耗时和吞吐"""
+    from douban_movies import parse_movie_items
+
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        html = f.read()
+
+    movies = parse_movie_items(html)
+    _, elapsed = timed(lambda: [parse_movie_items(html) for _ in range(iterations)])
+    return {
+        "iterations": iterations,
+        "items_per_page": len(movies),
+        "ms_per_page": round(elapsed / iterations * 1000, 3),
+        "items_per_sec": round(len(movies) * iterations / elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="豆瓣列表页解析基准")
+    parser.add_argument("--iterations", type=int, default=200, help="解析次数")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    result = run(args.iterations)
+    print(f"豆瓣解析: {result['ms_per_page']}ms/页, {result['items_per_sec']} 条/秒 "
+          f"({result['items_per_page']} 条/页)")
+    if args.json:
+        write_json(args.json, result)
+
+
+if __name__ == "__main__":
+    main()
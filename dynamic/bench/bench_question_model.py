@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Question 模型微基准：单对象内存占用与批量加载速度
+
+用法：
+
+    python bench/bench_question_model.py --rows 1000000 --json bench/results/question_model.json
+
+先用 tracemalloc 测量 Question 与旧版基于 __dict__ 的模型每个对象的内存，
+再向临时 SQLite 数据库写入 --rows 行，分别测量三种加载方式的吞吐（行/秒）：
+只取元组、元组映射为 Question、以及旧版逐行构造并解析时间戳。
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import datetime
+import tempfile
+import tracemalloc
+
+from common import sample_question_rows, seed_database, write_json
+
+from app.database.models import QuestionDatabase, Question
+
+
+class LegacyQuestion:
+    """优化前的模型：普通类，每个实例带 __dict__，构造时解析时间戳"""
+    def __init__(self, id, title, url, answer_count=0, follow_count=0, hot_score=None, timestamp=None):
+        self.id = id
+        self.title = title
+        self.url = url
+        self.answer_count = answer_count
+        self.follow_count = follow_count
+        self.hot_score = hot_score
+        self.timestamp = timestamp or datetime.datetime.now()
+
+
+def legacy_from_row(row):
+    """旧版 get_all_questions 的逐行构造方式"""
+    return LegacyQuestion(
+        id=row[0],
+        title=row[1],
+        url=row[2],
+        answer_count=row[3],
+        follow_count=row[4],
+        hot_score=row[5],
+        timestamp=datetime.datetime.fromisoformat(row[6])
+    )
+
+
+def bytes_per_object(rows, build):
+    """用 tracemalloc 测量每个对象的平均内存（不含共享的字符串）"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [build(row) for row in rows]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # 扣除承载对象的列表本身
+    allocated -= sys.getsizeof(objects)
+    return round(allocated / len(objects), 1)
+
+
+def rows_per_second(count, func):
+    """执行 func 并返回 count / 耗时"""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    return round(count / elapsed), round(elapsed, 3)
+
+
+def run(rows=1000000, memory_sample=100000):
+    """测量单对象内存和三种加载方式的吞吐"""
+    sample = list(sample_question_rows(memory_sample))
+    results = {
+        "memory_bytes_per_object": {
+            "question_slots_lazy_ts": bytes_per_object(sample, Question.from_row),
+            "legacy_dict_parsed_ts": bytes_per_object(sample, legacy_from_row),
+        }
+    }
+    del sample
+
+    temp_dir = tempfile.mkdtemp(prefix="bench_question_model_")
+    try:
+        db = QuestionDatabase(os.path.join(temp_dir, "bench.db"))
+        seed_database(db, rows)
+
+        loaders = {
+            "tuples": lambda: db.get_question_rows(limit=None),
+            "question_from_rows": lambda: Question.from_rows(db.get_question_rows(limit=None)),
+            "legacy_per_row": lambda: [legacy_from_row(row) for row in db.get_question_rows(limit=None)],
+        }
+        results["load"] = {}
+        for name, loader in loaders.items():
+            rate, elapsed = rows_per_second(rows, loader)
+            results["load"][name] = {"rows_per_sec": rate, "seconds": elapsed}
+        results["rows"] = rows
+        db.close()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Question 模型微基准")
+    parser.add_argument("--rows", type=int, default=1000000, help="加载测试的行数")
+    parser.add_argument("--memory-sample", type=int, default=100000, help="内存测试的对象数")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.memory_sample)
+    memory = results["memory_bytes_per_object"]
+    print(f"每对象内存: Question={memory['question_slots_lazy_ts']}B, "
+          f"旧模型={memory['legacy_dict_parsed_ts']}B")
+    for name, load in results["load"].items():
+        print(f"加载 {args.rows} 行 [{name}]: {load['rows_per_sec']} 行/秒 ({load['seconds']}s)")
+
+    if args.json:
+        write_json(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
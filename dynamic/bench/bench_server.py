@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Web 服务器延迟基准（离线）
+
+用法：
+
+    python bench/bench_server.py --rows 10000 --requests 1000 --concurrency 50
+
+在临时目录中准备含 --rows 行数据的数据库和 config.json，用 uvicorn 在子进程中
+启动 create_app()（与压测客户端不共享 GIL），再用本地 aiohttp 负载生成器依次压测
+首页和 JSON 接口，报告各端点的 p50/p95/p99。
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+from common import ROOT, seed_database, summarize, write_json
+from load_home import fire_requests
+
+from app.database.models import QuestionDatabase
+
+ENDPOINTS = {
+    "home": "/",
+    "api_questions": "/api/questions?limit=50",
+    "api_questions_filtered": "/api/questions?min_follows=50000&fields=id,title,follow_count&limit=50",
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(base_url, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("服务器进程提前退出")
+        try:
+            urllib.request.urlopen(base_url + "/metrics", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("服务器启动超时")
+
+
+def run(rows=10000, requests=500, concurrency=20):
+    """启动临时服务器并压测各端点"""
+    temp_dir = tempfile.mkdtemp(prefix="bench_server_")
+    database_path = os.path.join(temp_dir, "questions.db")
+    with open(os.path.join(temp_dir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump({"database_path": database_path, "debug": False}, f)
+
+    db = QuestionDatabase(database_path)
+    seed_database(db, rows)
+    db.close()
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.frontend.server:create_app", "--factory",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=temp_dir,
+        env=env
+    )
+    try:
+        _wait_until_up(base_url, process)
+        results = {"rows": rows, "requests": requests, "concurrency": concurrency, "endpoints": {}}
+        for name, path in ENDPOINTS.items():
+            latencies, errors = asyncio.run(fire_requests(base_url + path, requests, concurrency))
+            result = summarize(latencies)
+            result["errors"] = errors
+            results["endpoints"][name] = result
+        return results
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Web 服务器延迟基准")
+    parser.add_argument("--rows", type=int, default=10000, help="数据库预置行数")
+    parser.add_argument("--requests", type=int, default=500, help="每个端点的请求数")
+    parser.add_argument("--concurrency", type=int, default=20, help="并发数")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.requests, args.concurrency)
+    for name, result in results["endpoints"].items():
+        print(f"{name:>24}: p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+              f"p99={result['p99_ms']}ms errors={result['errors']}")
+    if args.json:
+        write_json(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+知乎页面 DOM 提取基准（离线，使用 debug/*.html 中保存的页面）
+
+用法：
+
+    python bench/bench_zhihu_extract.py --iterations 20
+
+通过 Playwright 路由拦截，把保存的 HTML 作为 https://www.zhihu.com/... 的响应返回，
+其余请求（脚本、图片、接口）一律中止，因此完全不访问网络。
+对每个页面分别测量 ZhihuScraper.extract_question_links（滚动后整页提取链接）的耗时，
+以及增量收集器（QuestionCollector，热榜页用 hot 模式）注入后初次扫描加最终推送的耗时。
+"""
+import os
+import glob
+import asyncio
+import argparse
+
+from common import ROOT, write_json
+
+DEBUG_DIR = os.path.join(ROOT, "debug")
+
+
+async def _bench_page(browser, path, iterations):
+    """加载一个保存的页面并重复执行提取"""
+    from app.scraper.zhihu_scraper import ZhihuScraper
+    from app.scraper.collector import QuestionCollector
+
+    with open(path, "r", encoding="utf-8") as f:
+        html = f.read()
+    url = "https://www.zhihu.com/" + os.path.splitext(os.path.basename(path))[0]
+
+    context = await browser.new_context()
+
+    async def serve(route):
+        if route.request.url == url:
+            await route.fulfill(status=200, content_type="text/html; charset=utf-8", body=html)
+        else:
+            await route.abort()
+
+    await context.route("**/*", serve)
+    page = await context.new_page()
+    await page.goto(url, wait_until="domcontentloaded")
+
+    scraper = ZhihuScraper(headless=True)
+    scraper.page = page
+    result = {}
+    loop = asyncio.get_running_loop()
+    count = 0
+    start = loop.time()
+    for _ in range(iterations):
+        count = len(await scraper.extract_question_links())
+    elapsed = loop.time() - start
+    result["question_links"] = {"questions": count, "ms_per_extract": round(elapsed / iterations * 1000, 3)}
+
+    mode = "hot" if "hot" in url else "links"
+    count = 0
+    start = loop.time()
+    for _ in range(iterations):
+        collector = QuestionCollector(mode=mode)
+        await collector.attach(page)
+        await collector.start(page)
+        count = len(await collector.finish(page))
+    elapsed = loop.time() - start
+    result["collector"] = {"mode": mode, "questions": count, "ms_per_extract": round(elapsed / iterations * 1000, 3)}
+    await context.close()
+    return result
+
+
+async def _run(iterations, pattern):
+    from playwright.async_api import async_playwright
+
+    results = {}
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        try:
+            for path in sorted(glob.glob(os.path.join(DEBUG_DIR, pattern))):
+                results[os.path.basename(path)] = await _bench_page(browser, path, iterations)
+        finally:
+            await browser.close()
+    return results
+
+
+def run(iterations=20, pattern="*.html"):
+    """对 debug 目录下每个保存的页面运行提取基准；未安装 Playwright 时跳过"""
+    try:
+        import playwright.async_api  # noqa: F401
+    except ImportError:
+        return {"skipped": "playwright 未安装"}
+    return {"iterations": iterations, "pages": asyncio.run(_run(iterations, pattern))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="知乎页面 DOM 提取基准")
+    parser.add_argument("--iterations", type=int, default=20, help="每个页面的提取次数")
+    parser.add_argument("--pattern", default="*.html", help="debug 目录下的文件匹配模式")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    result = run(args.iterations, args.pattern)
+    if "skipped" in result:
+        print(f"已跳过: {result['skipped']}")
+    else:
+        for name, page in result["pages"].items():
+            links, collector = page["question_links"], page["collector"]
+            print(f"{name}: 链接提取 {links['ms_per_extract']}ms ({links['questions']} 个), "
+                  f"增量收集（{collector['mode']}）{collector['ms_per_extract']}ms ({collector['questions']} 个)")
+    if args.json:
+        write_json(args.json, result)
+
+
+if __name__ == "__main__":
+    main()
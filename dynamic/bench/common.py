@@ -0,0 +1,91 @@
+"""
+基准测试共用的工具函数
+"""
+import os
+import sys
+import json
+import time
+import random
+import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, "bench")
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def percentile(values, pct):
+    """返回已排序列表的百分位数"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(latencies):
+    """汇总延迟（毫秒）"""
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+
+def timed(func, *args, **kwargs):
+    """执行 func，返回 (结果, 耗时秒)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def sample_question_rows(count, start_id=10 ** 8, seed=0):
+    """生成 QUESTION_FIELDS 顺序的示例行，时间戳递增"""
+    rng = random.Random(seed)
+    base = datetime.datetime(2024, 1, 1)
+    for i in range(count):
+        question_id = start_id + i
+        timestamp = (base + datetime.timedelta(seconds=i)).isoformat()
+        yield (
+            str(question_id),
+            f"示例问题标题 {question_id}",
+            f"https://www.zhihu.com/question/{question_id}",
+            rng.randint(0, 500),
+            rng.randint(0, 100000),
+            None,
+            timestamp,
+            timestamp,
+            timestamp
+        )
+
+
+def seed_database(db, count, batch=50000):
+    """直接用 executemany 向 QuestionDatabase 批量写入 count 行示例数据
+
+    绕过 add_questions 直接写表，同时递增数据版本，使 seen-id 索引在下次写入时重新加载。
+    """
+    from app.database.models import QUESTION_FIELDS, QUESTION_COLUMNS
+
+    rows = sample_question_rows(count)
+    while True:
+        chunk = [row for _, row in zip(range(batch), rows)]
+        if not chunk:
+            break
+        with db.lock, db.conn:
+            db.conn.executemany(
+                f"INSERT OR REPLACE INTO questions ({QUESTION_COLUMNS}) VALUES ({', '.join('?' * len(QUESTION_FIELDS))})",
+                chunk
+            )
+            db.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+
+
+def write_json(path, data):
+    """把结果写入 JSON 文件，自动创建目录"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
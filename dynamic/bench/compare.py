@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+比较两次基准运行的结果
+
+用法：
+
+    python bench/compare.py bench/results/abc1234.json bench/results/def5678.json
+
+逐项列出两份结果中都存在的数值指标及变化百分比。名称以 _ms、_seconds、_bytes
+结尾的指标越小越好，其余（如 rows_per_sec）越大越好；变化超过 --threshold 时标记。
+"""
+import json
+import argparse
+
+LOWER_IS_BETTER = ("_ms", "_seconds", "seconds", "_bytes", "bytes_per_object")
+
+
+def flatten(data, prefix=""):
+    """把嵌套结果展开为 {路径: 数值}"""
+    items = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            items.update(flatten(value, f"{prefix}.{key}" if prefix else str(key)))
+    elif isinstance(data, list):
+        for index, value in enumerate(data):
+            items.update(flatten(value, f"{prefix}[{index}]"))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        items[prefix] = data
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较两次基准运行的结果")
+    parser.add_argument("baseline", help="基线结果 JSON")
+    parser.add_argument("candidate", help="待比较结果 JSON")
+    parser.add_argument("--threshold", type=float, default=10.0, help="标记变化的百分比阈值")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+
+    print(f"{baseline.get('commit')} -> {candidate.get('commit')}")
+    old = flatten(baseline.get("results", {}))
+    new = flatten(candidate.get("results", {}))
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key], new[key]
+        if before == 0:
+            continue
+        change = (after - before) / abs(before) * 100
+        lower_is_better = any(key.split(".")[-1].endswith(suffix) for suffix in LOWER_IS_BETTER)
+        improved = change < 0 if lower_is_better else change > 0
+        flag = ""
+        if abs(change) >= args.threshold:
+            flag = "  改善" if improved else "  退化"
+        print(f"{key:<70} {before:>14} -> {after:<14} {change:+7.1f}%{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+冷启动导入耗时基准（基于 `python -X importtime`）
+
+用法：
+
+    python bench/importtime.py --runs 5 --json bench/results/importtime.json
+
+对每个入口模块在全新的解释器中执行 `import <module>`，解析 -X importtime 的输出，
+报告总耗时的中位数、最慢的若干个顶层依赖，以及是否加载了 Playwright。
+"""
+import sys
+import argparse
+import statistics
+import subprocess
+
+from common import ROOT, write_json
+
+# 入口模块：CLI、Web 服务器和调度器
+DEFAULT_MODULES = ["app.main", "app.frontend.server", "app.scheduler.scheduler"]
+
+# 这些模块出现在导入列表中说明启动路径上有不该有的重量级依赖
+HEAVY_MODULES = ["playwright", "uvicorn", "fastapi"]
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 输出，返回 [(模块名, self_us, cumulative_us, 深度)]"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        self_us, cumulative_us, name = fields
+        # 名称前有一个空格，之后每层嵌套缩进两个空格
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def measure(module):
+    """在新解释器中导入 module 一次，返回解析后的导入记录"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def children_of(entries, module):
+    """返回 module 的直接依赖（-X importtime 中子模块列在父模块之前）"""
+    for index, (name, _, _, depth) in enumerate(entries):
+        if name == module and depth == 0:
+            children = []
+            for child_name, _, cumulative, child_depth in reversed(entries[:index]):
+                if child_depth == 0:
+                    break
+                if child_depth == 1:
+                    children.append((child_name, cumulative))
+            return children
+    return []
+
+
+def benchmark(module, runs, top):
+    """多次测量同一入口，汇总中位数"""
+    totals = []
+    targets = []
+    entries = []
+    for _ in range(runs):
+        entries = measure(module)
+        # 顶层（深度 0）条目的累计耗时之和即解释器启动加导入的总耗时
+        totals.append(sum(cumulative for _, _, cumulative, depth in entries if depth == 0))
+        targets.append(next(
+            (cumulative for name, _, cumulative, depth in entries if name == module and depth == 0), 0
+        ))
+
+    loaded = {name.split(".")[0] for name, _, _, _ in entries}
+    slowest = sorted(children_of(entries, module), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "runs": runs,
+        "total_median_ms": round(statistics.median(totals) / 1000, 2),
+        "import_median_ms": round(statistics.median(targets) / 1000, 2),
+        "import_min_ms": round(min(targets) / 1000, 2),
+        "modules_loaded": len(entries),
+        "heavy_modules": [m for m in HEAVY_MODULES if m in loaded],
+        "top_imports_ms": [[name, round(us / 1000, 2)] for name, us in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="冷启动导入耗时基准")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="要测量的入口模块")
+    parser.add_argument("--runs", type=int, default=5, help="每个模块的测量次数")
+    parser.add_argument("--top", type=int, default=8, help="列出最慢的顶层依赖个数")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    results = [benchmark(module, args.runs, args.top) for module in args.modules]
+    for result in results:
+        heavy = ", ".join(result["heavy_modules"]) or "无"
+        print(f"{result['module']}: 导入中位数 {result['import_median_ms']}ms "
+              f"(含解释器启动 {result['total_median_ms']}ms), 最小 {result['import_min_ms']}ms, "
+              f"{result['modules_loaded']} 个模块, 重量级依赖: {heavy}")
+        for name, ms in result["top_imports_ms"]:
+            print(f"    {ms:>8.2f}ms  {name}")
+
+    if args.json:
+        write_json(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
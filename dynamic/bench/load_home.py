@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+首页负载测试：测量爬虫写库期间 `/` 的延迟分位数
+
+用法（先在另一个终端运行 `python run.py run-server`）：
+
+    python bench/load_home.py --db questions.db --url http://127.0.0.1:8000/ --requests 1000 --concurrency 50
+
+--db 必须是服务端正在使用的数据库。写线程写入的问题 id 都以 loadtest- 开头，
+不会与真实问题重复，测试结束时连同它们的快照、趋势和详情队列记录一起删除。
+
+测试分两轮：第一轮只发请求作为基线；第二轮同时启动一个写线程，
+模拟爬虫持续向同一个数据库批量写入问题。两轮的 p50/p95/p99 应当接近，
+若第二轮明显变差，说明服务端仍在事件循环中做阻塞的数据库操作。
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+
+import aiohttp
+
+from common import summarize
+from app.database.models import QuestionDatabase, Question
+
+
+def writer_loop(database_path, stop_event, batch_size, interval, stats):
+    """模拟爬虫：持续批量写入问题直到 stop_event 被设置，写入的 id 记在 stats["ids"] 中"""
+    db = QuestionDatabase(database_path)
+    try:
+        while not stop_event.is_set():
+            base = random.randint(10 ** 8, 10 ** 9)
+            batch = [
+                Question(
+                    id=f"loadtest-{base + i}",
+                    title=f"负载测试问题 {base + i}",
+                    url=f"https://load-test.invalid/question/{base + i}",
+                    follow_count=random.randint(0, 10000)
+                )
+                for i in range(batch_size)
+            ]
+            stats["ids"].update(q.id for q in batch)
+            stats["written"] += db.add_questions(batch)
+            time.sleep(interval)
+    finally:
+        db.close()
+
+
+def cleanup(database_path, ids):
+    """删除写线程写入的问题，返回删除的条数"""
+    db = QuestionDatabase(database_path)
+    try:
+        return db.delete_questions(sorted(ids))
+    finally:
+        db.close()
+
+
+async def fire_requests(url, total, concurrency):
+    """并发请求 url，返回每个请求的延迟（毫秒）"""
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async def worker(session):
+        nonlocal errors
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+                    if response.status >= 400:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def run_phase(args, with_writer):
+    """运行一轮测试"""
+    stop_event = threading.Event()
+    stats = {"written": 0, "ids": set()}
+    writer = None
+    if with_writer:
+        writer = threading.Thread(
+            target=writer_loop,
+            args=(args.db, stop_event, args.batch, args.write_interval, stats),
+            daemon=True
+        )
+        writer.start()
+
+    try:
+        latencies, errors = asyncio.run(fire_requests(args.url, args.requests, args.concurrency))
+    finally:
+        stop_event.set()
+        if writer:
+            writer.join()
+            cleanup(args.db, stats["ids"])
+
+    result = summarize(latencies)
+    result["errors"] = errors
+    result["rows_written"] = stats["written"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="首页负载测试")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/", help="被测地址")
+    parser.add_argument("--db", required=True, help="服务端使用的数据库路径（测试写入的问题在结束时删除）")
+    parser.add_argument("--requests", type=int, default=500, help="每轮请求数")
+    parser.add_argument("--concurrency", type=int, default=20, help="并发数")
+    parser.add_argument("--batch", type=int, default=50, help="写线程每批写入的问题数")
+    parser.add_argument("--write-interval", type=float, default=0.05, help="写线程批次间隔（秒）")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    results = {
+        "baseline": run_phase(args, with_writer=False),
+        "during_scrape": run_phase(args, with_writer=True),
+    }
+
+    for name, result in results.items():
+        print(f"{name:>14}: p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+              f"p99={result['p99_ms']}ms max={result['max_ms']}ms "
+              f"errors={result['errors']} rows_written={result['rows_written']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
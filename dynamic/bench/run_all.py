@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+运行全部离线基准并把结果写入 bench/results/<提交>.json
+
+用法：
+
+    python bench/run_all.py                 # 快速规模（10k 行）
+    python bench/run_all.py --full          # 完整规模（含 1M 行）
+    python bench/run_all.py --only db server
+
+所有基准都不访问网络：豆瓣解析使用 bench/fixtures 中保存的页面，知乎提取使用 debug/*.html
+并通过 Playwright 路由拦截返回，数据库和服务器基准使用临时目录中的数据库。
+用 bench/compare.py 比较两次提交的结果。
+"""
+import os
+import sys
+import time
+import argparse
+import platform
+import subprocess
+import traceback
+
+from common import ROOT, RESULTS_DIR, write_json
+
+import bench_db
+import bench_douban_parse
+import bench_question_model
+import bench_server
+import bench_zhihu_extract
+import importtime
+
+
+def _git(*args):
+    try:
+        return subprocess.check_output(["git", *args], cwd=ROOT, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def suites(full):
+    """基准名称 -> 无参调用；--full 时使用请求中约定的大规模参数"""
+    rows = 1000000 if full else 10000
+    return {
+        "importtime": lambda: [importtime.benchmark(m, 5, 8) for m in importtime.DEFAULT_MODULES],
+        "douban_parse": lambda: bench_douban_parse.run(iterations=200),
+        "zhihu_extract": lambda: bench_zhihu_extract.run(iterations=20),
+        "question_model": lambda: bench_question_model.run(rows=rows, memory_sample=100000),
+        "db": lambda: bench_db.run(sizes=(10000, 1000000) if full else (10000,)),
+        "server": lambda: bench_server.run(rows=rows, requests=1000 if full else 300, concurrency=20),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="运行全部离线基准")
+    parser.add_argument("--full", action="store_true", help="使用完整规模（1M 行）")
+    parser.add_argument("--only", nargs="+", help="只运行指定的基准")
+    parser.add_argument("--output", help="结果文件路径，默认 bench/results/<提交>.json")
+    args = parser.parse_args()
+
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    dirty = bool(_git("status", "--porcelain", "--untracked-files=no"))
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "full": args.full,
+        "results": {},
+    }
+
+    for name, bench in suites(args.full).items():
+        if args.only and name not in args.only:
+            continue
+        print(f"==> {name}")
+        start = time.perf_counter()
+        try:
+            report["results"][name] = bench()
+        except Exception as e:
+            traceback.print_exc()
+            report["results"][name] = {"error": str(e)}
+        print(f"    完成，用时 {time.perf_counter() - start:.1f}s")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    write_json(output, report)
+    print(f"结果已写入 {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+浸泡测试：连续运行数百个加速的调度周期，检查内存、文件描述符、子进程和 SQLite 连接是否持续增长
+
+用法：
+
+    python bench/soak.py --cycles 300 --warmup 20
+    python bench/soak.py --cycles 100 --in-process --json soak.json
+
+调度器（ScraperScheduler）平时每个周期新建事件循环和浏览器，一连运行好几天；
+这里在后台线程中启动模拟站点（bench/stubsite.py），把 zhihu_base_url、数据库、cookies
+和静态资源缓存都指向临时目录，然后不等间隔地连续调用 scheduler.tick()。
+每隔 --sample-every 个周期记录一次本进程及其子孙进程（爬虫子进程、Chromium）的：
+
+- RSS 总和；
+- 打开的文件描述符数；
+- 子孙进程数；
+- 指向 .db 文件的描述符数（即 SQLite 连接数，-wal / -shm 不计）。
+
+预热 --warmup 个周期后的采样作为基线，最后三次采样的中位数超出基线的阈值时判为泄漏，
+退出码为 1。调度器关闭后仍残留的子进程也算失败。数据来自 /proc，只能在 Linux 上运行。
+需要安装 Playwright；未安装 Chromium 时每个周期的爬取都会失败，测的是失败路径。
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import statistics
+import tempfile
+
+from common import write_json
+from bench_distributed import _start_stub
+
+# 超过基线多少判为泄漏
+DEFAULT_THRESHOLDS = {
+    "rss_mb": 64.0,
+    "fds": 16,
+    "children": 1,
+    "sqlite_connections": 1,
+}
+
+
+def _fd_targets(pid):
+    """pid 打开的文件描述符指向的路径；进程已退出或无权读取时返回空列表"""
+    fd_dir = f"/proc/{pid}/fd"
+    targets = []
+    try:
+        entries = os.listdir(fd_dir)
+    except OSError:
+        return targets
+    for entry in entries:
+        try:
+            targets.append(os.readlink(os.path.join(fd_dir, entry)))
+        except OSError:
+            continue
+    return targets
+
+
+def _is_resource_tracker(pid):
+    """multiprocessing 的 resource_tracker 随首个 spawn 子进程启动、与本进程同生共死，不算泄漏"""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return b"multiprocessing.resource_tracker" in f.read()
+    except OSError:
+        return False
+
+
+def sample(pid=None):
+    """采样 pid（默认本进程）及其子孙进程的资源占用"""
+    from app.scheduler.worker import process_tree
+
+    pid = pid or os.getpid()
+    tree = process_tree(pid) or {pid: 0}
+    tree = {p: rss for p, rss in tree.items() if not _is_resource_tracker(p)}
+    targets = [t for p in tree for t in _fd_targets(p)]
+    return {
+        "rss_mb": round(sum(tree.values()) / 1e6, 2),
+        "fds": len(targets),
+        "children": len(tree) - 1,
+        "sqlite_connections": sum(1 for t in targets if t.endswith(".db")),
+    }
+
+
+def _configure(temp_dir, base_url, worker_process, limit):
+    """把调度器用到的所有路径指向临时目录，站点指向模拟站点"""
+    from app.config.settings import settings
+
+    cookies_file = os.path.join(temp_dir, "cookies.json")
+    with open(cookies_file, "w", encoding="utf-8") as f:
+        json.dump({"z_c0": "soak"}, f)
+    settings.zhihu_base_url = base_url
+    settings.cookies_file = cookies_file
+    settings.accounts = []
+    settings.database_path = os.path.join(temp_dir, "soak.db")
+    settings.archive_dir = os.path.join(temp_dir, "archive")
+    settings.asset_cache_dir = os.path.join(temp_dir, "asset_cache")
+    settings.analytics_path = os.path.join(temp_dir, "analytics.duckdb")
+    settings.question_limit = limit
+    settings.headless = True
+    settings.worker_process = worker_process
+    settings.crawl_mode = "local"
+    settings.detail_pages = 0
+    settings.extra_sites = []
+
+
+def _growth(baseline, samples):
+    """最后三次采样的中位数相对基线的增长"""
+    tail = samples[-3:]
+    return {key: round(statistics.median(s[key] for s in tail) - baseline[key], 2) for key in baseline}
+
+
+def _rss_slope(samples):
+    """预热后 RSS 随周期数的最小二乘斜率（MB / 100 个周期）"""
+    if len(samples) < 2:
+        return 0.0
+    xs = [s["cycle"] for s in samples]
+    ys = [s["rss_mb"] for s in samples]
+    mean_x, mean_y = statistics.mean(xs), statistics.mean(ys)
+    var = sum((x - mean_x) ** 2 for x in xs)
+    if not var:
+        return 0.0
+    return round(sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var * 100, 3)
+
+
+def _run(cycles, warmup, sample_every, worker_process, limit, thresholds):
+    temp_dir = tempfile.mkdtemp(prefix="soak_")
+    base_url, stub = _start_stub(dict(rate=10 ** 6, window=60))
+    _configure(temp_dir, base_url, worker_process, limit)
+
+    from app.scheduler.scheduler import ScraperScheduler
+
+    before = sample()
+    scheduler = ScraperScheduler(interval_minutes=1, question_limit=limit)
+    samples, baseline = [], None
+    start = time.perf_counter()
+    try:
+        for cycle in range(1, cycles + 1):
+            scheduler.tick("soak")
+            if cycle == warmup:
+                baseline = sample()
+            if cycle > warmup and (cycle - warmup) % sample_every == 0:
+                samples.append({"cycle": cycle, **sample()})
+                last = samples[-1]
+                print(f"[soak] 第 {cycle} 个周期: RSS {last['rss_mb']} MB, fd {last['fds']}, "
+                      f"子进程 {last['children']}, SQLite 连接 {last['sqlite_connections']}")
+        elapsed = time.perf_counter() - start
+    finally:
+        scheduler.shutdown()
+        scheduler.db.close()
+    # 给已退出的浏览器进程一点时间被回收
+    time.sleep(1)
+    after = sample()
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+    baseline = baseline or before
+    samples = samples or [{"cycle": cycles, **after}]
+    growth = _growth(baseline, samples)
+    failures = [f"{key} 增长 {growth[key]}，超过阈值 {limit_}"
+                for key, limit_ in thresholds.items() if growth[key] > limit_]
+    leftover = after["children"] - before["children"]
+    if leftover > 0:
+        failures.append(f"调度器关闭后残留 {leftover} 个子进程")
+    return {
+        "cycles": cycles,
+        "warmup": warmup,
+        "worker_process": worker_process,
+        "seconds": round(elapsed, 2),
+        "seconds_per_cycle": round(elapsed / max(1, cycles), 3),
+        "pages_served": sum(s["served"] for s in stub.stats.values()),
+        "before": before,
+        "baseline": baseline,
+        "after_shutdown": after,
+        "growth": growth,
+        "rss_mb_per_100_cycles": _rss_slope(samples),
+        "thresholds": thresholds,
+        "samples": samples,
+        "failures": failures,
+    }
+
+
+def run(cycles=300, warmup=20, sample_every=10, worker_process=True, limit=20, thresholds=None):
+    """运行一次浸泡测试；未安装 Playwright 或没有 /proc 时跳过"""
+    try:
+        import playwright.async_api  # noqa: F401
+    except ImportError:
+        return {"skipped": "playwright 未安装"}
+    if not os.path.isdir("/proc"):
+        return {"skipped": "需要 /proc（Linux）"}
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    return _run(cycles, min(warmup, cycles), max(1, sample_every), worker_process, limit, thresholds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="调度器浸泡测试")
+    parser.add_argument("--cycles", type=int, default=300, help="连续运行的调度周期数")
+    parser.add_argument("--warmup", type=int, default=20, help="预热周期数，之后的采样作为基线")
+    parser.add_argument("--sample-every", type=int, default=10, help="每隔多少个周期采样一次")
+    parser.add_argument("--limit", type=int, default=20, help="每个周期爬取的问题数量")
+    parser.add_argument("--in-process", action="store_true", help="在本进程中爬取，不用爬虫子进程")
+    parser.add_argument("--max-rss-mb", type=float, default=DEFAULT_THRESHOLDS["rss_mb"], help="RSS 增长阈值（MB）")
+    parser.add_argument("--max-fds", type=int, default=DEFAULT_THRESHOLDS["fds"], help="文件描述符增长阈值")
+    parser.add_argument("--max-children", type=int, default=DEFAULT_THRESHOLDS["children"], help="子进程数增长阈值")
+    parser.add_argument("--max-sqlite", type=int, default=DEFAULT_THRESHOLDS["sqlite_connections"],
+                        help="SQLite 连接数增长阈值")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    result = run(args.cycles, args.warmup, args.sample_every, not args.in_process, args.limit, {
+        "rss_mb": args.max_rss_mb,
+        "fds": args.max_fds,
+        "children": args.max_children,
+        "sqlite_connections": args.max_sqlite,
+    })
+    if args.json:
+        write_json(args.json, result)
+    if "skipped" in result:
+        print(f"已跳过: {result['skipped']}")
+        return
+    print(f"{result['cycles']} 个周期, {result['seconds']}s（每周期 {result['seconds_per_cycle']}s）, "
+          f"模拟站点返回 {result['pages_served']} 个页面")
+    print(f"基线 {result['baseline']}")
+    print(f"增长 {result['growth']}, RSS 每 100 周期 {result['rss_mb_per_100_cycles']} MB")
+    print(f"关闭后 {result['after_shutdown']}")
+    if result["failures"]:
+        for failure in result["failures"]:
+            print(f"失败: {failure}")
+        sys.exit(1)
+    print("未发现资源泄漏。")
+
+
+if __name__ == "__main__":
+    main()
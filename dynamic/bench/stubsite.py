@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+模拟知乎的本地测试站点，带按账号限流
+
+用法：
+
+    python bench/stubsite.py --port 8900 --rate 6 --window 60 --mode 429
+
+提供与爬虫提取逻辑相匹配的页面：
+- /hot                 热榜（.HotItem，带 "N 万热度"）
+- /、/explore、/question/waiting   含 /question/<id> 链接的列表页
+- /api/v4/me           登录探测：带有效 z_c0 cookie 时返回 200，否则 401
+- /account/unhuman     人机验证页（限流跳转目标）
+- /_stats              各账号的请求数和被限流次数（JSON）
+- /static/...          --assets-kb 大于 0 时页面引用的带哈希文件名的 JS/CSS（immutable）
+
+限流按 z_c0 cookie 区分账号（没有 cookie 的按客户端地址）：每个账号在 --window 秒内
+最多 --rate 次页面请求，超出后按 --mode 返回 429（带 Retry-After）或跳转到 /account/unhuman。
+有效账号由 --accounts 指定（逗号分隔的 z_c0 值），为空时任何非空 z_c0 都视为已登录。
+"""
+import time
+import random
+import argparse
+from collections import defaultdict, deque
+
+from aiohttp import web
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>{body}</body></html>"""
+
+
+class StubSite:
+    """模拟站点的状态：账号、限流窗口和统计"""
+
+    def __init__(self, rate=6, window=60.0, mode="429", accounts=None, questions=40, seed=0, assets_kb=0):
+        self.rate = rate
+        self.window = window
+        self.mode = mode
+        self.accounts = set(accounts or [])
+        self.history = defaultdict(deque)
+        self.stats = defaultdict(lambda: {"served": 0, "throttled": 0})
+        # 模拟构建产物：每个页面引用一个脚本和一个样式表，各 assets_kb KB
+        self.assets = {}
+        if assets_kb:
+            self.assets = {
+                "/static/main.app.5f3c2a1b.js": ("application/javascript", b"/*" + b"x" * (assets_kb * 1024) + b"*/"),
+                "/static/main.app.9d8e7f6a.css": ("text/css", b"/*" + b"y" * (assets_kb * 1024) + b"*/"),
+            }
+        self.asset_bytes = 0
+        rng = random.Random(seed)
+        self.questions = [
+            (str(600000000 + i), f"模拟问题标题 {i}：这是一个用于测试的知乎问题", rng.randint(10, 9000))
+            for i in range(questions)
+        ]
+
+    def account_of(self, request):
+        return request.cookies.get("z_c0") or f"anonymous@{request.remote}"
+
+    def logged_in(self, request):
+        token = request.cookies.get("z_c0")
+        return bool(token) and (not self.accounts or token in self.accounts)
+
+    def throttled(self, account):
+        """滑动窗口限流：窗口内请求数达到 rate 时返回 True"""
+        now = time.monotonic()
+        history = self.history[account]
+        while history and now - history[0] > self.window:
+            history.popleft()
+        if len(history) >= self.rate:
+            return True
+        history.append(now)
+        return False
+
+    def render_hot(self):
+        items = "".join(
+            f'<section class="HotItem"><div class="HotItem-content">'
+            f'<h2 class="HotItem-title"><a href="/question/{qid}">{title}</a></h2>'
+            f'<div class="HotItem-metrics">{heat} 万热度</div></div></section>'
+            for qid, title, heat in self.questions
+        )
+        return PAGE_TEMPLATE.format(title="知乎热榜", body=items)
+
+    def render_list(self, name):
+        links = "".join(
+            f'<div class="ContentItem"><a href="/question/{qid}">{title}</a></div>'
+            for qid, title, _ in self.questions
+        )
+        return PAGE_TEMPLATE.format(title=name, body=links)
+
+    def build_app(self):
+        """创建 aiohttp 应用"""
+        app = web.Application()
+
+        async def page(request):
+            account = self.account_of(request)
+            if self.throttled(account):
+                self.stats[account]["throttled"] += 1
+                if self.mode == "redirect":
+                    raise web.HTTPFound("/account/unhuman?type=unhuman")
+                return web.Response(status=429, text="Too Many Requests",
+                                    headers={"Retry-After": str(int(self.window))})
+            self.stats[account]["served"] += 1
+            login = "" if self.logged_in(request) else '<button class="SignFlow-submitButton">登录</button>'
+            if request.path == "/hot":
+                html = self.render_hot()
+            else:
+                html = self.render_list(request.path)
+            head = "".join(
+                f'<script src="{path}"></script>' if path.endswith(".js") else f'<link rel="stylesheet" href="{path}">'
+                for path in self.assets
+            )
+            html = html.replace("</head>", head + "</head>").replace("<body>", "<body>" + login)
+            return web.Response(text=html, content_type="text/html")
+
+        async def asset(request):
+            content_type, body = self.assets[request.path]
+            self.asset_bytes += len(body)
+            return web.Response(body=body, content_type=content_type,
+                                headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+        async def me(request):
+            if self.logged_in(request):
+                return web.json_response({"id": request.cookies.get("z_c0"), "name": "stub"})
+            return web.json_response({"error": "unauthorized"}, status=401)
+
+        async def unhuman(request):
+            return web.Response(text=PAGE_TEMPLATE.format(
+                title="安全验证", body="<p>系统监测到您的网络环境存在异常，请输入验证码</p>"
+            ), content_type="text/html")
+
+        async def stats(request):
+            return web.json_response(self.stats)
+
+        app.router.add_get("/api/v4/me", me)
+        app.router.add_get("/account/unhuman", unhuman)
+        app.router.add_get("/_stats", stats)
+        for path in ("/", "/hot", "/explore", "/question/waiting"):
+            app.router.add_get(path, page)
+        for path in self.assets:
+            app.router.add_get(path, asset)
+        return app
+
+
+async def start_stub_site(host="127.0.0.1", port=0, **options):
+    """在当前事件循环中启动站点，返回 (runner, base_url, stub)"""
+    stub = StubSite(**options)
+    runner = web.AppRunner(stub.build_app())
+    await runner.setup()
+    tcp_site = web.TCPSite(runner, host, port)
+    await tcp_site.start()
+    bound_port = tcp_site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}", stub
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模拟知乎的本地测试站点")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--rate", type=int, default=6, help="每个账号在窗口内允许的页面请求数")
+    parser.add_argument("--window", type=float, default=60.0, help="限流窗口（秒）")
+    parser.add_argument("--mode", choices=("429", "redirect"), default="429", help="限流方式")
+    parser.add_argument("--accounts", default="", help="有效的 z_c0 值，逗号分隔")
+    parser.add_argument("--assets-kb", type=int, default=0, help="页面引用的 JS/CSS 各多少 KB（0 表示不引用）")
+    args = parser.parse_args()
+
+    stub = StubSite(rate=args.rate, window=args.window, mode=args.mode,
+                    accounts=[a for a in args.accounts.split(",") if a], assets_kb=args.assets_kb)
+    print(f"模拟站点运行在 http://{args.host}:{args.port}")
+    web.run_app(stub.build_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
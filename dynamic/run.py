@@ -1,9 +1,9 @@
-#!/usr/bin/env python3
-"""
-Run script for Zhihu Hot Questions Scraper
-"""
-import sys
-from app.main import main
-
-if __name__ == "__main__":
+#!/usr/bin/env python3
+"""
+Run script for Zhihu Hot Questions Scraper
+"""
+import sys
+from app.main import main
+
+if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,229 @@
+"""
+Bulk downloader for Douban Top 250 posters and subject pages.
+
+Files are stored by content under <directory>/objects/<ab>/<sha256><ext>,
+so an image served under several URLs is kept once. index.json maps each
+downloaded URL to its object, and URLs already in the index are skipped
+on later runs. Responses are streamed to a temporary file while hashing,
+never held in memory as a whole.
+"""
+import os
+import csv
+import json
+import random
+import asyncio
+import hashlib
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+CHUNK_SIZE = 64 * 1024
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class ContentStore:
+    """Content-addressed file store with a URL index."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, 'objects')
+        self.tmp_dir = os.path.join(directory, 'tmp')
+        self.index_path = os.path.join(directory, 'index.json')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.index: Dict[str, dict] = {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error reading {self.index_path}, starting a new index: {e}")
+
+    def lookup(self, url: str) -> Optional[str]:
+        """Path of the stored copy of url, if it was downloaded before."""
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        path = os.path.join(self.directory, entry['path'])
+        return path if os.path.exists(path) else None
+
+    def object_path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest + ext)
+
+    async def save_stream(self, url: str, response: aiohttp.ClientResponse) -> Tuple[str, bool]:
+        """Stream a response body into the store; return (path, whether it is a new object)."""
+        ext = os.path.splitext(urlparse(url).path)[1].lower()[:8]
+        if not ext and 'html' in response.headers.get('Content-Type', ''):
+            ext = '.html'
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            path = self.object_path(digest.hexdigest(), ext)
+            new = not os.path.exists(path)
+            if new:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            else:
+                os.remove(tmp_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.index[url] = {
+            'digest': digest.hexdigest(),
+            'path': os.path.relpath(path, self.directory),
+            'size': size,
+        }
+        return path, new
+
+    def save_index(self):
+        """Write index.json atomically."""
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+
+async def fetch_to_store(session: aiohttp.ClientSession,
+                         store: ContentStore,
+                         url: str,
+                         attempts: int = 3) -> Tuple[str, bool]:
+    """Download url into the store, retrying rate limits, server errors and timeouts."""
+    for attempt in range(1, attempts + 1):
+        try:
+            async with session.get(url) as response:
+                if response.status in RETRY_STATUSES and attempt < attempts:
+                    retry_after = response.headers.get('Retry-After', '')
+                    delay = float(retry_after) if retry_after.isdigit() else 2 ** attempt
+                    print(f"{url} returned {response.status}, retrying in {delay:.0f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                response.raise_for_status()
+                return await store.save_stream(url, response)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            if attempt == attempts:
+                raise
+            print(f"Error fetching {url} ({e!r}), retrying")
+            await asyncio.sleep(2 ** attempt)
+    raise RuntimeError(f"{url}: giving up after {attempts} attempts")
+
+
+async def download_all(jobs: Sequence[Tuple[str, str]],
+                       store: ContentStore,
+                       concurrency: int = 8,
+                       page_delay: Tuple[float, float] = (2, 4),
+                       headers: Optional[dict] = None) -> Tuple[Dict[str, str], Dict[str, int]]:
+    """Download (kind, url) jobs with at most `concurrency` requests in flight.
+
+    kind is 'poster' or 'page'. Subject pages are paced like the list pages:
+    page requests start one at a time, a random page_delay apart, however
+    many workers are running. Posters come from the image CDN and are not
+    paced.
+    Returns ({url: path}, counts by outcome).
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    paths: Dict[str, str] = {}
+    counts = {'downloaded': 0, 'duplicate': 0, 'skipped': 0, 'failed': 0}
+    page_lock = asyncio.Lock()
+    next_page = 0.0
+
+    async def pace_page():
+        # Workers queue here, so page starts are spaced across all of them
+        nonlocal next_page
+        async with page_lock:
+            now = time.monotonic()
+            if next_page > now:
+                await asyncio.sleep(next_page - now)
+                now = time.monotonic()
+            next_page = now + random.uniform(*page_delay)
+
+    async def producer():
+        for job in jobs:
+            await queue.put(job)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def worker(session: aiohttp.ClientSession):
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            kind, url = job
+            existing = store.lookup(url)
+            if existing:
+                paths[url] = existing
+                counts['skipped'] += 1
+                continue
+            if kind == 'page':
+                await pace_page()
+            try:
+                path, new = await fetch_to_store(session, store, url)
+            except Exception as e:
+                print(f"Error downloading {url}: {e}")
+                counts['failed'] += 1
+                continue
+            paths[url] = path
+            counts['downloaded' if new else 'duplicate'] += 1
+            done = counts['downloaded'] + counts['duplicate']
+            if done % 50 == 0:
+                print(f"Downloaded {done} files...")
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=120, sock_read=30)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+        try:
+            await asyncio.gather(producer(), *(worker(session) for _ in range(concurrency)))
+        finally:
+            store.save_index()
+    return paths, counts
+
+
+def download_movies(movies: List[Tuple[str, float, str, str]],
+                    directory: str = 'douban_downloads',
+                    concurrency: int = 8,
+                    pages: bool = True,
+                    headers: Optional[dict] = None) -> Dict[str, int]:
+    """Download posters (and subject pages) of parsed movies and write movies.csv.
+
+    movies are (title, rating, subject URL, poster URL) entries as returned by
+    douban_movies.parse_movie_entries. movies.csv in the directory maps every
+    movie to its stored files.
+    """
+    store = ContentStore(directory)
+    # A dict keeps the order and downloads a URL shared by several movies once
+    jobs = {}
+    for _, _, subject_url, poster_url in movies:
+        if poster_url:
+            jobs.setdefault(poster_url, 'poster')
+        if pages and subject_url:
+            jobs.setdefault(subject_url, 'page')
+    jobs = [(kind, url) for url, kind in jobs.items()]
+
+    # Douban's image CDN rejects requests without a Douban referer
+    headers = dict(headers or {}, Referer='https://movie.douban.com/')
+    paths, counts = asyncio.run(download_all(jobs, store, concurrency=concurrency, headers=headers))
+
+    def relative(url: str) -> str:
+        return os.path.relpath(paths[url], directory) if url in paths else ''
+
+    manifest = os.path.join(directory, 'movies.csv')
+    with open(manifest, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Movie Title', 'Rating', 'Subject URL', 'Poster URL', 'Poster File', 'Page File'])
+        for title, rating, subject_url, poster_url in movies:
+            writer.writerow([title, rating, subject_url, poster_url,
+                             relative(poster_url), relative(subject_url)])
+    print(f"Downloads: {counts}; manifest saved to {manifest}")
+    return counts
@@ -1,78 +1,114 @@
-import requests
-from bs4 import BeautifulSoup
-import time
-import csv
-import random
-from typing import List, Tuple
-
-def get_headers() -> dict:
-    """Return headers to mimic a real browser."""
-    return {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Connection': 'keep-alive',
-    }
-
-def get_movie_data(url: str) -> List[Tuple[str, float]]:
-    """Fetch and parse movie data from the given URL."""
-    movies = []
-    
-    try:
-        # Add a random delay between requests (1-3 seconds)
-        time.sleep(random.uniform(1, 3))
-        
-        response = requests.get(url, headers=get_headers())
-        response.raise_for_status()  # Raise an exception for bad status codes
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        movie_items = soup.find_all('div', class_='item')
-        
-        for item in movie_items:
-            # Extract movie title
-            title = item.find('span', class_='title').text.strip()
-            
-            # Extract rating
-            rating = float(item.find('span', class_='rating_num').text.strip())
-            
-            movies.append((title, rating))
-            
-    except requests.RequestException as e:
-        print(f"Error fetching data: {e}")
-    except Exception as e:
-        print(f"Error parsing data: {e}")
-        
-    return movies
-
-def save_to_csv(movies: List[Tuple[str, float]], filename: str = 'douban_top250.csv'):
-    """Save movie data to a CSV file."""
-    try:
-        with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Movie Title', 'Rating'])
-            writer.writerows(movies)
-        print(f"Data successfully saved to {filename}")
-    except Exception as e:
-        print(f"Error saving to CSV: {e}")
-
-def main():
-    base_url = 'https://movie.douban.com/top250'
-    all_movies = []
-    
-    # Fetch all 10 pages
-    for page in range(10):
-        url = f"{base_url}?start={page * 25}"
-        print(f"Fetching page {page + 1}...")
-        
-        movies = get_movie_data(url)
-        all_movies.extend(movies)
-        
-        # Add a longer delay between pages (2-4 seconds)
-        time.sleep(random.uniform(2, 4))
-    
-    # Save all movies to CSV
-    save_to_csv(all_movies)
-    print(f"Total movies scraped: {len(all_movies)}")
-
-if __name__ == "__main__":
+import requests
+from bs4 import BeautifulSoup
+import time
+import csv
+import random
+import argparse
+from typing import List, Tuple
+
+# (title, rating, subject URL, poster URL)
+MovieEntry = Tuple[str, float, str, str]
+
+def get_headers() -> dict:
+    """Return headers to mimic a real browser."""
+    return {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Connection': 'keep-alive',
+    }
+
+def parse_movie_entries(html: str) -> List[MovieEntry]:
+    """Parse (title, rating, subject URL, poster URL) entries from a Top 250 list page."""
+    movies = []
+    soup = BeautifulSoup(html, 'html.parser')
+    movie_items = soup.find_all('div', class_='item')
+    
+    for item in movie_items:
+        # Extract movie title
+        title = item.find('span', class_='title').text.strip()
+        
+        # Extract rating
+        rating = float(item.find('span', class_='rating_num').text.strip())
+        
+        # Extract the subject page link and the poster image
+        link = item.select_one('div.hd a')
+        poster = item.select_one('div.pic img')
+        subject_url = link.get('href', '') if link else ''
+        poster_url = poster.get('src', '') if poster else ''
+        
+        movies.append((title, rating, subject_url, poster_url))
+    
+    return movies
+
+def parse_movie_items(html: str) -> List[Tuple[str, float]]:
+    """Parse (title, rating) pairs from a Top 250 list page."""
+    return [(title, rating) for title, rating, _, _ in parse_movie_entries(html)]
+
+def get_movie_data(url: str, with_links: bool = False) -> List[Tuple]:
+    """Fetch and parse movie data from the given URL.
+
+    Returns (title, rating) pairs, or full MovieEntry tuples with with_links.
+    """
+    movies = []
+    
+    try:
+        # Add a random delay between requests (1-3 seconds)
+        time.sleep(random.uniform(1, 3))
+        
+        response = requests.get(url, headers=get_headers())
+        response.raise_for_status()  # Raise an exception for bad status codes
+        
+        movies = parse_movie_entries(response.text) if with_links else parse_movie_items(response.text)
+            
+    except requests.RequestException as e:
+        print(f"Error fetching data: {e}")
+    except Exception as e:
+        print(f"Error parsing data: {e}")
+        
+    return movies
+
+def save_to_csv(movies: List[Tuple[str, float]], filename: str = 'douban_top250.csv'):
+    """Save movie data to a CSV file."""
+    try:
+        with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Movie Title', 'Rating'])
+            writer.writerows(movies)
+        print(f"Data successfully saved to {filename}")
+    except Exception as e:
+        print(f"Error saving to CSV: {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Scrape the Douban Top 250 movies')
+    parser.add_argument('--download', metavar='DIR',
+                        help='also download posters and subject pages into DIR (needs aiohttp)')
+    parser.add_argument('--concurrency', type=int, default=8, help='parallel downloads')
+    parser.add_argument('--posters-only', action='store_true', help='download posters but not subject pages')
+    args = parser.parse_args()
+    
+    base_url = 'https://movie.douban.com/top250'
+    all_movies = []
+    
+    # Fetch all 10 pages
+    for page in range(10):
+        url = f"{base_url}?start={page * 25}"
+        print(f"Fetching page {page + 1}...")
+        
+        movies = get_movie_data(url, with_links=True)
+        all_movies.extend(movies)
+        
+        # Add a longer delay between pages (2-4 seconds)
+        time.sleep(random.uniform(2, 4))
+    
+    # Save all movies to CSV
+    save_to_csv([(title, rating) for title, rating, _, _ in all_movies])
+    print(f"Total movies scraped: {len(all_movies)}")
+    
+    if args.download:
+        from douban_downloader import download_movies
+        download_movies(all_movies, args.download, concurrency=args.concurrency,
+                        pages=not args.posters_only, headers=get_headers())
+
+if __name__ == "__main__":
     main() 
\ No newline at end of file